@@ -1,6 +1,8 @@
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 import dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -116,3 +118,135 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+
+# Judge
+
+# Attempts judged simultaneously and tests of one attempt run in parallel
+JUDGE_WORKERS = int(os.environ.get('JUDGE_WORKERS', 2))
+JUDGE_TESTS_PER_ATTEMPT = int(os.environ.get(
+    'JUDGE_TESTS_PER_ATTEMPT', max(1, (os.cpu_count() or 1) // JUDGE_WORKERS)
+))
+
+# 'thread' judges attempts inside the web process, 'daemon' leaves them
+# to `manage.py judge` workers
+JUDGE_MODE = os.environ.get('JUDGE_MODE', 'thread')
+JUDGE_LEASE_TIME = 60  # s
+JUDGE_POLL_PERIOD = 1  # s
+JUDGE_MAX_RUNS = 3
+# How often thread mode looks for attempts left without a judge
+JUDGE_REAP_PERIOD = 30  # s
+# Test results of an attempt are written to the database in batches
+JUDGE_FLUSH_INTERVAL = 0.5  # s
+
+# Attempt status endpoint: how often waiting requests look for progress,
+# how long a long-poll request and an event stream may last. Every
+# waiting request holds a worker, so the attempt page long-polls for
+# JUDGE_STATUS_PAGE_WAIT and a process serves at most
+# JUDGE_STATUS_MAX_STREAMS event streams
+JUDGE_STATUS_POLL_PERIOD = 2  # s
+JUDGE_STATUS_MAX_WAIT = 10  # s
+JUDGE_STATUS_PAGE_WAIT = 5  # s
+JUDGE_STATUS_STREAM_TIME = 60  # s
+JUDGE_STATUS_MAX_STREAMS = 4
+
+# Class standings are cached until a result of the class changes; pupils
+# moved between classes show up after STANDINGS_CACHE_TIMEOUT
+STANDINGS_CACHE_TIMEOUT = 300  # s
+
+# Judge metrics are available to staff users, to requests with the header
+# "Authorization: Bearer JUDGE_METRICS_TOKEN" and to the comma-separated
+# JUDGE_METRICS_ALLOWED_IPS. Behind a reverse proxy every request comes
+# from the address of the proxy, usually 127.0.0.1, so list addresses
+# only if scrapers reach the application directly and use the token
+# otherwise
+JUDGE_METRICS_TOKEN = os.environ.get('JUDGE_METRICS_TOKEN')
+JUDGE_METRICS_ALLOWED_IPS = [address for address in os.environ.get(
+    'JUDGE_METRICS_ALLOWED_IPS', ''
+).split(',') if address]
+# Where `manage.py judge` serves its own metrics in daemon mode, off if
+# no port is set
+JUDGE_METRICS_HOST = os.environ.get('JUDGE_METRICS_HOST', '127.0.0.1')
+JUDGE_METRICS_PORT = int(os.environ['JUDGE_METRICS_PORT']) \
+    if 'JUDGE_METRICS_PORT' in os.environ else None
+
+# 'rlimit' runs solutions under kernel limits and reads their resources
+# from rusage, 'psutil' polls them (the only option outside of POSIX)
+JUDGE_EXECUTION_BACKEND = os.environ.get('JUDGE_EXECUTION_BACKEND', 'rlimit')
+# Delegated cgroup v2 directory to enforce memory limits exactly
+JUDGE_CGROUP_ROOT = os.environ.get('JUDGE_CGROUP_ROOT')
+# Address space allowed above the memory limit for runtime mappings
+JUDGE_ADDRESS_SPACE_HEADROOM = 64 * 1024  # KB
+
+JUDGE_CACHE_DIR = os.environ.get('JUDGE_CACHE_DIR',
+                                 os.path.join(BASE_DIR, 'judge_cache'))
+COMPILE_CACHE_SIZE = 512 * 1024 * 1024  # bytes
+
+# Run Python solutions in forks of a warm interpreter instead of starting
+# python3 for every test
+JUDGE_PYTHON_ZYGOTE = os.environ.get('JUDGE_PYTHON_ZYGOTE') == 'True'
+
+# Languages of solutions, see testingSystem/testSolution/languages.py.
+# Python runs in the interpreter of the judge, which compiles its bytecode
+JUDGE_LANGUAGES = {
+    'Python': {
+        'source': 'main.py',
+        'bytecode': True,
+        'zygote': True,
+        'run': (sys.executable or 'python3', '-B', '{program}'),
+    },
+    'C++': {
+        'source': 'main.cpp',
+        'compile': ('g++', '{source}', '-o', '{binary}'),
+        'flags': ('-O2', '-std=c++17'),
+        'run': ('{binary}',),
+    },
+}
+
+# Custom checkers run in a pool of processes, one for every test judged
+# at the same time, and are limited in time
+JUDGE_CHECKER_WORKERS = int(os.environ.get(
+    'JUDGE_CHECKER_WORKERS', JUDGE_WORKERS * JUDGE_TESTS_PER_ATTEMPT
+))
+JUDGE_CHECKER_TIME_LIMIT = 10  # s
+
+# Fail-fast judging runs the tests most solutions fail first, going by
+# the latest attempts of the task
+JUDGE_FAILURE_STATS_ATTEMPTS = 200
+JUDGE_FAILURE_STATS_TTL = 60  # s
+
+# Reuse verdicts of identical solutions judged on the same tests and limits
+JUDGE_VERDICT_CACHE = True
+
+# Every solution runs pinned to its own core out of JUDGE_CPUS ("0-3,6"),
+# by default all available cores but the first JUDGE_RESERVED_CPUS (one,
+# if there is more than one core). The web tier, the judge itself,
+# compilers and checkers run on the remaining cores. Processes on one
+# machine share the cores through lock files in JUDGE_WORKSPACE_ROOT
+JUDGE_CPUS = os.environ.get('JUDGE_CPUS')
+JUDGE_RESERVED_CPUS = int(os.environ['JUDGE_RESERVED_CPUS']) \
+    if 'JUDGE_RESERVED_CPUS' in os.environ else None
+JUDGE_CPU_PINNING = os.environ.get('JUDGE_CPU_PINNING', 'True') == 'True'
+
+# Attempts are compiled and run in reused directories on a RAM-backed file
+# system; new ones are handed out while the pool takes less than
+# JUDGE_WORKSPACE_SIZE
+JUDGE_RAM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') \
+    else tempfile.gettempdir()
+JUDGE_WORKSPACE_ROOT = os.environ.get('JUDGE_WORKSPACE_ROOT', os.path.join(
+    JUDGE_RAM_DIR, 'school-testing-system'
+))
+JUDGE_WORKSPACE_SIZE = 256 * 1024 * 1024  # bytes
+# Output of solutions grows up to the output limit of the task for every
+# running test, so it is spooled to a separate RAM-backed directory. Tests
+# wait while their output limits add up to more than JUDGE_SPOOL_SIZE. Set
+# JUDGE_SPOOL_DIR to a directory on disk to spool output there instead
+JUDGE_SPOOL_DIR = os.environ.get('JUDGE_SPOOL_DIR', os.path.join(
+    JUDGE_RAM_DIR, 'school-testing-system-spool'
+))
+JUDGE_SPOOL_SIZE = int(os.environ.get('JUDGE_SPOOL_SIZE',
+                                      1024 * 1024 * 1024))  # bytes
+
+# Content-addressed storage of test inputs and outputs
+TEST_DATA_DIR = os.environ.get('TEST_DATA_DIR',
+                               os.path.join(BASE_DIR, 'test_data'))
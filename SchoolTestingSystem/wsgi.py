@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SchoolTestingSystem.settings')
 
 application = get_wsgi_application()
+
+# Keep the web tier off the cores of solutions, then resume judging
+# interrupted by a restart; imported once Django is set up
+from testingSystem.testSolution import cores  # noqa: E402
+from testingSystem.testSolution.testing import start_reaper  # noqa: E402
+
+cores.pin_to_reserved()
+start_reaper()
@@ -1,10 +1,24 @@
 from django.contrib import admin
-from . import models
+from . import models, forms
+
+
+class TestAdmin(admin.ModelAdmin):
+    form = forms.TestForm
+    list_display = ('__str__', 'input_size', 'output_size')
+
+
+class TestGroupAdmin(admin.ModelAdmin):
+    list_display = ('name', 'testset', 'points')
+    filter_horizontal = ('tests', 'dependencies')
+
 
 admin.site.register(models.MyUser)
 admin.site.register(models.Class)
-admin.site.register(models.Test)
+admin.site.register(models.Test, TestAdmin)
 admin.site.register(models.CheckedTest)
 admin.site.register(models.Testset)
+admin.site.register(models.TestGroup, TestGroupAdmin)
 admin.site.register(models.Task)
 admin.site.register(models.Attempt)
+admin.site.register(models.Standing)
+admin.site.register(models.CachedVerdict)
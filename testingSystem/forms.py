@@ -1,5 +1,6 @@
 from django import forms
-from . import models
+from . import models, storage
+from .testSolution import languages
 
 
 class AuthForm(forms.Form):
@@ -9,7 +10,46 @@ class AuthForm(forms.Form):
 
 
 class TaskForm(forms.Form):
-    language = forms.ChoiceField(choices=models.Language.choices)
+    language = forms.ChoiceField(choices=languages.choices)
     solution = forms.CharField(required=False, empty_value=None,
                                max_length=256 * 1024)
     solution_file = forms.FileField(required=False, max_length=256 * 1024)
+
+
+class TestForm(forms.ModelForm):
+    """Форма теста в админке: данные вводятся текстом или загружаются"""
+    EDITABLE_SIZE = 256 * 1024
+
+    input = forms.CharField(required=False, strip=False,
+                            widget=forms.Textarea)
+    input_file = forms.FileField(required=False)
+    output = forms.CharField(required=False, strip=False,
+                             widget=forms.Textarea)
+    output_file = forms.FileField(required=False)
+
+    class Meta:
+        model = models.Test
+        fields = []
+
+    def __init__(self, *args, **kwargs):
+        super(TestForm, self).__init__(*args, **kwargs)
+        for name in ('input', 'output'):
+            if self.instance.pk is None:
+                continue
+            if getattr(self.instance, f'{name}_size') <= self.EDITABLE_SIZE:
+                self.initial[name] = getattr(self.instance, name)
+            else:
+                self.fields[name].help_text = \
+                    'Тест слишком большой для редактирования, ' \
+                    'загрузите новый файл или оставьте поле пустым'
+
+    def save(self, commit=True):
+        for name in ('input', 'output'):
+            file = self.cleaned_data.get(f'{name}_file')
+            if file is not None:
+                digest, size = storage.put_chunks(file.chunks())
+                setattr(self.instance, f'{name}_hash', digest)
+                setattr(self.instance, f'{name}_size', size)
+            elif name in self.changed_data or self.instance.pk is None:
+                setattr(self.instance, name, self.cleaned_data[name])
+        return super(TestForm, self).save(commit)
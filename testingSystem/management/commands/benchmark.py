@@ -0,0 +1,334 @@
+import collections
+import json
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+
+import psutil
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from SchoolTestingSystem import settings
+from testingSystem import models
+from testingSystem.testSolution import compile_cache, cores, \
+    instrumentation, testing
+from testingSystem.testSolution.judge_queue import JudgeQueue
+
+PYTHON_SUM = """import sys
+numbers = sys.stdin.read().split()[1:]
+print(sum(map(int, numbers)){extra})
+"""
+CPP_SUM = """#include <iostream>
+int main() {{
+    long long n, x, sum = 0;
+    std::cin >> n;
+    for (long long i = 0; i < n; ++i) {{
+        std::cin >> x;
+        sum += x;
+    }}
+    std::cout << sum{extra} << std::endl;
+}}
+"""
+
+# Name: (language, solution, expected verdict). Solutions read n numbers
+# and print their sum, {memory} is twice the memory limit in bytes
+SOLUTIONS = {
+    'py_ok': (models.Language.PYTHON, PYTHON_SUM.format(extra=""),
+              models.Status.OK),
+    'py_wa': (models.Language.PYTHON, PYTHON_SUM.format(extra=" + 1"),
+              models.Status.WA),
+    'py_tl': (models.Language.PYTHON, "while True:\n    pass\n",
+              models.Status.TL),
+    'py_ml': (models.Language.PYTHON,
+              "data = b'x' * {memory}\nprint(len(data))\n",
+              models.Status.ML),
+    'py_re': (models.Language.PYTHON, "raise RuntimeError('benchmark')\n",
+              models.Status.RE),
+    'cpp_ok': (models.Language.CPP, CPP_SUM.format(extra=""),
+               models.Status.OK),
+    'cpp_wa': (models.Language.CPP, CPP_SUM.format(extra=" + 1"),
+               models.Status.WA),
+    'cpp_tl': (models.Language.CPP,
+               "int main() {\n    volatile long long x = 0;\n"
+               "    while (true) ++x;\n}\n",
+               models.Status.TL),
+    'cpp_ml': (models.Language.CPP,
+               "#include <cstdio>\n#include <vector>\nint main() {\n"
+               "    std::vector<char> data({memory}LL, 1);\n"
+               "    std::printf(\"%d\\n\", data[12345]);\n}\n",
+               models.Status.ML),
+    'cpp_re': (models.Language.CPP,
+               "#include <cstdlib>\nint main() {\n    std::abort();\n}\n",
+               models.Status.RE),
+}
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, q):
+    """Процентиль по ближайшему рангу для отсортированного списка"""
+    return values[max(0, -(-len(values) * q // 100) - 1)]
+
+
+def describe(values):
+    values = sorted(values)
+    if not values:
+        return {'count': 0}
+    description = {
+        'count': len(values),
+        'total': round(sum(values), 6),
+        'mean': round(sum(values) / len(values), 6),
+    }
+    for q in PERCENTILES:
+        description[f'p{q}'] = round(percentile(values, q), 6)
+    description['max'] = round(values[-1], 6)
+    return description
+
+
+def cpu_seconds(usage):
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageRecorder:
+    """Подписчик instrumentation: длительности этапов по языкам"""
+
+    def __init__(self):
+        self.durations = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __call__(self, stage, language, seconds):
+        with self._lock:
+            self.durations[stage, language].append(seconds)
+
+    def report(self):
+        stages = collections.defaultdict(dict)
+        for (stage, language), durations in sorted(self.durations.items()):
+            stages[stage][language] = describe(durations)
+        return stages
+
+
+class Command(BaseCommand):
+    help = 'Измеряет производительность проверяющей системы на ' \
+           'синтетических задачах во временной базе данных и выводит ' \
+           'результат в формате JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1,
+                            help='Число задач')
+        parser.add_argument('--tests', type=int, default=10,
+                            help='Число тестов в задаче')
+        parser.add_argument('--test-size', type=int, default=1000,
+                            help='Число чисел во входных данных теста')
+        parser.add_argument('--solutions', default=",".join(SOLUTIONS),
+                            help='Решения через запятую, по умолчанию все: '
+                                 + ", ".join(SOLUTIONS))
+        parser.add_argument('--attempts', type=int, default=2,
+                            help='Число попыток каждого решения')
+        parser.add_argument('--concurrency', type=int,
+                            default=settings.JUDGE_WORKERS,
+                            help='Число одновременно проверяемых попыток')
+        parser.add_argument('--tests-per-attempt', type=int,
+                            default=settings.JUDGE_TESTS_PER_ATTEMPT,
+                            help='Число одновременно проверяемых тестов '
+                                 'попытки')
+        parser.add_argument('--time-limit', type=int, default=1000,
+                            help='Ограничение времени, мс')
+        parser.add_argument('--memory-limit', type=int, default=64 * 1024,
+                            help='Ограничение памяти, КБ')
+        parser.add_argument('--policy', default=models.JudgingPolicy.FULL,
+                            choices=models.JudgingPolicy.values,
+                            help='Политика проверки задач')
+        parser.add_argument('--verdict-cache', action='store_true',
+                            help='Не отключать кэш вердиктов')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора тестов')
+        parser.add_argument('--output', help='Файл для результата')
+
+    def handle(self, *args, solutions, output, **options):
+        cores.pin_to_reserved()
+        solutions = solutions.split(",")
+        unknown = set(solutions) - set(SOLUTIONS)
+        if unknown:
+            self.stderr.write(f"Unknown solutions: {', '.join(unknown)}")
+            return
+
+        with tempfile.TemporaryDirectory() as folder_path:
+            report = self.run_isolated(folder_path, solutions, **options)
+        result = json.dumps(report, indent=2)
+        if output:
+            with open(output, 'w') as f:
+                f.write(result + "\n")
+        else:
+            self.stdout.write(result)
+
+    def run_isolated(self, folder_path, solutions, verdict_cache,
+                     tests_per_attempt, **options):
+        """
+        Запускает бенчмарк во временной базе данных с временными
+        хранилищем тестов и кэшем компиляции
+        """
+        overridden = {
+            'TEST_DATA_DIR': os.path.join(folder_path, "tests"),
+            'JUDGE_VERDICT_CACHE': verdict_cache,
+            'JUDGE_TESTS_PER_ATTEMPT': tests_per_attempt,
+        }
+        saved = {name: getattr(settings, name) for name in overridden}
+        saved_cache = compile_cache.cache
+        # create_test_db points the connection to the temporary database,
+        # destroy_test_db points it back to the original one
+        original_name = connection.settings_dict['NAME']
+        original_test = connection.settings_dict.get('TEST')
+        connection.settings_dict['TEST'] = dict(
+            original_test or {},
+            NAME=os.path.join(folder_path, "db.sqlite3"),
+        )
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            for name, value in overridden.items():
+                setattr(settings, name, value)
+            compile_cache.cache = compile_cache.CompileCache(
+                os.path.join(folder_path, "compilation"),
+                settings.COMPILE_CACHE_SIZE
+            )
+            report = self.run(solutions, **options)
+            report['config'].update(solutions=solutions,
+                                    verdict_cache=verdict_cache,
+                                    tests_per_attempt=tests_per_attempt)
+            return report
+        finally:
+            for name, value in saved.items():
+                setattr(settings, name, value)
+            compile_cache.cache = saved_cache
+            connection.creation.destroy_test_db(original_name, verbosity=0)
+            connection.settings_dict['TEST'] = original_test
+
+    def seed(self, tasks, tests, test_size, time_limit, memory_limit,
+             policy, seed):
+        generator = random.Random(seed)
+        user = User.objects.create_user('benchmark')
+        author = models.MyUser.objects.create(
+            user=user, middle_name="", school="", rating=0,
+            role=models.Role.PUPIL,
+            school_class=models.Class.objects.create(name="benchmark"),
+        )
+        seeded = []
+        for number in range(tasks):
+            testset = models.Testset.objects.create()
+            for _ in range(tests):
+                numbers = [generator.randint(-10 ** 9, 10 ** 9)
+                           for _ in range(test_size)]
+                test = models.Test()
+                test.input = f"{test_size}\n{' '.join(map(str, numbers))}\n"
+                test.output = f"{sum(numbers)}\n"
+                test.save()
+                testset.tests.add(test)
+            seeded.append(models.Task.objects.create(
+                author=author, name=f"benchmark {number}", legend="",
+                statement="", testset=testset, samples_prefix=1,
+                time_limit=time_limit, memory_limit=memory_limit,
+                judging_policy=policy,
+            ))
+        return author, seeded
+
+    def run(self, solutions, tasks, tests, test_size, attempts, concurrency,
+            time_limit, memory_limit, policy, seed, **options):
+        author, seeded = self.seed(tasks, tests, test_size, time_limit,
+                                   memory_limit, policy, seed)
+        submitted = []
+        for number in range(attempts):
+            for name in solutions:
+                language, solution, _ = SOLUTIONS[name]
+                attempt = models.Attempt.objects.create(
+                    author=author, task=seeded[number % len(seeded)],
+                    language=language,
+                    solution=solution.replace("{memory}",
+                                              str(memory_limit * 2048)),
+                )
+                submitted.append((name, attempt))
+
+        started, finished = {}, {}
+
+        def judge(attempt):
+            testing.judge_attempt(attempt)
+            finished[attempt.id] = time.perf_counter()
+
+        recorder = StageRecorder()
+        queue = JudgeQueue(concurrency, judge)
+        process = psutil.Process()
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        rss_before = process.memory_info().rss // 1024
+        instrumentation.subscribe(recorder)
+        wall_started = time.perf_counter()
+        try:
+            for _, attempt in submitted:
+                started[attempt.id] = time.perf_counter()
+                queue.put(attempt)
+            queue.join()
+        finally:
+            instrumentation.unsubscribe(recorder)
+        wall_time = time.perf_counter() - wall_started
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        verdicts = collections.defaultdict(collections.Counter)
+        unexpected = []
+        judged = models.Attempt.objects.in_bulk(
+            [attempt.id for _, attempt in submitted]
+        )
+        for name, attempt in submitted:
+            verdict = judged[attempt.id].verdict
+            verdicts[name][verdict] += 1
+            if verdict != SOLUTIONS[name][2]:
+                unexpected.append({'solution': name, 'attempt': attempt.id,
+                                   'verdict': verdict})
+        solution_time = sum(models.CheckedTest.objects.filter(
+            attempt__in=judged
+        ).values_list('time_used', flat=True)) / 1000
+        judge_cpu = cpu_seconds(usage) - cpu_seconds(usage_before)
+        queue_stats = queue.stats()
+
+        return {
+            'config': {
+                'tasks': tasks, 'tests': tests, 'test_size': test_size,
+                'attempts': attempts, 'concurrency': concurrency,
+                'time_limit': time_limit, 'memory_limit': memory_limit,
+                'policy': policy, 'seed': seed,
+                'execution_backend': settings.JUDGE_EXECUTION_BACKEND,
+            },
+            'attempts': len(submitted),
+            'failed': queue_stats['failed'],
+            'wall_time': round(wall_time, 6),
+            'attempts_per_second': round(len(submitted) / wall_time, 6),
+            'tests_per_second': round(
+                len(submitted) * tests / wall_time, 6
+            ),
+            'latency': describe([finished[attempt_id] - started[attempt_id]
+                                 for attempt_id in finished]),
+            'queue_wait': {
+                'mean': round(queue_stats['average_wait'], 6),
+                'max': round(queue_stats['max_wait'], 6),
+            },
+            'stages': recorder.report(),
+            'verdicts': {name: dict(counter)
+                         for name, counter in verdicts.items()},
+            'unexpected': unexpected,
+            'judge': {
+                'cpu_seconds': round(judge_cpu, 6),
+                'cpu_seconds_per_attempt': round(
+                    judge_cpu / len(submitted), 6
+                ),
+                'children_cpu_seconds': round(
+                    cpu_seconds(children) - cpu_seconds(children_before), 6
+                ),
+                'solution_cpu_seconds': round(solution_time, 6),
+                'rss_kb': process.memory_info().rss // 1024,
+                'rss_growth_kb': process.memory_info().rss // 1024
+                - rss_before,
+                'max_rss_kb': usage.ru_maxrss,
+            },
+        }
@@ -0,0 +1,79 @@
+import threading
+import traceback
+
+from django import db
+from django.core.management.base import BaseCommand
+
+from SchoolTestingSystem import settings
+from testingSystem.testSolution import cores, leases, metrics
+from testingSystem.testSolution.testing import judge_claimed_attempt
+
+
+class Command(BaseCommand):
+    help = 'Забирает попытки из базы данных и проверяет их'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.JUDGE_WORKERS,
+                            help='Число одновременно проверяемых попыток')
+        parser.add_argument('--owner', default=leases.default_owner(),
+                            help='Имя проверяющего в арендах попыток')
+        parser.add_argument('--metrics-port', type=int,
+                            default=settings.JUDGE_METRICS_PORT,
+                            help='Порт, на котором отдаются метрики')
+
+    def handle(self, *args, workers, owner, metrics_port, **options):
+        cores.pin_to_reserved()
+        self.workers = workers
+        self.active = 0
+        self.lock = threading.Lock()
+        if metrics_port is not None:
+            metrics.serve(metrics_port, self.stats)
+            self.stdout.write(f"Metrics are served on port {metrics_port}")
+        recovered = leases.recover()
+        stopped = threading.Event()
+        threads = [threading.Thread(target=self.work, daemon=True,
+                                    args=[f"{owner}:{number}", stopped])
+                   for number in range(workers)]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Judge {owner} started with {workers} workers, "
+                          f"{recovered} interrupted attempts requeued")
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(settings.JUDGE_POLL_PERIOD)
+        except KeyboardInterrupt:
+            self.stdout.write("Finishing attempts in progress, "
+                              "interrupt again to abandon them")
+            stopped.set()
+            for thread in threads:
+                thread.join()
+
+    def stats(self):
+        # Attempts wait in the database, not in a queue of this process
+        with self.lock:
+            return {'workers': self.workers, 'active': self.active,
+                    'depth_by_priority': {}}
+
+    def work(self, owner, stopped):
+        while not stopped.is_set():
+            try:
+                attempt = leases.claim(owner)
+                if attempt is None:
+                    stopped.wait(settings.JUDGE_POLL_PERIOD)
+                    continue
+                self.stdout.write(f"{owner}: judging attempt {attempt.id}")
+                with self.lock:
+                    self.active += 1
+                try:
+                    judge_claimed_attempt(attempt, owner)
+                finally:
+                    with self.lock:
+                        self.active -= 1
+            except Exception:
+                traceback.print_exc()
+                stopped.wait(settings.JUDGE_POLL_PERIOD)
+            finally:
+                db.close_old_connections()
@@ -0,0 +1,131 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from SchoolTestingSystem import settings
+from testingSystem import models
+from testingSystem.testSolution import cores, results, verdict_cache
+from testingSystem.testSolution.judge_queue import Priority
+from testingSystem.testSolution.testing import judge_queue
+
+REPORT_PERIOD = 5  # s
+BATCH_SIZE = 500
+
+
+def outdated_attempts(attempts):
+    """
+    Попытки, проверенные на другой версии набора тестов или с другими
+    ограничениями, чекером или настройками языка. Попытки по задачам без
+    набора тестов считаются актуальными
+    """
+    outdated = []
+    for task in models.Task.objects.filter(
+            id__in=attempts.values('task_id'), testset__isnull=False
+    ).select_related('testset'):
+        task_attempts = attempts.filter(task=task)
+        judged_differently = Q()
+        for language in task_attempts.values_list(
+                'language', flat=True
+        ).distinct().order_by():
+            judged_differently |= Q(
+                attempt__language=language
+            ) & ~Q(judge_fingerprint=verdict_cache.judge_fingerprint(
+                task, language
+            ))
+        outdated += task_attempts.filter(
+            ~Q(testset_version=task.testset.version) |
+            Q(id__in=models.CheckedTest.objects.filter(
+                judged_differently, attempt__task=task
+            ).values('attempt_id'))
+        ).values_list('id', flat=True)
+    return outdated
+
+
+def load_dependent_attempts(attempts):
+    """
+    Попытки с результатами, которые зависят от загрузки проверяющего,
+    например TL. Попытки по задачам без набора тестов не учитываются
+    """
+    return list(attempts.filter(
+        task__testset__isnull=False,
+        checked_tests__status__in=results.LOAD_DEPENDENT_STATUSES
+    ).distinct().values_list('id', flat=True))
+
+
+class Command(BaseCommand):
+    help = 'Перепроверяет попытки, тесты или настройки задач которых ' \
+           'изменились. Заново запускаются только изменившиеся тесты'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--task', type=int, action='append',
+                            dest='tasks', help='id задачи')
+        parser.add_argument('--class', action='append', dest='classes',
+                            help='Название класса авторов попыток')
+        parser.add_argument('--since', help='Начальная дата, ГГГГ-ММ-ДД')
+        parser.add_argument('--until', help='Конечная дата, ГГГГ-ММ-ДД')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать устаревшие попытки')
+        parser.add_argument('--rerun-limits', action='store_true',
+                            help='Заново запустить тесты с вердиктами TL '
+                                 'и IL, даже если тесты не изменились')
+
+    def handle(self, *args, tasks, classes, since, until, dry_run,
+               rerun_limits, **options):
+        cores.pin_to_reserved()
+        attempts = models.Attempt.objects.exclude(
+            judge_state=models.JudgeState.JUDGING
+        )
+        if tasks:
+            attempts = attempts.filter(task_id__in=tasks)
+        if classes:
+            attempts = attempts.filter(author__school_class__name__in=classes)
+        if since:
+            attempts = attempts.filter(creation_time__date__gte=since)
+        if until:
+            attempts = attempts.filter(creation_time__date__lte=until)
+
+        outdated = outdated_attempts(attempts)
+        if rerun_limits:
+            outdated = sorted(set(outdated) |
+                              set(load_dependent_attempts(attempts)))
+        self.stdout.write(f"{len(outdated)} outdated attempts")
+        if dry_run or not outdated:
+            return
+
+        for start in range(0, len(outdated), BATCH_SIZE):
+            batch = outdated[start:start + BATCH_SIZE]
+            if rerun_limits:
+                models.CheckedTest.objects.filter(
+                    attempt_id__in=batch,
+                    status__in=results.LOAD_DEPENDENT_STATUSES
+                ).update(status=models.Status.TS, memory_used=0,
+                         time_used=0, message="")
+            models.Attempt.objects.filter(id__in=batch).update(
+                judge_state=models.JudgeState.PENDING, judge_runs=0,
+                judge_priority=Priority.REJUDGE
+            )
+        if settings.JUDGE_MODE != 'daemon':
+            for attempt_id in outdated:
+                judge_queue.put(models.Attempt(id=attempt_id),
+                                Priority.REJUDGE)
+        self.report_progress(outdated)
+
+    def report_progress(self, outdated):
+        started = time.monotonic()
+        while True:
+            remaining = sum(
+                models.Attempt.objects.filter(
+                    id__in=outdated[start:start + BATCH_SIZE]
+                ).exclude(judge_state=models.JudgeState.DONE).count()
+                for start in range(0, len(outdated), BATCH_SIZE)
+            )
+            done = len(outdated) - remaining
+            elapsed = time.monotonic() - started
+            throughput = done / elapsed if elapsed else 0
+            eta = f"{remaining / throughput:.0f} s" if throughput else "-"
+            self.stdout.write(f"{done}/{len(outdated)} attempts rejudged, "
+                              f"{throughput:.2f} attempts/s, ETA {eta}")
+            if remaining == 0:
+                return
+            time.sleep(REPORT_PERIOD)
@@ -0,0 +1,39 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0008_attempt_checkedtest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='judge_runs',
+            field=models.IntegerField(default=0),
+        ),
+        # Attempts created before the judge daemon were already judged
+        migrations.AddField(
+            model_name='attempt',
+            name='judge_state',
+            field=models.CharField(choices=[('PE', 'Ожидает проверки'), ('JU', 'Проверяется'), ('DN', 'Проверено')], db_index=True, default='DN', max_length=2),
+        ),
+        migrations.AlterField(
+            model_name='attempt',
+            name='judge_state',
+            field=models.CharField(choices=[('PE', 'Ожидает проверки'), ('JU', 'Проверяется'), ('DN', 'Проверено')], db_index=True, default='PE', max_length=2),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='lease_expires',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='lease_owner',
+            field=models.CharField(blank=True, max_length=128, null=True),
+        ),
+    ]
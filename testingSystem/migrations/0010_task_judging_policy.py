@@ -0,0 +1,23 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0009_attempt_judge_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='judging_policy',
+            field=models.CharField(choices=[('FU', 'Все тесты'), ('FF', 'До первой ошибки')], default='FU', max_length=2),
+        ),
+        migrations.AlterField(
+            model_name='checkedtest',
+            name='status',
+            field=models.CharField(choices=[('OK', 'Решение зачтено'), ('CE', 'Ошибка компиляции'), ('WA', 'Неверный ответ'), ('TL', 'Превышен лимит времени'), ('ML', 'Превышен лимит памяти'), ('RE', 'Ошибка выполнения'), ('IL', 'Превышен лимит ожидания'), ('SE', 'Ошибка сервера'), ('RJ', 'Решение отклонено'), ('TS', 'Рещение тестируется'), ('SK', 'Тест пропущен')], max_length=2),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0010_task_judging_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedVerdict',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('score', models.FloatField()),
+                ('results', models.JSONField()),
+                ('creation_time', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
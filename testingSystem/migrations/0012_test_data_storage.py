@@ -0,0 +1,62 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+from testingSystem import storage
+
+
+def move_to_storage(apps, schema_editor):
+    Test = apps.get_model('testingSystem', 'Test')
+    for test in Test.objects.all():
+        test.input_hash, test.input_size = storage.put(test.input.encode())
+        test.output_hash, test.output_size = storage.put(test.output.encode())
+        test.save()
+
+
+def move_to_database(apps, schema_editor):
+    Test = apps.get_model('testingSystem', 'Test')
+    for test in Test.objects.all():
+        test.input = storage.read(test.input_hash).decode()
+        test.output = storage.read(test.output_hash).decode()
+        test.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0011_cachedverdict'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='input_hash',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='input_size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='output_hash',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='output_size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(move_to_storage, move_to_database),
+        migrations.RemoveField(
+            model_name='test',
+            name='input',
+        ),
+        migrations.RemoveField(
+            model_name='test',
+            name='output',
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.1.2 on 2026-10-18 14:05
+
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def move_to_foreign_key(apps, schema_editor):
+    Attempt = apps.get_model('testingSystem', 'Attempt')
+    CheckedTest = apps.get_model('testingSystem', 'CheckedTest')
+    tests = defaultdict(list)
+    for attempt_id, checked_test_id in \
+            Attempt.checked_tests.through.objects.values_list(
+                'attempt_id', 'checkedtest_id'
+            ):
+        tests[attempt_id].append(checked_test_id)
+    for attempt_id, checked_test_ids in tests.items():
+        CheckedTest.objects.filter(id__in=checked_test_ids).update(
+            attempt_id=attempt_id
+        )
+    # Results not bound to any attempt are unreachable
+    CheckedTest.objects.filter(attempt__isnull=True).delete()
+
+
+def move_to_many_to_many(apps, schema_editor):
+    Attempt = apps.get_model('testingSystem', 'Attempt')
+    CheckedTest = apps.get_model('testingSystem', 'CheckedTest')
+    Attempt.checked_tests.through.objects.bulk_create([
+        Attempt.checked_tests.through(attempt_id=attempt_id,
+                                      checkedtest_id=checked_test_id)
+        for checked_test_id, attempt_id in CheckedTest.objects.values_list(
+            'id', 'attempt_id'
+        )
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0013_task_output_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkedtest',
+            name='attempt',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='testingSystem.attempt'),
+        ),
+        migrations.RunPython(move_to_foreign_key, move_to_many_to_many),
+        migrations.RemoveField(
+            model_name='attempt',
+            name='checked_tests',
+        ),
+        migrations.AlterField(
+            model_name='checkedtest',
+            name='attempt',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checked_tests', to='testingSystem.attempt'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+# Frozen copies of Status, JudgeState and models.summarize
+OK, SE, SK, TS = 'OK', 'SE', 'SK', 'TS'
+DONE = 'DN'
+
+
+def summarize(checked_tests):
+    summary = {
+        'verdict': OK if checked_tests else SE,
+        'failed_test': None,
+        'max_time_used': 0,
+        'max_memory_used': 0,
+        'tests_done': 0,
+        'tests_total': len(checked_tests),
+    }
+    for number, test in enumerate(checked_tests, 1):
+        if test.status not in (OK, SK):
+            if summary['verdict'] == OK:
+                summary['verdict'] = test.status
+            if test.status != TS and summary['failed_test'] is None:
+                summary['failed_test'] = number
+        if test.status != TS:
+            summary['tests_done'] += 1
+        summary['max_time_used'] = max(summary['max_time_used'],
+                                       test.time_used)
+        summary['max_memory_used'] = max(summary['max_memory_used'],
+                                         test.memory_used)
+    return summary
+
+
+def fill_summary(apps, schema_editor):
+    Attempt = apps.get_model('testingSystem', 'Attempt')
+    for attempt in Attempt.objects.all():
+        checked_tests = list(attempt.checked_tests.order_by('id'))
+        # Attempts waiting for the judge get their tests later
+        if not checked_tests and attempt.judge_state != DONE:
+            continue
+        Attempt.objects.filter(id=attempt.id).update(
+            **summarize(checked_tests)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0014_checkedtest_attempt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='failed_test',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='max_memory_used',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='max_time_used',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='tests_done',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='tests_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='verdict',
+            field=models.CharField(choices=[('OK', 'Решение зачтено'), ('CE', 'Ошибка компиляции'), ('WA', 'Неверный ответ'), ('TL', 'Превышен лимит времени'), ('ML', 'Превышен лимит памяти'), ('RE', 'Ошибка выполнения'), ('IL', 'Превышен лимит ожидания'), ('SE', 'Ошибка сервера'), ('RJ', 'Решение отклонено'), ('TS', 'Рещение тестируется'), ('SK', 'Тест пропущен'), ('OL', 'Превышен лимит вывода')], default='TS', max_length=2),
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0015_attempt_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='progress_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
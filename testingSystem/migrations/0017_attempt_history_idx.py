@@ -0,0 +1,17 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0016_attempt_progress_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['task', 'author', '-creation_time', '-id'], name='attempt_history_idx'),
+        ),
+    ]
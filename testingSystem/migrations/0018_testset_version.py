@@ -0,0 +1,38 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0017_attempt_history_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='judge_priority',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='testset_version',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='checkedtest',
+            name='judge_fingerprint',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='checkedtest',
+            name='test_hash',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='testset',
+            name='version',
+            field=models.IntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0018_testset_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0019_attempt_stage_timings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attempt',
+            name='language',
+            field=models.CharField(max_length=32),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0020_attempt_language'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestGroup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('points', models.FloatField(default=0)),
+                ('dependencies', models.ManyToManyField(blank=True, related_name='dependents', to='testingSystem.TestGroup')),
+                ('tests', models.ManyToManyField(blank=True, related_name='groups', to='testingSystem.Test')),
+                ('testset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='groups', to='testingSystem.testset')),
+            ],
+            options={
+                'unique_together': {('testset', 'name')},
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.1.2 on 2026-10-18 11:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+# Frozen copies of JudgeState.DONE and Status.OK
+DONE = 'DN'
+OK = 'OK'
+
+
+def fill_standings(apps, schema_editor):
+    Attempt = apps.get_model('testingSystem', 'Attempt')
+    Class = apps.get_model('testingSystem', 'Class')
+    Standing = apps.get_model('testingSystem', 'Standing')
+    standings = {}
+    # The first attempt of every pupil and task is the best one
+    for attempt in Attempt.objects.filter(
+            judge_state=DONE
+    ).order_by('author', 'task', '-score', 'creation_time', 'id').only(
+        'id', 'author', 'task', 'score', 'verdict'
+    ).iterator():
+        standing = standings.get((attempt.author_id, attempt.task_id))
+        if standing is None:
+            standing = standings[attempt.author_id, attempt.task_id] = \
+                Standing(pupil_id=attempt.author_id, task_id=attempt.task_id,
+                         best_score=attempt.score, best_attempt_id=attempt.id)
+        standing.attempts += 1
+        standing.solved |= attempt.verdict == OK
+    Standing.objects.bulk_create(standings.values(), batch_size=1000)
+    Class.objects.update(standings_time=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0021_testgroup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='class',
+            name='standings_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('best_score', models.FloatField(default=0)),
+                ('solved', models.BooleanField(default=False)),
+                ('attempts', models.IntegerField(default=0)),
+                ('update_time', models.DateTimeField(auto_now=True)),
+                ('best_attempt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='testingSystem.attempt')),
+                ('pupil', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='testingSystem.myuser')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='testingSystem.task')),
+            ],
+            options={
+                'unique_together': {('pupil', 'task')},
+            },
+        ),
+        migrations.RunPython(fill_standings, migrations.RunPython.noop),
+    ]
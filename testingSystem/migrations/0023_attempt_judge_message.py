@@ -0,0 +1,18 @@
+# Generated by Django 3.1.2 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testingSystem', '0022_standing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='judge_message',
+            field=models.CharField(blank=True, default='', max_length=1024),
+        ),
+    ]
@@ -1,10 +1,20 @@
+import hashlib
+
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth import models as auth_models
+from django.template.defaultfilters import floatformat
+from django.utils.functional import cached_property
+
+from . import storage
 
 
 class Class(models.Model):
     id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=64)
+    # Last change of the standings of the class, see Standing
+    standings_time = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -41,23 +51,132 @@ class Status(models.TextChoices):
     SE = 'SE', 'Ошибка сервера'
     RJ = 'RJ', 'Решение отклонено'
     TS = 'TS', 'Рещение тестируется'
+    SK = 'SK', 'Тест пропущен'
+    OL = 'OL', 'Превышен лимит вывода'
 
 
 class Test(models.Model):
-    input = models.CharField(max_length=256 * 1024)
-    output = models.CharField(max_length=256 * 1024)
+    """Данные теста лежат в хранилище storage, в базе только их хэши"""
+    input_hash = models.CharField(max_length=64)
+    input_size = models.BigIntegerField(default=0)
+    output_hash = models.CharField(max_length=64)
+    output_size = models.BigIntegerField(default=0)
+
+    @property
+    def input_path(self):
+        return storage.get_path(self.input_hash)
+
+    @property
+    def output_path(self):
+        return storage.get_path(self.output_hash)
+
+    @property
+    def input(self):
+        return storage.read(self.input_hash).decode()
+
+    @input.setter
+    def input(self, value):
+        self.input_hash, self.input_size = storage.put(value.encode())
+
+    @property
+    def output(self):
+        return storage.read(self.output_hash).decode()
+
+    @output.setter
+    def output(self, value):
+        self.output_hash, self.output_size = storage.put(value.encode())
+
+    @property
+    def content_hash(self):
+        return hashlib.sha256(
+            f"{self.input_hash}:{self.output_hash}".encode()
+        ).hexdigest()
+
+    def save(self, *args, **kwargs):
+        super(Test, self).save(*args, **kwargs)
+        Testset.objects.filter(tests=self).update(
+            version=models.F('version') + 1
+        )
 
     def __str__(self):
-        return f"Вход: {self.input};; " \
-               f"Выход: {self.output}"
+        return f"Вход: {storage.preview(self.input_hash, 64)};; " \
+               f"Выход: {storage.preview(self.output_hash, 64)}"
 
 
 class Testset(models.Model):
     tests = models.ManyToManyField(Test)
+    # Incremented whenever tests are added, removed or changed
+    version = models.IntegerField(default=1)
+
+
+@receiver(m2m_changed, sender=Testset.tests.through)
+def testset_changed(instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        testsets = Testset.objects.filter(id=instance.id)
+    elif reverse and action in ('post_add', 'post_remove'):
+        testsets = Testset.objects.filter(id__in=pk_set)
+    elif reverse and action == 'pre_clear':
+        # The test is being removed from all of its testsets
+        testsets = Testset.objects.filter(tests=instance)
+    else:
+        return
+    testsets.update(version=models.F('version') + 1)
+
+
+class TestGroup(models.Model):
+    """
+    Группа тестов (подзадача) набора. Баллы за группу начисляются, если
+    пройдены все ее тесты и группы, от которых она зависит
+    """
+    testset = models.ForeignKey(Testset, on_delete=models.CASCADE,
+                                related_name='groups')
+    name = models.CharField(max_length=64)
+    points = models.FloatField(default=0)
+    tests = models.ManyToManyField(Test, blank=True, related_name='groups')
+    dependencies = models.ManyToManyField('self', symmetrical=False,
+                                          blank=True,
+                                          related_name='dependents')
+
+    class Meta:
+        unique_together = ('testset', 'name')
+
+    def __str__(self):
+        return self.name
+
+
+@receiver(post_save, sender=TestGroup)
+@receiver(post_delete, sender=TestGroup)
+def test_group_saved(instance, **kwargs):
+    Testset.objects.filter(id=instance.testset_id).update(
+        version=models.F('version') + 1
+    )
+
+
+@receiver(m2m_changed, sender=TestGroup.tests.through)
+@receiver(m2m_changed, sender=TestGroup.dependencies.through)
+def test_group_changed(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        groups = TestGroup.objects.filter(id=instance.id)
+    elif action == 'pre_clear':
+        # The test or the group is being removed from all groups
+        groups = instance.groups.all() if isinstance(instance, Test) \
+            else instance.dependents.all()
+    else:
+        groups = TestGroup.objects.filter(id__in=pk_set)
+    Testset.objects.filter(id__in=groups.values('testset_id')).update(
+        version=models.F('version') + 1
+    )
 
 
 class CheckedTest(models.Model):
+    attempt = models.ForeignKey('Attempt', on_delete=models.CASCADE,
+                                related_name='checked_tests')
     test = models.ForeignKey(Test, on_delete=models.CASCADE)
+    # Test contents and judging settings the result was obtained with
+    test_hash = models.CharField(default="", max_length=64)
+    judge_fingerprint = models.CharField(default="", max_length=64)
     status = models.CharField(max_length=2, choices=Status.choices)
     memory_used = models.IntegerField()
     time_used = models.IntegerField()
@@ -70,6 +189,18 @@ class CheckedTest(models.Model):
                f"Использовано времени: {self.time_used} миллисекунд"
 
 
+class JudgingPolicy(models.TextChoices):
+    FULL = 'FU', 'Все тесты'
+    FAIL_FAST = 'FF', 'До первой ошибки'
+
+
+def format_score(score, max_points):
+    """Оценка в баллах из max_points или в процентах, если max_points - None"""
+    if max_points is None:
+        return f"{floatformat(score, 1)}%"
+    return f"{floatformat(score, 1)} из {floatformat(max_points)}"
+
+
 class Task(models.Model):
     id = models.BigAutoField(primary_key=True)
     author = models.ForeignKey(MyUser, null=True, on_delete=models.SET_NULL)
@@ -80,35 +211,171 @@ class Task(models.Model):
     samples_prefix = models.IntegerField()
     time_limit = models.IntegerField()
     memory_limit = models.IntegerField()
+    output_limit = models.IntegerField(default=64 * 1024)
     checker_name = models.CharField(null=True, max_length=128)
     post_processor_name = models.CharField(null=True, max_length=128)
+    judging_policy = models.CharField(max_length=2,
+                                      choices=JudgingPolicy.choices,
+                                      default=JudgingPolicy.FULL)
     creation_time = models.DateTimeField(auto_now_add=True)
 
+    @cached_property
+    def max_points(self):
+        """Сумма баллов групп тестов или None, если групп нет"""
+        if self.testset_id is None:
+            return None
+        return TestGroup.objects.filter(testset_id=self.testset_id) \
+            .aggregate(points=models.Sum('points'))['points']
+
+    def format_score(self, score):
+        """Оценка в баллах, если у набора есть группы, иначе в процентах"""
+        return format_score(score, self.max_points)
+
     def __str__(self):
         return self.name
 
 
+# Built-in languages, the available ones are set by JUDGE_LANGUAGES
 class Language(models.TextChoices):
     PYTHON = 'Python', 'Python'
     CPP = 'C++', 'C++'
 
 
+class JudgeState(models.TextChoices):
+    PENDING = 'PE', 'Ожидает проверки'
+    JUDGING = 'JU', 'Проверяется'
+    DONE = 'DN', 'Проверено'
+
+
+def summarize(checked_tests):
+    """
+    Сводка попытки по результатам тестов, упорядоченным по номерам
+    тестов. Вердикт - первый статус, отличный от OK, а без тестов -
+    ошибка сервера: решение не на чем проверить
+    """
+    summary = {
+        'verdict': Status.OK if checked_tests else Status.SE,
+        'failed_test': None,
+        'max_time_used': 0,
+        'max_memory_used': 0,
+        'tests_done': 0,
+        'tests_total': len(checked_tests),
+    }
+    for number, test in enumerate(checked_tests, 1):
+        if test.status not in (Status.OK, Status.SK):
+            if summary['verdict'] == Status.OK:
+                summary['verdict'] = test.status
+            if test.status != Status.TS and summary['failed_test'] is None:
+                summary['failed_test'] = number
+        if test.status != Status.TS:
+            summary['tests_done'] += 1
+        summary['max_time_used'] = max(summary['max_time_used'],
+                                       test.time_used)
+        summary['max_memory_used'] = max(summary['max_memory_used'],
+                                         test.memory_used)
+    return summary
+
+
 class Attempt(models.Model):
     id = models.BigAutoField(primary_key=True)
     author = models.ForeignKey(MyUser, on_delete=models.CASCADE)
     task = models.ForeignKey(Task, on_delete=models.CASCADE)
     solution = models.CharField(max_length=256 * 1024)
-    language = models.CharField(max_length=32, choices=Language.choices)
-    checked_tests = models.ManyToManyField(CheckedTest)
+    language = models.CharField(max_length=32)
     score = models.FloatField(default=0)
     creation_time = models.DateTimeField(auto_now_add=True)
+    judge_state = models.CharField(max_length=2, choices=JudgeState.choices,
+                                   default=JudgeState.PENDING, db_index=True)
+    lease_owner = models.CharField(null=True, blank=True, max_length=128)
+    lease_expires = models.DateTimeField(null=True, blank=True)
+    judge_runs = models.IntegerField(default=0)
+    verdict = models.CharField(max_length=2, choices=Status.choices,
+                               default=Status.TS)
+    failed_test = models.IntegerField(null=True, blank=True)
+    max_time_used = models.IntegerField(default=0)
+    max_memory_used = models.IntegerField(default=0)
+    tests_done = models.IntegerField(default=0)
+    tests_total = models.IntegerField(default=0)
+    # Why the whole attempt was not judged, e.g. the judge kept crashing
+    judge_message = models.CharField(default="", blank=True,
+                                     max_length=1024)
+    # Incremented whenever the summary or the judge state changes
+    progress_version = models.IntegerField(default=0)
+    testset_version = models.IntegerField(default=0)
+    # Attempts with smaller priority are judged first
+    judge_priority = models.IntegerField(default=0)
+    # Seconds and count of each judging stage, see instrumentation
+    stage_timings = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            # Attempt history of a pupil on a task, newest first
+            models.Index(fields=['task', 'author', '-creation_time', '-id'],
+                         name='attempt_history_idx'),
+        ]
+
+    SUMMARY_FIELDS = ('verdict', 'failed_test', 'max_time_used',
+                      'max_memory_used', 'tests_done', 'tests_total', 'score',
+                      'judge_message')
+
+    def update_summary(self, checked_tests):
+        for field, value in summarize(checked_tests).items():
+            setattr(self, field, value)
+        self.judge_message = ""
+
+    def fail(self, checked_tests, message):
+        """Ошибка сервера для всей попытки, что бы ни показали тесты"""
+        self.update_summary(checked_tests)
+        self.verdict = Status.SE
+        self.judge_message = message
+
+    def save_summary(self):
+        Attempt.objects.filter(id=self.id).update(
+            progress_version=models.F('progress_version') + 1,
+            **{field: getattr(self, field) for field in self.SUMMARY_FIELDS}
+        )
+
+    @property
+    def is_judged(self):
+        return self.judge_state == JudgeState.DONE and \
+            self.verdict != Status.TS
 
     def get_status(self):
-        statuses = [test.status for test in self.checked_tests.all()]
-        not_ok = [status for status in statuses if status != Status.OK]
-        if len(not_ok) != 0:
-            return not_ok[0]
-        return Status.OK
+        return self.verdict
 
     def __str__(self):
         return f"Попытка по задаче {self.task.name}"
+
+
+class Standing(models.Model):
+    """
+    Лучший результат ученика по задаче среди проверенных попыток,
+    пересчитывается после проверки каждой попытки (см. standings)
+    """
+    pupil = models.ForeignKey(MyUser, on_delete=models.CASCADE,
+                              related_name='standings')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE,
+                             related_name='standings')
+    best_score = models.FloatField(default=0)
+    best_attempt = models.ForeignKey(Attempt, null=True, blank=True,
+                                     on_delete=models.SET_NULL,
+                                     related_name='+')
+    solved = models.BooleanField(default=False)
+    attempts = models.IntegerField(default=0)
+    update_time = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('pupil', 'task')
+
+    def __str__(self):
+        return f"Результат {self.pupil} по задаче {self.task.name}"
+
+
+class CachedVerdict(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    score = models.FloatField()
+    results = models.JSONField()
+    creation_time = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Результат проверки {self.key}"
@@ -0,0 +1,121 @@
+"""
+Таблицы результатов классов.
+
+Лучший результат ученика по задаче хранится в Standing и пересчитывается
+после проверки каждой его попытки по этой задаче, поэтому таблица класса
+строится одним запросом. Построенная таблица кэшируется по времени
+последнего изменения результатов класса (Class.standings_time).
+
+Задачи с группами тестов оцениваются в баллах, остальные - в процентах,
+поэтому сумма в таблице складывается из процентов от максимальной оценки
+каждой задачи.
+"""
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from SchoolTestingSystem import settings
+from testingSystem import models
+
+
+def update(pupil_id, task_id):
+    """Пересчитывает лучший результат ученика по задаче"""
+    attempts = models.Attempt.objects.filter(
+        task_id=task_id, author_id=pupil_id,
+        judge_state=models.JudgeState.DONE,
+    )
+    best = attempts.order_by('-score', 'creation_time', 'id') \
+        .only('id', 'score').first()
+    if best is None:
+        models.Standing.objects.filter(pupil_id=pupil_id,
+                                       task_id=task_id).delete()
+    else:
+        values = {
+            'best_score': best.score,
+            'best_attempt': best,
+            'solved': attempts.filter(verdict=models.Status.OK).exists(),
+            'attempts': attempts.count(),
+        }
+        # Single statements, unlike update_or_create, do not hold a read
+        # transaction that SQLite fails to upgrade under concurrent judges
+        standing = models.Standing.objects.filter(pupil_id=pupil_id,
+                                                  task_id=task_id)
+        if not standing.update(update_time=timezone.now(), **values):
+            try:
+                with transaction.atomic():
+                    models.Standing.objects.create(
+                        pupil_id=pupil_id, task_id=task_id, **values
+                    )
+            except IntegrityError:  # created by a concurrent judge
+                standing.update(update_time=timezone.now(), **values)
+    models.Class.objects.filter(myuser__id=pupil_id).update(
+        standings_time=timezone.now()
+    )
+
+
+def max_points_of(task_ids):
+    """Сумма баллов групп тестов задач, у которых есть группы"""
+    return dict(models.TestGroup.objects.filter(
+        testset__task__id__in=task_ids
+    ).values('testset__task').annotate(points=Sum('points')).values_list(
+        'testset__task', 'points'
+    ))
+
+
+def percent(score, max_points):
+    """Оценка в процентах, max_points - None для задач без групп"""
+    if max_points is None:
+        return score
+    return score / max_points * 100 if max_points else 0
+
+
+def build(school_class):
+    """
+    Таблица класса: задачи, которые решали ученики, и строки учеников по
+    убыванию суммы баллов. Ученики без попыток тоже попадают в таблицу
+    """
+    pupils, tasks = {}, {}
+    for (pupil_id, last_name, first_name, middle_name, task_id, task_name,
+         score, solved, attempts, attempt_id) in models.MyUser.objects.filter(
+            school_class=school_class, role=models.Role.PUPIL
+    ).values_list('id', 'user__last_name', 'user__first_name', 'middle_name',
+                  'standings__task_id', 'standings__task__name',
+                  'standings__best_score', 'standings__solved',
+                  'standings__attempts', 'standings__best_attempt_id'):
+        cells = pupils.setdefault(
+            pupil_id, (f"{last_name} {first_name} {middle_name}", {})
+        )[1]
+        if task_id is not None:
+            tasks[task_id] = task_name
+            cells[task_id] = {'score': score, 'solved': solved,
+                              'attempts': attempts, 'attempt_id': attempt_id}
+
+    task_ids = sorted(tasks)
+    max_points = max_points_of(task_ids)
+    for _, cells in pupils.values():
+        for task_id, cell in cells.items():
+            cell['label'] = models.format_score(cell['score'],
+                                                max_points.get(task_id))
+    rows = [{
+        'pupil': name,
+        'cells': [cells.get(task_id) for task_id in task_ids],
+        'total': sum(percent(cell['score'], max_points.get(task_id))
+                     for task_id, cell in cells.items()),
+        'solved': sum(cell['solved'] for cell in cells.values()),
+    } for name, cells in pupils.values()]
+    rows.sort(key=lambda row: (-row['total'], row['pupil']))
+    return {'tasks': [(task_id, tasks[task_id]) for task_id in task_ids],
+            'rows': rows}
+
+
+def get_table(school_class):
+    """Таблица класса из кэша или построенная заново, если она изменилась"""
+    changed = school_class.standings_time
+    key = f"standings:{school_class.id}:" \
+          f"{changed.timestamp() if changed is not None else 0}"
+    table = cache.get(key)
+    if table is None:
+        table = build(school_class)
+        cache.set(key, table, settings.STANDINGS_CACHE_TIMEOUT)
+    return table
@@ -0,0 +1,68 @@
+import contextlib
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+
+from SchoolTestingSystem import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def get_path(digest):
+    return os.path.join(settings.TEST_DATA_DIR, digest[:2], digest)
+
+
+def put_chunks(chunks):
+    """
+    Сохраняет данные в хранилище по хэшу содержимого. Возвращает хэш и
+    размер данных, одинаковые данные хранятся один раз
+    """
+    os.makedirs(settings.TEST_DATA_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temporary = tempfile.mkstemp(dir=settings.TEST_DATA_DIR)
+    try:
+        with open(fd, 'wb') as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        path = get_path(digest.hexdigest())
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return digest.hexdigest(), size
+
+
+def put(data):
+    return put_chunks([data])
+
+
+def put_file(file):
+    return put_chunks(iter(lambda: file.read(CHUNK_SIZE), b""))
+
+
+def read(digest):
+    with open(get_path(digest), 'rb') as f:
+        return f.read()
+
+
+def preview(digest, size):
+    with open(get_path(digest), 'rb') as f:
+        return f.read(size).decode(errors='replace')
+
+
+@contextlib.contextmanager
+def open_mapped(digest):
+    """Отображает данные в память без копирования"""
+    with open(get_path(digest), 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:  # mmap cannot map empty files
+            yield io.BytesIO()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
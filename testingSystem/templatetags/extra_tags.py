@@ -7,3 +7,8 @@ register = template.Library()
 @register.simple_tag
 def status_label(status):
     return Status(status).label
+
+
+@register.simple_tag
+def score(task, value):
+    return task.format_score(value)
@@ -0,0 +1,102 @@
+"""
+Выполнение чекеров на Python в процессах пула проверяющей системы.
+
+Модуль не зависит от Django, чтобы процессы пула запускались быстро.
+Процесс получает аргументы check по каналу и отправляет обратно пару
+(успех, результат или исключение).
+Время проверки ограничено таймером, а чекер, зависший в коде на C,
+завершается по ограничению процессорного времени.
+"""
+import importlib
+import math
+import pickle
+import signal
+import sys
+import types
+
+# Module digests the loaded checkers were imported with
+loaded_digests = {}
+
+
+class TimeLimitExceeded(Exception):
+    pass
+
+
+def strip_answer(answer):
+    return "\n".join(line.strip() for line in answer.splitlines()).strip()
+
+
+def load_module(name, digest):
+    module = sys.modules.get(name)
+    if module is None:
+        module = importlib.import_module(name)
+    elif loaded_digests.get(name) != digest:
+        module = importlib.reload(module)
+    loaded_digests[name] = digest
+    return module
+
+
+def read_text(path):
+    with open(path, 'rb') as f:
+        return f.read().decode(errors='replace')
+
+
+def interrupt(*args):
+    raise TimeLimitExceeded()
+
+
+def limit_time(time_limit):
+    import resource
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = math.ceil(usage.ru_utime + usage.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU,
+                       (used + math.ceil(time_limit) + 1, hard))
+    signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, time_limit)
+
+
+def unlimit_time():
+    import resource
+
+    signal.setitimer(signal.ITIMER_REAL, 0)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def check(module_name, digest, input_path, answer_path, output, time_limit):
+    """
+    Вызывает check(test, output, strip_answer) чекера, test содержит
+    текст входных данных и правильного ответа
+    """
+    module = load_module(module_name, digest)
+    test = types.SimpleNamespace(input=read_text(input_path),
+                                 output=read_text(answer_path))
+    output = output.decode(errors='replace')
+    timers_supported = hasattr(signal, 'setitimer')
+    if timers_supported:
+        limit_time(time_limit)
+    try:
+        return bool(module.check(test, output, strip_answer))
+    finally:
+        if timers_supported:
+            unlimit_time()
+
+
+def serve(connection):
+    """Проверяет тесты, пока канал не закроется"""
+    while True:
+        try:
+            args = connection.recv()
+        except EOFError:
+            return
+        try:
+            response = (True, check(*args))
+        except Exception as e:
+            response = (False, e)
+        try:
+            connection.send(response)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # The exception of the checker cannot be pickled
+            connection.send((False, Exception(repr(response[1]))))
@@ -0,0 +1,183 @@
+"""
+Встроенные сравниватели ответов, выбираются через Task.checker_name:
+
+- lines - строки без пробельных символов по краям (по умолчанию)
+- exact - строки целиком, отличаться могут только переводы строк
+- tokens - последовательности слов, разделенных пробельными символами
+- floats[:eps] - слова, числа сравниваются с абсолютной или
+  относительной погрешностью eps (по умолчанию 1e-6)
+- unordered - строки без пробельных символов по краям в любом порядке
+
+Сравниватели читают ответы построчно, останавливаются на первом
+расхождении и сообщают, где оно найдено.
+"""
+import collections
+import itertools
+import math
+
+from testingSystem import storage
+
+DEFAULT_EPSILON = 1e-6
+PREVIEW_LENGTH = 32
+
+
+def read_lines(file):
+    return iter(file.readline, b"")
+
+
+def preview(value):
+    if value is None:
+        return "конец вывода"
+    text = value.decode(errors='replace')
+    if len(text) > PREVIEW_LENGTH:
+        text = text[:PREVIEW_LENGTH] + "..."
+    return f"«{text}»"
+
+
+def mismatch(position, expected, received):
+    return False, f"{position}: ожидалось {preview(expected)}, " \
+                  f"получено {preview(received)}"
+
+
+def stripped_lines(lines):
+    """
+    Строки без пробельных символов по краям и без пустых строк в начале
+    и в конце ответа
+    """
+    empty_lines = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if empty_lines is not None:
+                empty_lines += 1
+            continue
+        for _ in range(empty_lines or 0):
+            yield b""
+        empty_lines = 0
+        yield line
+
+
+def exact_lines(lines):
+    """Строки без переводов строк, в том числе в стиле Windows"""
+    for line in lines:
+        yield line.rstrip(b"\r\n")
+
+
+def tokens(lines):
+    for number, line in enumerate(lines, 1):
+        for index, token in enumerate(line.split(), 1):
+            yield f"Строка {number}, слово {index}", token
+
+
+def compare_line_sequences(expected, received):
+    for number, (expected_line, received_line) in enumerate(
+            itertools.zip_longest(expected, received), 1
+    ):
+        if expected_line != received_line:
+            return mismatch(f"Строка {number}", expected_line, received_line)
+    return True, ""
+
+
+def compare_lines(expected, received, argument=None):
+    return compare_line_sequences(stripped_lines(expected),
+                                  stripped_lines(received))
+
+
+def compare_exact_lines(expected, received, argument=None):
+    return compare_line_sequences(exact_lines(expected),
+                                  exact_lines(received))
+
+
+def compare_token_sequences(expected, received, equal):
+    received = tokens(received)
+    for position, expected_token in tokens(expected):
+        _, received_token = next(received, (position, None))
+        if received_token is None or not equal(expected_token, received_token):
+            return mismatch(position, expected_token, received_token)
+    for position, received_token in received:
+        return mismatch(position, None, received_token)
+    return True, ""
+
+
+def compare_tokens(expected, received, argument=None):
+    return compare_token_sequences(expected, received,
+                                   lambda first, second: first == second)
+
+
+def parse_epsilon(argument):
+    try:
+        epsilon = float(argument)
+    except ValueError:
+        epsilon = math.nan
+    if not 0 <= epsilon < math.inf:
+        raise ValueError(f"Погрешность {argument!r} сравнивателя floats "
+                         f"должна быть неотрицательным числом")
+    return epsilon
+
+
+def compare_floats(expected, received, argument=None):
+    epsilon = DEFAULT_EPSILON if argument is None else argument
+
+    def equal(expected_token, received_token):
+        try:
+            expected_number = float(expected_token)
+        except ValueError:
+            return expected_token == received_token
+        try:
+            received_number = float(received_token)
+        except ValueError:
+            return False
+        if math.isnan(expected_number) or math.isnan(received_number):
+            return math.isnan(expected_number) and math.isnan(received_number)
+        return math.isclose(expected_number, received_number,
+                            rel_tol=epsilon, abs_tol=epsilon)
+
+    return compare_token_sequences(expected, received, equal)
+
+
+def compare_unordered(expected, received, argument=None):
+    difference = collections.Counter(stripped_lines(expected))
+    difference.subtract(stripped_lines(received))
+    for line, count in difference.items():
+        if count > 0:
+            return False, f"Не найдена строка {preview(line)}"
+        if count < 0:
+            return False, f"Лишняя строка {preview(line)}"
+    return True, ""
+
+
+COMPARATORS = {
+    'lines': compare_lines,
+    'exact': compare_exact_lines,
+    'tokens': compare_tokens,
+    'floats': compare_floats,
+    'unordered': compare_unordered,
+}
+# Parsers of the argument after the colon, other comparators take none
+ARGUMENT_PARSERS = {
+    'floats': parse_epsilon,
+}
+
+
+def get_comparator(name):
+    """
+    Возвращает проверку (test, output) -> (верно ли, сообщение) или None,
+    если встроенного сравнивателя с таким именем нет. Бросает ValueError,
+    если параметр сравнивателя некорректен
+    """
+    name, _, argument = (name or 'lines').partition(':')
+    compare = COMPARATORS.get(name)
+    if compare is None:
+        return None
+    if not argument:
+        argument = None
+    elif name in ARGUMENT_PARSERS:
+        argument = ARGUMENT_PARSERS[name](argument)
+    else:
+        raise ValueError(f"Сравниватель {name} не принимает параметров")
+
+    def check(test, output):
+        with storage.open_mapped(test.output_hash) as expected:
+            return compare(read_lines(expected), read_lines(output),
+                           argument)
+    return check
@@ -0,0 +1,127 @@
+import functools
+import hashlib
+import os
+import shutil
+import subprocess
+import uuid
+
+from SchoolTestingSystem import settings
+
+BINARY_NAME = "binary"
+ERROR_NAME = "error.txt"
+
+
+class CachedCompilation:
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def error(self):
+        error_path = os.path.join(self.path, ERROR_NAME)
+        if not os.path.exists(error_path):
+            return None
+        with open(error_path) as f:
+            return f.read()
+
+    @property
+    def binary_path(self):
+        return os.path.join(self.path, BINARY_NAME)
+
+    def copy_binary(self, destination):
+        try:
+            os.link(self.binary_path, destination)
+        except OSError:
+            shutil.copy2(self.binary_path, destination)
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_version(compiler):
+    try:
+        return subprocess.run([compiler, "--version"], capture_output=True,
+                              check=True).stdout.decode()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def get_key(language, code, compiler, flags):
+    digest = hashlib.sha256()
+    for part in (language, compiler, compiler_version(compiler),
+                 *flags, code):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CompileCache:
+    """
+    Кэш результатов компиляции на диске: бинарные файлы и ошибки
+    компиляции по хэшу исходного кода, языка, версии компилятора и флагов.
+    При превышении размера удаляются давно не использованные записи
+    """
+
+    def __init__(self, root, size_limit):
+        self.root = root
+        self.size_limit = size_limit
+
+    def get(self, key):
+        path = self._entry_path(key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:  # evicted meanwhile
+            return None
+        return CachedCompilation(path)
+
+    def put_binary(self, key, binary_path):
+        self._put(key, lambda entry: shutil.copy2(
+            binary_path, os.path.join(entry, BINARY_NAME)
+        ))
+
+    def put_error(self, key, error):
+        def write(entry):
+            with open(os.path.join(entry, ERROR_NAME), 'w') as f:
+                f.write(error)
+        self._put(key, write)
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def _put(self, key, fill):
+        path = self._entry_path(key)
+        temporary = os.path.join(self.root, f"tmp_{uuid.uuid4().hex}")
+        os.makedirs(temporary)
+        try:
+            fill(temporary)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.rename(temporary, path)
+        except OSError:  # the same entry was stored concurrently
+            pass
+        finally:
+            shutil.rmtree(temporary, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total_size = 0
+        for prefix in os.scandir(self.root):
+            if not prefix.is_dir() or prefix.name.startswith("tmp_"):
+                continue
+            for entry in os.scandir(prefix.path):
+                try:
+                    size = sum(file.stat().st_size
+                               for file in os.scandir(entry.path))
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+                except FileNotFoundError:  # evicted by another judge
+                    continue
+                total_size += size
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.size_limit:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+
+
+cache = CompileCache(os.path.join(settings.JUDGE_CACHE_DIR, "compilation"),
+                     settings.COMPILE_CACHE_SIZE)
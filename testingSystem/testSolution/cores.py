@@ -0,0 +1,146 @@
+"""
+Раздача ядер процессора решениям.
+
+Решение запускается, только получив свободное ядро из ядер проверяющей
+системы, и привязывается к нему. Поэтому одновременно работает не больше
+решений, чем ядер, и время работы решения не зависит от нагрузки.
+
+Ядро занято, пока процесс держит блокировку flock файла этого ядра в
+JUDGE_WORKSPACE_ROOT/cores, поэтому все процессы проверяющей системы на
+машине выдают ядра из общего пула. Сами эти процессы вместе с
+компиляторами и чекерами работают на остальных, резервных ядрах.
+"""
+import contextlib
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # not POSIX, cores are shared within the process only
+    fcntl = None
+
+from django.core.exceptions import ImproperlyConfigured
+
+from SchoolTestingSystem import settings
+
+LOCKS_DIR = os.path.join(settings.JUDGE_WORKSPACE_ROOT, "cores")
+# How often a process waits for cores taken by other processes
+LOCK_POLL_PERIOD = 0.05  # s
+
+
+def parse_cpus(value):
+    """Список ядер вида "0-3,6" -> [0, 1, 2, 3, 6]"""
+    cpus = set()
+    for part in value.split(","):
+        part = part.strip()
+        if part:
+            first, _, last = part.partition("-")
+            cpus.update(range(int(first), int(last or first) + 1))
+    return sorted(cpus)
+
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def judge_cpus():
+    """Ядра для решений: JUDGE_CPUS или доступные ядра без резерва"""
+    if settings.JUDGE_CPUS:
+        cpus = parse_cpus(settings.JUDGE_CPUS)
+        unavailable = set(cpus) - set(available_cpus())
+        if unavailable or not cpus:
+            raise ImproperlyConfigured(
+                f"Ядра {sorted(unavailable)} из JUDGE_CPUS недоступны"
+                if unavailable else "В JUDGE_CPUS нет ядер"
+            )
+        return cpus
+    available = available_cpus()
+    reserved = settings.JUDGE_RESERVED_CPUS
+    if reserved is None:
+        reserved = 1 if len(available) > 1 else 0
+    cpus = available[reserved:]
+    if not cpus:
+        raise ImproperlyConfigured(
+            "JUDGE_RESERVED_CPUS не оставляет ядер для решений"
+        )
+    return cpus
+
+
+def pinning_enabled():
+    return settings.JUDGE_CPU_PINNING and hasattr(os, 'sched_setaffinity')
+
+
+def pin_to_reserved():
+    """
+    Привязывает текущий поток и потоки и процессы, которые он запустит, к
+    ядрам вне пула решений. Вызывается в главном потоке при запуске
+    """
+    if not pinning_enabled():
+        return
+    reserved = set(available_cpus()) - set(scheduler.cpus)
+    if reserved:
+        os.sched_setaffinity(0, reserved)
+
+
+class CoreScheduler:
+    """
+    Выдает ядра по одному в порядке очереди. Недавно освободившееся ядро
+    выдается первым, ядра, занятые другими процессами, пропускаются
+    """
+
+    def __init__(self, cpus, locks_dir=None):
+        self.cpus = cpus
+        self.locks_dir = locks_dir if fcntl is not None else None
+        self._free = list(reversed(cpus))
+        self._locks = {}
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def reserve(self):
+        with self._condition:
+            while True:
+                cpu = next((cpu for cpu in reversed(self._free)
+                            if self._lock(cpu)), None)
+                if cpu is not None:
+                    break
+                # Free cores of this process are taken by other processes
+                self._condition.wait(LOCK_POLL_PERIOD if self._free
+                                     else None)
+            self._free.remove(cpu)
+        try:
+            yield cpu
+        finally:
+            with self._condition:
+                self._unlock(cpu)
+                self._free.append(cpu)
+                self._condition.notify()
+
+    def _lock(self, cpu):
+        if self.locks_dir is None:
+            return True
+        fd = self._locks.get(cpu)
+        if fd is None:
+            os.makedirs(self.locks_dir, exist_ok=True)
+            fd = self._locks[cpu] = os.open(
+                os.path.join(self.locks_dir, f"{cpu}.lock"),
+                os.O_RDWR | os.O_CREAT | os.O_CLOEXEC
+            )
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock(self, cpu):
+        if self.locks_dir is not None:
+            fcntl.flock(self._locks[cpu], fcntl.LOCK_UN)
+
+    def stats(self):
+        with self._condition:
+            return {'cpus': len(self.cpus),
+                    'busy': len(self.cpus) - len(self._free)}
+
+
+scheduler = CoreScheduler(judge_cpus(), LOCKS_DIR)
@@ -0,0 +1,87 @@
+"""
+Группы тестов (подзадачи) при проверке попытки.
+
+Группа не пройдена, если не пройден один из ее тестов или одна из групп,
+от которых она зависит. Тест пропускается, если все группы, в которые он
+входит, уже не пройдены; тесты вне групп проверяются всегда.
+"""
+import collections
+import threading
+
+from testingSystem import models
+
+# tests - id тестов, dependencies - имена групп, от которых зависит группа
+Group = collections.namedtuple('Group',
+                               ('name', 'points', 'tests', 'dependencies'))
+
+
+def load_groups(testset):
+    """Группы набора; группа идет после групп, от которых она зависит"""
+    if testset is None:
+        return []
+    test_ids = set(testset.tests.values_list('id', flat=True))
+    groups = {}
+    for group in models.TestGroup.objects.filter(
+            testset=testset
+    ).prefetch_related('tests', 'dependencies').order_by('id'):
+        groups[group.name] = Group(
+            group.name, group.points,
+            frozenset(test.id for test in group.tests.all()
+                      if test.id in test_ids),
+            tuple(dependency.name for dependency in group.dependencies.all()
+                  if dependency.testset_id == testset.id),
+        )
+
+    ordered, visited = [], set()
+
+    def visit(name):
+        # Cyclic dependencies are cut where the cycle is found
+        if name in visited:
+            return
+        visited.add(name)
+        for dependency in groups[name].dependencies:
+            visit(dependency)
+        ordered.append(groups[name])
+
+    for name in groups:
+        visit(name)
+    return ordered
+
+
+class GroupTracker:
+    """Не пройденные группы попытки, обновляется по мере проверки тестов"""
+
+    def __init__(self, groups):
+        self.groups = {group.name: group for group in groups}
+        self._order = {group.name: index
+                       for index, group in enumerate(groups)}
+        self._test_groups = collections.defaultdict(list)
+        for group in groups:
+            for test_id in group.tests:
+                self._test_groups[test_id].append(group.name)
+        self._lock = threading.Lock()
+        self._failed = set()
+
+    def groups_of(self, test_id):
+        return self._test_groups.get(test_id, [])
+
+    def fail(self, test_id):
+        with self._lock:
+            self._failed.update(self.groups_of(test_id))
+
+    def is_failed(self, name, visiting=()):
+        with self._lock:
+            if name in self._failed:
+                return True
+        return any(self.is_failed(dependency, visiting + (name,))
+                   for dependency in self.groups[name].dependencies
+                   if dependency not in visiting)
+
+    def should_skip(self, test_id):
+        names = self.groups_of(test_id)
+        return bool(names) and all(self.is_failed(name) for name in names)
+
+    def rank(self, test_id):
+        """Место теста в порядке групп, тесты вне групп идут первыми"""
+        return min((self._order[name] for name in self.groups_of(test_id)),
+                   default=-1)
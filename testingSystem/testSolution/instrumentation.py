@@ -0,0 +1,69 @@
+"""
+Замеры длительности этапов проверки попытки.
+
+Этапы одной попытки отмечаются контекстным менеджером StageTimer.stage.
+Каждый замер сообщается подписчикам (см. subscribe) вместе с языком
+попытки: метрикам (см. metrics) и бенчмарку. Этапы: queue - ожидание в
+очереди, verdict_cache, workspace - получение рабочего каталога,
+prepare - подготовка результатов в базе, compile, core - ожидание
+свободного ядра, run - запуск решения на тесте, из него spawn - запуск
+процесса и track - ожидание его завершения, check - чекер, flush -
+запись результатов, attempt - вся проверка попытки.
+"""
+import collections
+import contextlib
+import threading
+import time
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def subscribe(listener):
+    """listener(stage, language, seconds) вызывается после каждого этапа"""
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def unsubscribe(listener):
+    with _listeners_lock:
+        _listeners.remove(listener)
+
+
+def record(stage, language, seconds):
+    """Сообщает подписчикам длительность этапа"""
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        listener(stage, language, seconds)
+
+
+class StageTimer:
+    """Суммарная длительность и число этапов проверки одной попытки"""
+
+    def __init__(self, language):
+        self.language = language
+        self.totals = collections.defaultdict(float)
+        self.counts = collections.defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.totals[name] += seconds
+            self.counts[name] += 1
+        record(name, self.language, seconds)
+
+    def breakdown(self):
+        """Длительность в секундах и число каждого этапа"""
+        with self._lock:
+            return {name: {'seconds': round(total, 6),
+                           'count': self.counts[name]}
+                    for name, total in self.totals.items()}
@@ -0,0 +1,109 @@
+import itertools
+import queue
+import threading
+import time
+import traceback
+
+from django import db
+
+from . import instrumentation
+
+
+class Priority:
+    LIVE = 0
+    REJUDGE = 10
+
+
+class JudgeQueue:
+    """
+    Очередь на проверку с фиксированным числом потоков-проверяющих.
+    Задания с меньшим приоритетом забираются раньше, при равном
+    приоритете - в порядке поступления. Если задана функция key, задание
+    с тем же ключом, что и у ожидающего в очереди, не добавляется.
+    """
+
+    def __init__(self, workers, handler, key=None):
+        self.workers = workers
+        self.handler = handler
+        self.key = key
+        self._queued = set()
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._depth = {}
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def put(self, item, priority=Priority.LIVE):
+        """Возвращает False, если такое задание уже ждет в очереди"""
+        with self._lock:
+            if self.key is not None:
+                if self.key(item) in self._queued:
+                    return False
+                self._queued.add(self.key(item))
+            self._start_workers()
+            self._depth[priority] = self._depth.get(priority, 0) + 1
+            self._submitted += 1
+        self._queue.put((priority, next(self._order), time.monotonic(), item))
+        return True
+
+    def join(self):
+        """Ждёт, пока все поставленные задания не будут обработаны"""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            started = self._completed + self._failed + self._active
+            return {
+                'workers': self.workers,
+                'active': self._active,
+                'depth': sum(self._depth.values()),
+                'depth_by_priority': dict(self._depth),
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'total_wait': self._total_wait,
+                'average_wait': self._total_wait / started if started else 0,
+                'max_wait': self._max_wait,
+            }
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, daemon=True,
+                                      name=f"judge-{len(self._threads)}")
+            self._threads.append(thread)
+            thread.start()
+
+    def _work(self):
+        while True:
+            priority, _, enqueued, item = self._queue.get()
+            waited = time.monotonic() - enqueued
+            with self._lock:
+                if self.key is not None:
+                    self._queued.discard(self.key(item))
+                self._depth[priority] -= 1
+                self._active += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+            instrumentation.record('queue', getattr(item, 'language', ''),
+                                   waited)
+            succeeded = False
+            try:
+                self.handler(item)
+                succeeded = True
+            except Exception:
+                traceback.print_exc()
+            finally:
+                db.close_old_connections()
+                with self._lock:
+                    self._active -= 1
+                    if succeeded:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+                self._queue.task_done()
@@ -0,0 +1,150 @@
+"""
+Реестр языков решений, настраивается в settings.JUDGE_LANGUAGES.
+
+Язык задает имя файла с исходным кодом, команду компиляции и флаги
+оптимизации, команду запуска, множитель ограничения времени и
+предварительную компиляцию в байткод для Python. В командах {source} -
+файл с исходным кодом, {binary} - результат компиляции, {program} -
+запускаемый файл: результат компиляции, байткод или исходный код.
+Результаты компиляции берутся из кэша компиляции.
+"""
+import copy
+import functools
+import hashlib
+import os
+import py_compile
+import subprocess
+
+from SchoolTestingSystem import settings
+from . import compile_cache, sandbox
+
+DEFAULT_BINARY = "main"
+BYTECODE_NAME = "main.pyc"
+
+
+class CompilationError(Exception):
+    def __init__(self, msg):
+        self.msg = msg
+
+
+class CompilerKilled(Exception):
+    """
+    Компилятор убит сигналом, например, при нехватке памяти. Это ошибка
+    проверяющего, а не решения, поэтому она не кэшируется
+    """
+
+
+def zygote_enabled():
+    return settings.JUDGE_PYTHON_ZYGOTE and \
+           settings.JUDGE_EXECUTION_BACKEND == 'rlimit' and \
+           sandbox.is_supported()
+
+
+class Language:
+    def __init__(self, name, source, run, compile=(), flags=(),
+                 binary=DEFAULT_BINARY, bytecode=False, zygote=False,
+                 time_multiplier=1):
+        self.name = name
+        self.source = source
+        self.run = tuple(run)
+        self.compile_command = tuple(compile)
+        self.flags = tuple(flags)
+        self.binary = binary
+        # Compile Python sources to bytecode ahead of the first test
+        self.bytecode = bytecode
+        # Run in the warm interpreter of the zygote, see JUDGE_PYTHON_ZYGOTE
+        self.zygote = zygote
+        self.time_multiplier = time_multiplier
+
+    @property
+    def fingerprint(self):
+        """Хэш настроек, от которых зависит результат проверки"""
+        return hashlib.sha256(repr((
+            self.source, self.run, self.compile_command, self.flags,
+            self.bytecode, self.time_multiplier
+        )).encode()).hexdigest()
+
+    def apply_limits(self, task):
+        """Копия задачи с ограничением времени для этого языка"""
+        task = copy.copy(task)
+        task.time_limit = int(task.time_limit * self.time_multiplier)
+        return task
+
+    def compile(self, folder_path, code):
+        """
+        Готовит решение к запуску в folder_path и возвращает имя
+        запускаемого файла
+        """
+        source_path = os.path.join(folder_path, self.source)
+        with open(source_path, 'w') as f:
+            f.write(code)
+        if self.compile_command:
+            self._compile_binary(folder_path, code)
+            return self.binary
+        if self.bytecode:
+            try:
+                py_compile.compile(
+                    source_path, os.path.join(folder_path, BYTECODE_NAME),
+                    doraise=True
+                )
+            except py_compile.PyCompileError:
+                pass  # the interpreter reports it when the solution runs
+            else:
+                return BYTECODE_NAME
+        return self.source
+
+    def command(self, folder_path, program):
+        """Команда запуска или sandbox.ZygoteCommand"""
+        program_path = os.path.join(folder_path, program)
+        if self.zygote and program == BYTECODE_NAME and zygote_enabled():
+            return sandbox.ZygoteCommand(
+                os.path.join(folder_path, self.source), program_path
+            )
+        return tuple(part.format(
+            source=os.path.join(folder_path, self.source),
+            binary=os.path.join(folder_path, self.binary),
+            program=program_path,
+        ) for part in self.run)
+
+    def _compile_binary(self, folder_path, code):
+        # Relative paths keep compiler messages free of the workspace path
+        command = [part.format(source=self.source, binary=self.binary)
+                   for part in self.compile_command + self.flags]
+        key = compile_cache.get_key(self.name, code,
+                                    self.compile_command[0],
+                                    self.compile_command[1:] + self.flags)
+        binary_path = os.path.join(folder_path, self.binary)
+        cached = compile_cache.cache.get(key)
+        if cached is not None:
+            if cached.error is not None:
+                raise CompilationError(cached.error)
+            cached.copy_binary(binary_path)
+            return
+
+        compilation = subprocess.run(command, cwd=folder_path,
+                                     stdin=subprocess.DEVNULL,
+                                     stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.PIPE)
+        if compilation.returncode < 0:
+            raise CompilerKilled(f"{command[0]} was killed by signal "
+                                 f"{-compilation.returncode}")
+        if compilation.returncode != 0:
+            error = compilation.stderr.decode(errors='replace')
+            compile_cache.cache.put_error(key, error)
+            raise CompilationError(error)
+        compile_cache.cache.put_binary(key, binary_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry():
+    return {name: Language(name, **options)
+            for name, options in settings.JUDGE_LANGUAGES.items()}
+
+
+def get_language(name):
+    """Язык по имени или None, если он не настроен"""
+    return get_registry().get(str(name))
+
+
+def choices():
+    return [(name, name) for name in get_registry()]
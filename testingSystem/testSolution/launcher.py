@@ -0,0 +1,214 @@
+"""
+Сервер запуска решений.
+
+Работает отдельным маленьким процессом: ядро засчитывает порожденному
+процессу пиковую память родителя на момент fork, поэтому решения
+запускаются не из проверяющей системы, а отсюда. Модуль не зависит от
+Django и запускается как `python3 -S -B launcher.py <fd>`, где fd - сокет,
+по которому приходят запросы вместе с файловыми дескрипторами решения.
+
+С флагом --preload сервер работает зиготой для решений на Python: заранее
+импортирует популярные модули и выполняет скомпилированный байткод
+решения в форке самого себя, без запуска нового интерпретатора.
+"""
+import array
+import json
+import os
+import resource
+import select
+import signal
+import socket
+import sys
+
+MAX_FDS = 8
+MAX_MESSAGE_SIZE = 64 * 1024
+# Magic number, flags and source stamp preceding the code in a .pyc file
+PYC_HEADER_SIZE = 16
+PRELOADED_MODULES = ("bisect", "collections", "decimal", "fractions",
+                     "functools", "heapq", "io", "itertools", "marshal",
+                     "math", "random", "re", "string", "traceback", "types")
+
+
+def send_message(connection, message, fds=()):
+    ancillary = [(socket.SOL_SOCKET, socket.SCM_RIGHTS,
+                  array.array('i', fds))] if fds else []
+    connection.sendmsg([json.dumps(message).encode()], ancillary)
+
+
+def receive_message(connection):
+    fds = array.array('i')
+    data, ancillary, _, _ = connection.recvmsg(
+        MAX_MESSAGE_SIZE, socket.CMSG_LEN(MAX_FDS * fds.itemsize)
+    )
+    for level, kind, payload in ancillary:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(payload[:len(payload) - len(payload) % fds.itemsize])
+    if not data:
+        return None, list(fds)
+    return json.loads(data.decode()), list(fds)
+
+
+def reply(connection, message):
+    try:
+        connection.sendall(json.dumps(message).encode() + b"\n")
+    except OSError:
+        pass
+
+
+def limit_resources(request):
+    if request.get('cgroup') is not None:
+        with open(os.path.join(request['cgroup'], "cgroup.procs"), 'w') as f:
+            f.write(str(os.getpid()))
+    cpu = request['cpu']
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    address_space = request['address_space']
+    resource.setrlimit(resource.RLIMIT_AS, (address_space, address_space))
+    output = request['output']
+    resource.setrlimit(resource.RLIMIT_FSIZE, (output, output))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if request.get('cpus'):
+        os.sched_setaffinity(0, request['cpus'])
+
+
+def spawn(request, stdin, stdout, stderr):
+    pid = os.fork()
+    if pid != 0:
+        return pid
+    try:
+        os.setsid()
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.set_wakeup_fd(-1)
+        os.dup2(stdin, 0)
+        os.dup2(stdout, 1)
+        os.dup2(stderr, 2)
+        os.closerange(3, os.sysconf('SC_OPEN_MAX'))
+        os.chdir(request['folder_path'])
+        limit_resources(request)
+        if 'bytecode' in request:
+            os._exit(run_bytecode(request))
+        # Python ignores these, executed programs should not
+        signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+        signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+        os.execvp(request['command'][0], request['command'])
+    except BaseException as e:
+        os.write(2, f"Не удалось запустить решение: {e!r}\n".encode())
+    finally:
+        os._exit(127)
+
+
+def run_bytecode(request):
+    import builtins
+    import io
+    import marshal
+    import traceback
+    import types
+
+    sys.stdin = sys.__stdin__ = open(0, 'r', closefd=False)
+    sys.stdout = sys.__stdout__ = open(1, 'w', closefd=False)
+    sys.stderr = sys.__stderr__ = io.TextIOWrapper(
+        open(2, 'wb', closefd=False), line_buffering=True,
+        errors='backslashreplace'
+    )
+    with open(request['bytecode'], 'rb') as f:
+        f.seek(PYC_HEADER_SIZE)
+        code = marshal.load(f)
+    main = types.ModuleType('__main__')
+    main.__file__ = request['script']
+    main.__builtins__ = builtins
+    sys.modules['__main__'] = main
+    sys.argv = [request['script']]
+    sys.path[0] = os.path.dirname(request['script'])
+
+    exit_code = 0
+    try:
+        exec(code, main.__dict__)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            exit_code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException as e:
+        # The first frame belongs to the zygote, not to the solution
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        exit_code = 1
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except BaseException:
+            exit_code = exit_code or 1
+    return exit_code
+
+
+def reap(runs):
+    while runs:
+        try:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        connection = runs.pop(pid, None)
+        if connection is not None:
+            reply(connection, {
+                'status': status,
+                'time': int((usage.ru_utime + usage.ru_stime) * 1000),
+                'memory': usage.ru_maxrss,
+            })
+            connection.close()
+
+
+def serve(control):
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_read, False)
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, lambda *args: None)
+
+    poller = select.poll()
+    poller.register(control, select.POLLIN)
+    poller.register(wakeup_read, select.POLLIN)
+    runs = {}
+    while True:
+        for fd, _ in poller.poll():
+            if fd == wakeup_read:
+                try:
+                    while os.read(wakeup_read, 1024):
+                        pass
+                except BlockingIOError:
+                    pass
+                reap(runs)
+                continue
+
+            request, fds = receive_message(control)
+            if request is None:
+                return
+            connection = socket.socket(fileno=fds[0])
+            try:
+                pid = spawn(request, *fds[1:4])
+            except OSError as e:
+                reply(connection, {'error': repr(e)})
+                connection.close()
+            else:
+                runs[pid] = connection
+                reply(connection, {'pid': pid})
+            finally:
+                for fd_to_close in fds[1:]:
+                    os.close(fd_to_close)
+            reap(runs)
+
+
+def preload():
+    import gc
+    import importlib
+
+    for module in PRELOADED_MODULES:
+        importlib.import_module(module)
+    # Keeps forked solutions from copying pages the collector touches
+    gc.freeze()
+
+
+if __name__ == '__main__':
+    if '--preload' in sys.argv[2:]:
+        preload()
+    serve(socket.socket(fileno=int(sys.argv[1])))
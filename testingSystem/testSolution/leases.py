@@ -0,0 +1,165 @@
+import os
+import socket
+import threading
+from datetime import timedelta
+
+import psutil
+from django import db
+from django.db.models import F, Q
+from django.utils import timezone
+
+from SchoolTestingSystem import settings
+from testingSystem import models
+
+CLAIM_CANDIDATES = 16
+GIVE_UP_MESSAGE = "Проверка попытки несколько раз завершилась с ошибкой"
+
+
+def default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def lease_deadline():
+    return timezone.now() + timedelta(seconds=settings.JUDGE_LEASE_TIME)
+
+
+def claimable():
+    return Q(judge_state=models.JudgeState.PENDING) | Q(
+        judge_state=models.JudgeState.JUDGING,
+        lease_expires__lt=timezone.now()
+    )
+
+
+def claim(owner, attempt_id=None):
+    """
+    Атомарно захватывает попытку, ожидающую проверки или брошенную
+    упавшим проверяющим. Возвращает попытку или None
+    """
+    candidates = models.Attempt.objects.filter(claimable())
+    if attempt_id is not None:
+        candidates = candidates.filter(id=attempt_id)
+    candidates = candidates.order_by(
+        'judge_priority', 'creation_time', 'id'
+    ).values_list(
+        'id', flat=True
+    )[:CLAIM_CANDIDATES]
+
+    for candidate in candidates:
+        claimed = models.Attempt.objects.filter(
+            claimable(), id=candidate
+        ).update(judge_state=models.JudgeState.JUDGING,
+                 lease_owner=owner,
+                 lease_expires=lease_deadline(),
+                 judge_runs=F('judge_runs') + 1)
+        if claimed:
+            return models.Attempt.objects.get(id=candidate)
+    return None
+
+
+def extend(attempt, owner):
+    return models.Attempt.objects.filter(
+        id=attempt.id, lease_owner=owner
+    ).update(lease_expires=lease_deadline()) != 0
+
+
+def release(attempt, owner, state=models.JudgeState.DONE):
+    models.Attempt.objects.filter(
+        id=attempt.id, lease_owner=owner
+    ).update(judge_state=state, lease_owner=None, lease_expires=None,
+             progress_version=F('progress_version') + 1)
+
+
+def owner_alive(owner):
+    """False, если аренда принадлежит завершившемуся процессу этой машины"""
+    host, _, rest = (owner or "").partition(":")
+    pid = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    return psutil.pid_exists(int(pid))
+
+
+def recover():
+    """
+    Возвращает в очередь попытки, брошенные завершившимися процессами этой
+    машины, не дожидаясь конца аренды, и проверенные попытки, у которых
+    остались непроверенные тесты. Законченные результаты сохраняются, при
+    повторной проверке запускаются только остальные тесты. Возвращает
+    число попыток
+    """
+    abandoned = [
+        attempt_id for attempt_id, owner in models.Attempt.objects.filter(
+            judge_state=models.JudgeState.JUDGING
+        ).values_list('id', 'lease_owner')
+        if not owner_alive(owner)
+    ]
+    unfinished = models.Attempt.objects.filter(
+        judge_state=models.JudgeState.DONE,
+        checked_tests__status=models.Status.TS,
+    ).values('id')
+    return models.Attempt.objects.filter(
+        Q(id__in=abandoned, judge_state=models.JudgeState.JUDGING) |
+        Q(id__in=unfinished)
+    ).update(judge_state=models.JudgeState.PENDING, lease_owner=None,
+             lease_expires=None,
+             progress_version=F('progress_version') + 1)
+
+
+def stale_attempts():
+    """Попытки, ожидающие проверки, и попытки с истекшей арендой"""
+    return models.Attempt.objects.filter(claimable()).order_by(
+        'judge_priority', 'creation_time', 'id'
+    ).only('id', 'language', 'judge_priority')
+
+
+def requeue(attempt, owner):
+    release(attempt, owner, models.JudgeState.PENDING)
+
+
+def give_up(attempt, owner):
+    """
+    Помечает ошибкой сервера попытку, на которой проверяющие падают, даже
+    если она упала раньше, чем появились результаты тестов
+    """
+    attempt.checked_tests.filter(status=models.Status.TS).update(
+        status=models.Status.SE
+    )
+    attempt.fail(list(attempt.checked_tests.order_by('id')), GIVE_UP_MESSAGE)
+    attempt.save_summary()
+    release(attempt, owner)
+
+
+class LeaseLost(Exception):
+    """Попытку, аренда которой истекла, забрал другой проверяющий"""
+
+
+class Heartbeat:
+    """Продлевает аренду попытки, пока она проверяется"""
+
+    def __init__(self, attempt, owner):
+        self.attempt = attempt
+        self.owner = owner
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stopped.set()
+        self._thread.join()
+
+    def check(self):
+        """Бросает LeaseLost, если аренда потеряна"""
+        if self.lost:
+            raise LeaseLost()
+
+    def _beat(self):
+        try:
+            while not self._stopped.wait(settings.JUDGE_LEASE_TIME / 3):
+                if not extend(self.attempt, self.owner):
+                    self.lost = True
+                    return
+        finally:
+            db.connection.close()
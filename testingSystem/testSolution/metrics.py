@@ -0,0 +1,196 @@
+"""
+Метрики проверяющей системы в текстовом формате Prometheus.
+
+Гистограммы длительности этапов (см. instrumentation) и счётчики
+вердиктов хранятся в памяти процесса, который проверяет попытки.
+Состояние очереди этого процесса передаётся в render, а число попыток
+в каждом состоянии проверки берётся из базы данных и учитывает все
+проверяющие.
+
+В режиме thread метрики отдаёт /metrics веб-приложения. В режиме daemon
+попытки проверяют процессы `manage.py judge`, и каждый из них отдаёт
+свои метрики сам, на порту JUDGE_METRICS_PORT или --metrics-port.
+"""
+import bisect
+import hmac
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django import db
+from django.db.models import Count
+
+from SchoolTestingSystem import settings
+
+from testingSystem import models
+from . import cores, instrumentation, workspaces
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1, 2.5, 5, 10, 30, 60)  # s
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"') \
+        .replace("\n", "\\n")
+
+
+def sample(name, labels, value):
+    if not labels:
+        return f"{name} {value}"
+    formatted = ",".join(f'{label}="{escape(label_value)}"'
+                         for label, label_value in labels)
+    return f"{name}{{{formatted}}} {value}"
+
+
+def header(name, kind, description):
+    return [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+
+
+class Histogram:
+    def __init__(self, name, description, label_names, buckets=BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # Label values -> (observations per bucket, sum, count)
+        self._values = {}
+
+    def observe(self, label_values, value):
+        with self._lock:
+            counts, total, count = self._values.get(
+                label_values, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[label_values] = counts, total + value, count + 1
+
+    def render(self):
+        lines = header(self.name, "histogram", self.description)
+        with self._lock:
+            values = sorted((label_values, list(counts), total, count)
+                            for label_values, (counts, total, count)
+                            in self._values.items())
+        for label_values, counts, total, count in values:
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, observations in zip(self.buckets + ("+Inf",),
+                                           counts):
+                cumulative += observations
+                lines.append(sample(f"{self.name}_bucket",
+                                    labels + [("le", bound)], cumulative))
+            lines.append(sample(f"{self.name}_sum", labels, total))
+            lines.append(sample(f"{self.name}_count", labels, count))
+        return lines
+
+
+class Counter:
+    def __init__(self, name, description, label_names):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = \
+                self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = header(self.name, "counter", self.description)
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(sample(self.name,
+                                list(zip(self.label_names, label_values)),
+                                value))
+        return lines
+
+
+stage_seconds = Histogram("judge_stage_seconds",
+                          "Длительность этапов проверки, с",
+                          ("stage", "language"))
+verdicts = Counter("judge_verdicts_total", "Число проверенных попыток",
+                   ("language", "verdict"))
+
+instrumentation.subscribe(lambda stage, language, seconds:
+                          stage_seconds.observe((stage, language), seconds))
+
+
+def gauge(name, description, samples):
+    lines = header(name, "gauge", description)
+    for labels, value in samples:
+        lines.append(sample(name, labels, value))
+    return lines
+
+
+def render(queue_stats):
+    """Все метрики; queue_stats - JudgeQueue.stats() этого процесса"""
+    states = dict(models.Attempt.objects.values_list('judge_state')
+                  .annotate(count=Count('id')).order_by())
+    lines = stage_seconds.render() + verdicts.render()
+    lines += gauge("judge_attempts", "Число попыток в состоянии проверки",
+                   [([("state", state)], states.get(state, 0))
+                    for state in models.JudgeState.values])
+    lines += gauge("judge_workers", "Число потоков-проверяющих",
+                   [([], queue_stats['workers'])])
+    lines += gauge("judge_active_workers", "Число занятых проверяющих",
+                   [([], queue_stats['active'])])
+    core_stats = cores.scheduler.stats()
+    lines += gauge("judge_cpus", "Число ядер для решений",
+                   [([], core_stats['cpus'])])
+    lines += gauge("judge_busy_cpus", "Число ядер, занятых решениями",
+                   [([], core_stats['busy'])])
+    workspace_stats = workspaces.pool.stats()
+    lines += gauge("judge_workspaces", "Число рабочих каталогов",
+                   [([("state", state)], count)
+                    for state, count in workspace_stats.items()])
+    lines += gauge("judge_queue_depth", "Число попыток в очереди",
+                   [([("priority", priority)], depth) for priority, depth
+                    in sorted(queue_stats['depth_by_priority'].items())])
+    return "\n".join(lines) + "\n"
+
+
+def is_allowed(address, authorization):
+    """
+    Можно ли отдать метрики: запрос с адреса из JUDGE_METRICS_ALLOWED_IPS
+    или с заголовком Authorization: Bearer JUDGE_METRICS_TOKEN
+    """
+    token = settings.JUDGE_METRICS_TOKEN
+    if token and hmac.compare_digest((authorization or "").encode(),
+                                     f"Bearer {token}".encode()):
+        return True
+    return address in settings.JUDGE_METRICS_ALLOWED_IPS
+
+
+def serve(port, queue_stats):
+    """
+    Отдаёт метрики по HTTP из фонового потока, queue_stats() - состояние
+    проверяющих в формате JudgeQueue.stats()
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if not is_allowed(self.client_address[0],
+                              self.headers.get("Authorization")):
+                self.send_error(404)
+                return
+            try:
+                body = render(queue_stats()).encode()
+            finally:
+                db.connection.close()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((settings.JUDGE_METRICS_HOST, port),
+                                 Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True,
+                     name="judge-metrics").start()
+    return server
@@ -0,0 +1,315 @@
+"""
+Реестр чекеров и постпроцессоров задач.
+
+Task.checker_name выбирает встроенный сравниватель (см. comparators),
+чекер на Python из пакета checkers или чекер в стиле testlib на C++:
+`cpp:<name>` для файла checkers/<name>.cpp. Task.post_processor_name
+выбирает постпроцессор из пакета postProcessors. Без имени используются
+сравниватель lines и simple_post_processor, неизвестное имя - ошибка.
+
+Постпроцессор считает оценку по мере проверки тестов, если определяет
+функции initial(checked_tests, statuses[, groups]) -> состояние,
+fold(состояние, checked_test, statuses) -> состояние и
+result(состояние, statuses) -> оценка. Иначе оценка каждый раз
+пересчитывается функцией processor(checked_tests, statuses). groups -
+группы тестов набора (см. groups.Group), initial без этого аргумента
+считает оценку без учета групп.
+
+Плагины находятся один раз на версию исходного кода: модули
+импортируются заново, а чекеры на C++ компилируются, только если
+исходный код изменился. Чекеры на Python выполняются в пуле процессов,
+чтобы не занимать GIL проверяющей системы, чекеры на C++ - отдельными
+процессами; и те, и другие ограничены по времени.
+"""
+import collections
+import functools
+import hashlib
+import inspect
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from importlib import import_module, reload
+
+from SchoolTestingSystem import settings
+from . import checker_worker, comparators, compile_cache
+
+PLUGINS_DIR = os.path.dirname(os.path.abspath(__file__))
+CPP_PREFIX = "cpp:"
+DEFAULT_POST_PROCESSOR = "simple_post_processor"
+
+CHECKER_COMPILER = "g++"
+CHECKER_FLAGS = ("-O2", "-std=c++17")
+# Time for the pool to deliver the result of a checker
+POOL_GRACE_TIME = 1  # s
+# Attempts to hand a check to a pooled process that has died meanwhile
+POOL_RETRIES = 3
+MESSAGE_LIMIT = 64 * 1024
+
+# testlib exit codes
+CHECKER_OK = 0
+CHECKER_WRONG_ANSWER = 1
+CHECKER_PRESENTATION_ERROR = 2
+
+
+class PluginError(Exception):
+    pass
+
+
+PostProcessor = collections.namedtuple('PostProcessor',
+                                       ('initial', 'fold', 'result'))
+
+
+def get_source(package, name):
+    """Путь к исходному коду плагина или None, если его нет"""
+    extension = ".py"
+    if package == "checkers" and name.startswith(CPP_PREFIX):
+        name, extension = name[len(CPP_PREFIX):], ".cpp"
+    if not name.isidentifier():
+        return None
+    path = os.path.join(PLUGINS_DIR, package, name + extension)
+    return path if os.path.isfile(path) else None
+
+
+def source_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def fingerprint(package, name):
+    """Хэш исходного кода плагина, для встроенных - его имя"""
+    if not name:
+        return ""
+    path = get_source(package, name)
+    if path is None:
+        return name
+    return source_digest(path)
+
+
+def load_module(name):
+    module = sys.modules.get(name)
+    if module is None:
+        return import_module(name)
+    return reload(module)
+
+
+class CheckerProcess:
+    """Процесс для чекеров на Python, проверяет по одному тесту за раз"""
+
+    def __init__(self):
+        context = multiprocessing.get_context('spawn')
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=checker_worker.serve,
+                                       args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def send(self, args):
+        """False, если процесс уже завершился"""
+        try:
+            self.connection.send(args)
+        except (BrokenPipeError, ConnectionResetError, EOFError):
+            return False
+        return True
+
+    def receive(self, timeout):
+        """
+        Пара (успех, результат или исключение чекера). Бросает
+        TimeoutError, если процесс не ответил за timeout секунд, и
+        EOFError, если он завершился
+        """
+        if not self.connection.poll(timeout):
+            raise TimeoutError()
+        return self.connection.recv()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class CheckerPool:
+    """
+    Пул процессов для чекеров на Python, не больше JUDGE_CHECKER_WORKERS.
+    У каждой проверки свой процесс, поэтому зависший или аварийно
+    завершившийся чекер заменяется новым процессом, не затрагивая
+    проверки в остальных процессах
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(
+            settings.JUDGE_CHECKER_WORKERS
+        )
+
+    def run(self, *args):
+        with self._slots:
+            for _ in range(POOL_RETRIES):
+                process = self._acquire()
+                # An idle process may have died since its last check
+                if process.send(args):
+                    break
+                process.kill()
+            else:
+                raise PluginError("Не удалось запустить процесс чекера")
+            try:
+                ok, result = process.receive(
+                    settings.JUDGE_CHECKER_TIME_LIMIT + POOL_GRACE_TIME
+                )
+            except TimeoutError:
+                process.kill()
+                raise checker_worker.TimeLimitExceeded()
+            except (EOFError, OSError):
+                process.kill()
+                raise PluginError("Процесс чекера аварийно завершился")
+            except BaseException:
+                process.kill()
+                raise
+            self._release(process)
+        if not ok:
+            raise result
+        return result
+
+    def close(self):
+        """Завершает простаивающие процессы"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for process in idle:
+            process.kill()
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return CheckerProcess()
+
+    def _release(self, process):
+        with self._lock:
+            self._idle.append(process)
+
+
+checker_pool = CheckerPool()
+
+
+@functools.lru_cache(maxsize=None)
+def python_checker(name, digest):
+    module_name = f"testingSystem.testSolution.checkers.{name}"
+
+    def check(test, output):
+        try:
+            return checker_pool.run(
+                module_name, digest, test.input_path, test.output_path,
+                output.read(), settings.JUDGE_CHECKER_TIME_LIMIT
+            ), ""
+        except checker_worker.TimeLimitExceeded:
+            raise PluginError(f"Чекер {name} превысил ограничение времени")
+        except PluginError:
+            raise
+        except Exception as e:
+            raise PluginError(f"Ошибка чекера {name}: {e!r}")
+    return check
+
+
+def compile_checker(name, path):
+    with open(path) as f:
+        source = f.read()
+    key = compile_cache.get_key("checker", source, CHECKER_COMPILER,
+                                CHECKER_FLAGS)
+    cached = compile_cache.cache.get(key)
+    if cached is None:
+        with tempfile.TemporaryDirectory() as folder_path:
+            binary_path = os.path.join(folder_path, "checker")
+            compilation = subprocess.run(
+                [CHECKER_COMPILER, path, *CHECKER_FLAGS, "-o", binary_path],
+                stderr=subprocess.PIPE
+            )
+            if compilation.returncode != 0:
+                compile_cache.cache.put_error(key,
+                                              compilation.stderr.decode())
+            else:
+                compile_cache.cache.put_binary(key, binary_path)
+        cached = compile_cache.cache.get(key)
+    if cached is None:
+        raise PluginError(f"Не удалось сохранить чекер {name}")
+    if cached.error is not None:
+        raise PluginError(f"Чекер {name} не компилируется:\n{cached.error}")
+    return cached.binary_path
+
+
+def cpp_checker(name, path):
+    binary_path = compile_checker(name, path)
+
+    def check(test, output):
+        output_fd = output.fileno()
+        try:
+            result = subprocess.run(
+                [binary_path, test.input_path, f"/dev/fd/{output_fd}",
+                 test.output_path],
+                pass_fds=(output_fd,),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=settings.JUDGE_CHECKER_TIME_LIMIT,
+            )
+        except subprocess.TimeoutExpired:
+            raise PluginError(f"Чекер {name} превысил ограничение времени")
+        message = result.stderr[:MESSAGE_LIMIT].decode(errors='replace')
+        if result.returncode == CHECKER_OK:
+            return True, ""
+        if result.returncode in (CHECKER_WRONG_ANSWER,
+                                 CHECKER_PRESENTATION_ERROR):
+            return False, message.strip()
+        raise PluginError(f"Чекер {name} завершился с кодом "
+                          f"{result.returncode}:\n{message}")
+    return check
+
+
+def get_checker(name):
+    """
+    Возвращает проверку (test, output) -> (верно ли, сообщение) для
+    Task.checker_name. Вызывается один раз на проверку попытки
+    """
+    try:
+        comparator = comparators.get_comparator(name)
+    except ValueError as e:
+        raise PluginError(str(e))
+    if comparator is not None:
+        return comparator
+    path = get_source("checkers", name)
+    if path is None:
+        raise PluginError(f"Чекер {name} не найден")
+    if name.startswith(CPP_PREFIX):
+        return cpp_checker(name, path)
+    return python_checker(name, source_digest(path))
+
+
+@functools.lru_cache(maxsize=None)
+def load_post_processor(name, digest):
+    module = load_module(f"testingSystem.testSolution.postProcessors.{name}")
+    if all(hasattr(module, function) for function in PostProcessor._fields):
+        initial = module.initial
+        if 'groups' not in inspect.signature(initial).parameters:
+            def initial(checked_tests, statuses, groups):
+                return module.initial(checked_tests, statuses)
+        return PostProcessor(initial, module.fold, module.result)
+    if not hasattr(module, 'processor'):
+        raise PluginError(f"В постпроцессоре {name} нет функции processor")
+
+    # The state is the list of all results, updated by the judge in place
+    return PostProcessor(
+        initial=lambda checked_tests, statuses, groups: checked_tests,
+        fold=lambda checked_tests, checked_test, statuses: checked_tests,
+        result=module.processor,
+    )
+
+
+def get_post_processor(name):
+    name = name or DEFAULT_POST_PROCESSOR
+    path = get_source("postProcessors", name)
+    if path is None:
+        raise PluginError(f"Постпроцессор {name} не найден")
+    return load_post_processor(name, source_digest(path))
@@ -1,7 +1,52 @@
+from testingSystem.testSolution.groups import GroupTracker
+
+
+def initial(checked_tests, statuses, groups=()):
+    """
+    Состояние до проверки: число тестов, число пройденных тестов, а если
+    у набора есть группы - число непройденных тестов каждой группы и
+    не пройденные группы
+    """
+    return {
+        'total': len(checked_tests),
+        'passed': 0,
+        'groups': groups,
+        'remaining': {group.name: len(group.tests) for group in groups},
+        'tracker': GroupTracker(groups),
+    }
+
+
+def fold(state, checked_test, statuses):
+    """Учитывает результат одного проверенного теста"""
+    if checked_test.status == statuses.OK:
+        state['passed'] += 1
+        for name in state['tracker'].groups_of(checked_test.test_id):
+            state['remaining'][name] -= 1
+    else:
+        state['tracker'].fail(checked_test.test_id)
+    return state
+
+
+def result(state, statuses):
+    """
+    Возвращает оценку в процентах
+    (0% - ничего не сделано, 100% - все правильно),
+    а если у набора есть группы - сумму баллов пройденных групп
+    """
+    if state['groups']:
+        return sum(group.points for group in state['groups']
+                   if state['remaining'][group.name] == 0 and
+                   not state['tracker'].is_failed(group.name))
+    total, passed = state['total'], state['passed']
+    return passed / total * 100 if total else 0
+
+
 def processor(checked_tests, statuses):
     """
     Возвращает оценку в процентах
     (0% - ничего не сделано, 100% - все правильно)
     """
-    return len([test for test in checked_tests
-                if test.status == statuses.OK]) / len(checked_tests) * 100
+    state = initial(checked_tests, statuses)
+    for test in checked_tests:
+        state = fold(state, test, statuses)
+    return result(state, statuses)
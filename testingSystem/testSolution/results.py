@@ -0,0 +1,165 @@
+import threading
+import time
+
+from SchoolTestingSystem import settings
+from testingSystem import models
+
+BATCH_SIZE = 256
+UPDATED_FIELDS = ('status', 'memory_used', 'time_used', 'message')
+# Results reused when neither the test nor the judging settings changed.
+# Skipped tests depend on the others and are reused only when no other
+# test is judged again
+REUSABLE_STATUSES = frozenset(models.Status) - {models.Status.TS,
+                                                models.Status.SE}
+# Verdicts that may change with the judge load, see rejudge --rerun-limits
+LOAD_DEPENDENT_STATUSES = frozenset({models.Status.TL, models.Status.IL})
+
+
+class ResultBuffer:
+    """
+    Результаты тестов попытки. Изменения копятся в памяти и записываются
+    в базу пачками вместе со сводкой попытки не чаще раза в
+    JUDGE_FLUSH_INTERVAL секунд, а также при выходе из контекста. Если
+    задан постпроцессор, он учитывает каждый проверенный тест один раз,
+    и вместе со сводкой записывается текущая оценка. Если задана аренда
+    (leases.Heartbeat), результаты не записываются после ее потери
+    """
+
+    def __init__(self, attempt, timer=None, lease=None):
+        self.attempt = attempt
+        self.timer = timer
+        self.lease = lease
+        self._post_processor = None
+        self._score_state = None
+        self._folded = set()
+        self._tests = []
+        self._lock = threading.Lock()
+        self._changed = {}
+        self._last_flush = time.monotonic()
+
+    def prepare(self, testset, fingerprint):
+        """
+        Готовит результаты всех тестов набора. Результаты прошлой
+        проверки, кроме SE, переиспользуются, если тест и отпечаток
+        настроек проверки не изменились, остальные тесты получают статус
+        TS. Пропущенные тесты проверяются заново вместе с остальными
+        """
+        self.attempt.testset_version = testset.version
+        previous = {checked_test.test_id: checked_test
+                    for checked_test in self.attempt.checked_tests.all()}
+        created, reset, skipped = [], [], []
+        for test in testset.tests.order_by('id'):
+            checked_test = previous.pop(test.id, None)
+            if checked_test is None:
+                checked_test = models.CheckedTest(attempt=self.attempt,
+                                                  test=test)
+                created.append(checked_test)
+            elif checked_test.test_hash == test.content_hash and \
+                    checked_test.judge_fingerprint == fingerprint and \
+                    checked_test.status in REUSABLE_STATUSES:
+                if checked_test.status == models.Status.SK:
+                    skipped.append((checked_test, test))
+                continue
+            else:
+                reset.append(checked_test)
+            self._reset(checked_test, test, fingerprint)
+        if created or reset:
+            for checked_test, test in skipped:
+                self._reset(checked_test, test, fingerprint)
+                reset.append(checked_test)
+
+        models.CheckedTest.objects.filter(
+            id__in=[checked_test.id for checked_test in previous.values()]
+        ).delete()
+        models.CheckedTest.objects.bulk_update(
+            reset, UPDATED_FIELDS + ('test_hash', 'judge_fingerprint'),
+            batch_size=BATCH_SIZE
+        )
+        models.CheckedTest.objects.bulk_create(created,
+                                               batch_size=BATCH_SIZE)
+        # Not every database returns primary keys of created rows
+        self._tests = list(self.attempt.checked_tests.select_related('test')
+                           .order_by('id'))
+        self.attempt.score = 0
+        self._save_summary()
+        models.Attempt.objects.filter(id=self.attempt.id).update(
+            testset_version=self.attempt.testset_version
+        )
+        return self._tests
+
+    @staticmethod
+    def _reset(checked_test, test, fingerprint):
+        checked_test.status = models.Status.TS
+        checked_test.memory_used = 0
+        checked_test.time_used = 0
+        checked_test.message = ""
+        checked_test.test_hash = test.content_hash
+        checked_test.judge_fingerprint = fingerprint
+
+    def set_post_processor(self, post_processor, groups=()):
+        with self._lock:
+            self._post_processor = post_processor
+            self._score_state = post_processor.initial(self._tests,
+                                                       models.Status, groups)
+            self._folded.clear()
+            for checked_test in self._tests:
+                self._fold(checked_test)
+
+    def update(self, *checked_tests):
+        with self._lock:
+            for checked_test in checked_tests:
+                self._changed[checked_test.id] = checked_test
+                self._fold(checked_test)
+            if time.monotonic() - self._last_flush >= \
+                    settings.JUDGE_FLUSH_INTERVAL:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self.timer is None:
+            self._write()
+        else:
+            with self.timer.stage('flush'):
+                self._write()
+
+    def check_lease(self):
+        if self.lease is not None:
+            self.lease.check()
+
+    def _write(self):
+        self.check_lease()
+        self._last_flush = time.monotonic()
+        if self._changed:
+            models.CheckedTest.objects.bulk_update(
+                list(self._changed.values()), UPDATED_FIELDS,
+                batch_size=BATCH_SIZE
+            )
+            self._changed.clear()
+        self._save_summary()
+
+    def _fold(self, checked_test):
+        if self._post_processor is None or \
+                checked_test.status == models.Status.TS or \
+                checked_test.id in self._folded:
+            return
+        self._folded.add(checked_test.id)
+        self._score_state = self._post_processor.fold(
+            self._score_state, checked_test, models.Status
+        )
+
+    def _save_summary(self):
+        self.attempt.update_summary(self._tests)
+        if self._post_processor is not None:
+            self.attempt.score = self._post_processor.result(
+                self._score_state, models.Status
+            )
+        self.attempt.save_summary()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
@@ -0,0 +1,244 @@
+import collections
+import json
+import math
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from SchoolTestingSystem import settings
+from testingSystem import models
+from . import launcher
+from .launcher import send_message
+
+IDLENESS_TIME_LIMIT = 5000  # ms
+# Messages of programs whose allocation was refused by the address space
+# limit, such programs exceeded the memory limit
+OUT_OF_MEMORY_MARKERS = ("MemoryError", "std::bad_alloc")
+MARKERS_SEARCH_SIZE = 64 * 1024
+
+
+# Python solution run by the zygote from its precompiled bytecode
+ZygoteCommand = collections.namedtuple('ZygoteCommand',
+                                       ['script', 'bytecode'])
+
+
+def is_supported():
+    return resource is not None and hasattr(socket, 'AF_UNIX')
+
+
+class MemoryCgroup:
+    """
+    Отдельная cgroup v2 для одного запуска решения. Ядро не дает решению
+    занять больше памяти, чем разрешено, и считает пиковое потребление
+    """
+
+    def __init__(self, root, memory_limit):
+        self.path = os.path.join(root, f"test_{uuid.uuid4().hex}")
+        os.mkdir(self.path)
+        self._write("memory.max", str(memory_limit * 1024))
+        if os.path.exists(os.path.join(self.path, "memory.swap.max")):
+            self._write("memory.swap.max", "0")
+
+    @staticmethod
+    def available():
+        root = settings.JUDGE_CGROUP_ROOT
+        return root is not None and os.access(root, os.W_OK) and \
+            os.path.exists(os.path.join(root, "cgroup.subtree_control"))
+
+    def enter(self):
+        self._write("cgroup.procs", str(os.getpid()))
+
+    def oom_killed(self):
+        for line in self._read("memory.events").splitlines():
+            name, value = line.split()
+            if name == "oom_kill":
+                return int(value) > 0
+        return False
+
+    def peak_memory(self):
+        try:
+            return int(self._read("memory.peak")) // 1024
+        except FileNotFoundError:  # kernels before 5.19
+            return 0
+
+    def remove(self):
+        try:
+            os.rmdir(self.path)
+        except OSError:
+            pass
+
+    def _read(self, name):
+        with open(os.path.join(self.path, name)) as f:
+            return f.read()
+
+    def _write(self, name, value):
+        with open(os.path.join(self.path, name), 'w') as f:
+            f.write(value)
+
+
+class Launcher:
+    """Процесс launcher.py, через который запускаются решения"""
+
+    def __init__(self, preload=False):
+        self.preload = preload
+        self._lock = threading.Lock()
+        self._process = None
+        self._control = None
+
+    def start(self, request, fds):
+        """
+        Передает запрос и дескрипторы решения серверу запуска. Возвращает
+        сокет, в который придут pid и итог запуска
+        """
+        connection, remote = socket.socketpair()
+        try:
+            with self._lock:
+                try:
+                    self._send(request, [remote.fileno(), *fds])
+                except OSError:
+                    self._process = None
+                    self._send(request, [remote.fileno(), *fds])
+        except BaseException:
+            connection.close()
+            raise
+        finally:
+            remote.close()
+        return connection
+
+    def _send(self, request, fds):
+        if self._process is None or self._process.poll() is not None:
+            self._spawn()
+        send_message(self._control, request, fds)
+
+    def _spawn(self):
+        self._control, remote = socket.socketpair(socket.AF_UNIX,
+                                                  socket.SOCK_SEQPACKET)
+        command = [sys.executable, '-B', launcher.__file__,
+                   str(remote.fileno())]
+        if self.preload:
+            command.append('--preload')
+        else:
+            command.insert(1, '-S')
+        with remote:
+            self._process = subprocess.Popen(
+                command, stdin=subprocess.DEVNULL, pass_fds=[remote.fileno()]
+            )
+
+
+launcher_process = Launcher()
+zygote_process = Launcher(preload=True)
+
+
+def exit_code(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def read_head(file, size):
+    file.seek(0)
+    return file.read(size)
+
+
+def output_exceeded(task, stdout):
+    return os.fstat(stdout.fileno()).st_size > task.output_limit * 1024
+
+
+def run(task, test, start_program, stdin, stdout, stderr, timer, cpu,
+        folder_path):
+    """
+    Запускает решение под ограничениями ядра: процессорное время,
+    адресное пространство и размер вывода ограничены setrlimit, память -
+    cgroup v2, если она настроена. Ресурсы берутся из rusage завершившегося
+    процесса. Решение работает прямо с файлами stdin, stdout и stderr в
+    рабочем каталоге folder_path и привязано к ядру cpu, если оно задано.
+    Возвращает код возврата решения
+    """
+    cgroup = MemoryCgroup(settings.JUDGE_CGROUP_ROOT, task.memory_limit) \
+        if MemoryCgroup.available() else None
+    request = {
+        'cpu': max(1, math.ceil(task.time_limit / 1000)),
+        'address_space': (task.memory_limit +
+                          settings.JUDGE_ADDRESS_SPACE_HEADROOM) * 1024,
+        # One byte over the limit tells an exceeded limit from a reached one
+        'output': task.output_limit * 1024 + 1,
+        'cgroup': cgroup.path if cgroup is not None else None,
+        'cpus': [cpu] if cpu is not None else None,
+        'folder_path': folder_path,
+    }
+    if isinstance(start_program, ZygoteCommand):
+        server = zygote_process
+        request.update(start_program._asdict())
+    else:
+        server = launcher_process
+        request['command'] = list(start_program)
+    try:
+        spawn_started = time.perf_counter()
+        connection = server.start(
+            request, [stdin.fileno(), stdout.fileno(), stderr.fileno()]
+        )
+        with connection, connection.makefile('r') as replies:
+            started = json.loads(replies.readline())
+            timer.record('spawn', time.perf_counter() - spawn_started)
+            if 'error' in started:
+                raise OSError(started['error'])
+            idle = threading.Event()
+
+            def on_idle():
+                idle.set()
+                kill_group(started['pid'])
+
+            deadline = threading.Timer(
+                (task.time_limit + IDLENESS_TIME_LIMIT) / 1000, on_idle
+            )
+            deadline.start()
+            try:
+                with timer.stage('track'):
+                    finished = json.loads(replies.readline())
+            finally:
+                deadline.cancel()
+        kill_group(started['pid'])
+
+        returncode = exit_code(finished['status'])
+        test.time_used = finished['time']
+        test.memory_used = finished['memory']
+        if cgroup is not None:
+            test.memory_used = max(test.memory_used, cgroup.peak_memory())
+        errors = read_head(stderr, MARKERS_SEARCH_SIZE)
+
+        out_of_memory = cgroup is not None and cgroup.oom_killed() or \
+            returncode != 0 and any(marker.encode() in errors
+                                    for marker in OUT_OF_MEMORY_MARKERS)
+        if test.time_used > task.time_limit or \
+                returncode == -signal.SIGXCPU:
+            test.status = models.Status.TL
+            # rusage may count a little less than the kernel limit
+            test.time_used = max(test.time_used, task.time_limit + 1)
+        elif test.memory_used > task.memory_limit or out_of_memory:
+            test.status = models.Status.ML
+        elif output_exceeded(task, stdout) or \
+                returncode == -signal.SIGXFSZ:
+            test.status = models.Status.OL
+        elif idle.is_set():
+            test.status = models.Status.IL
+        return returncode
+    finally:
+        if cgroup is not None:
+            cgroup.remove()
@@ -1,54 +1,22 @@
-from testingSystem import models
-import subprocess
+from testingSystem import models, standings
 from SchoolTestingSystem import settings
 import os
 import traceback
-import shutil
 import psutil
 import threading
 from concurrent import futures
 import time
-from importlib import import_module
-from .postProcessors.simple_post_processor import processor \
-    as simple_post_processor
+from django import db
+from django.core.cache import cache
+from django.db.models import Count, Q
+from . import cores, groups, instrumentation, languages, leases, metrics, \
+    plugins, results, sandbox, verdict_cache, workspaces
+from .judge_queue import JudgeQueue, Priority
+from .sandbox import IDLENESS_TIME_LIMIT
 
-IDLENESS_TIME_LIMIT = 5000  # ms
 RESOURCES_CHECK_PERIOD = 20  # ms
-
-
-def strip_answer(answer):
-    return os.linesep.join(
-        line.strip() for line in answer.split(os.linesep)
-    ).strip()
-
-
-def check_contents_are_equal(test, output, *args, **kwargs):
-    return strip_answer(test.output) == strip_answer(output)
-
-
-def get_checker(name):
-    try:
-        return import_module("testingSystem.testSolution."
-                             "checkers." + name).check
-    except (ModuleNotFoundError, AttributeError):
-        return check_contents_are_equal
-
-
-def get_post_processor(name):
-    try:
-        return import_module("testingSystem.testSolution."
-                             "postProcessors." + name).processor
-    except (ModuleNotFoundError, AttributeError):
-        return simple_post_processor
-
-
-def invoke_checker(task, test, output):
-    return get_checker(task.checker_name)(test, output, strip_answer)
-
-
-def invoke_post_processor(attempt, checked_tests):
-    post_processor = get_post_processor(attempt.task.post_processor_name)
-    return post_processor(checked_tests, models.Status)
+MESSAGE_LIMIT = 256 * 1024
+NO_TESTS_MESSAGE = "У задачи нет тестов"
 
 
 def check_resources(process: psutil.Process):
@@ -60,7 +28,7 @@ def check_resources(process: psutil.Process):
     return memory_used, cpu_time_used
 
 
-def execute_and_track_process(task, test, process):
+def execute_and_track_process(task, test, process, stdout):
     idle_time_used = 0
     while process.is_running() and process.status() != psutil.STATUS_ZOMBIE:
         memory_used, cpu_time_used = check_resources(process)
@@ -78,6 +46,10 @@ def execute_and_track_process(task, test, process):
             test.status = models.Status.TL
             process.kill()
 
+        if sandbox.output_exceeded(task, stdout):
+            test.status = models.Status.OL
+            process.kill()
+
         if idle_time_used > IDLENESS_TIME_LIMIT:
             test.status = models.Status.IL
             process.kill()
@@ -86,120 +58,335 @@ def execute_and_track_process(task, test, process):
         time.sleep(RESOURCES_CHECK_PERIOD / 1000)
         process.suspend()
     process.resume()
-
-
-def test_program(task, start_program, test):
-    process = psutil.Popen(start_program,
-                           stdin=subprocess.PIPE,
-                           stdout=subprocess.PIPE,
-                           stderr=subprocess.PIPE)
-    process.suspend()
-
-    with futures.ThreadPoolExecutor() as executor:
-        tested = executor.submit(
-            lambda: process.communicate(input=str.encode(test.test.input))
-        )
+    # The output may outgrow the limit after the last check
+    if test.status == models.Status.TS and \
+            sandbox.output_exceeded(task, stdout):
+        test.status = models.Status.OL
+
+
+def track_process(task, test, start_program, stdin, stdout, stderr, timer,
+                  cpu, folder_path):
+    with timer.stage('spawn'):
+        process = psutil.Popen(start_program,
+                               cwd=folder_path,
+                               stdin=stdin,
+                               stdout=stdout,
+                               stderr=stderr)
+        process.suspend()
+        if cpu is not None and hasattr(process, 'cpu_affinity'):
+            try:
+                process.cpu_affinity([cpu])
+            except psutil.NoSuchProcess:
+                pass
+    with timer.stage('track'):
         try:
-            execute_and_track_process(task, test, process)
+            execute_and_track_process(task, test, process, stdout)
         except psutil.NoSuchProcess:
             pass
-    output, errors = [s.decode() for s in tested.result()]
-
-    test.message = errors
-    if test.status == models.Status.TS:
-        if process.returncode != 0:
-            test.status = models.Status.RE
-        elif invoke_checker(task, test.test, output):
-            test.status = models.Status.OK
-        else:
-            test.status = models.Status.WA
-    test.save()
-
+        return process.wait()
+
+
+def run_program(task, test, start_program, stdin, stdout, stderr, timer,
+                cpu, folder_path):
+    """
+    cpu - ядро, к которому привязывается решение, или None, folder_path -
+    рабочий каталог решения
+    """
+    if settings.JUDGE_EXECUTION_BACKEND == 'rlimit' and \
+            sandbox.is_supported():
+        return sandbox.run(task, test, start_program, stdin, stdout, stderr,
+                           timer, cpu, folder_path)
+    return track_process(task, test, start_program, stdin, stdout, stderr,
+                         timer, cpu, folder_path)
+
+
+def hide_workspace(message, folder_path):
+    """Убирает путь рабочего каталога из сообщения, которое видит ученик"""
+    for path in {folder_path, os.path.realpath(folder_path)}:
+        message = message.replace(path + os.sep, "")
+    return message
+
+
+def test_program(task, start_program, test, folder_path, checker, timer):
+    with open(test.test.input_path, 'rb') as stdin, \
+            workspaces.spool.files(task.output_limit * 1024) as files:
+        stdout, stderr = files
+        waiting = time.perf_counter()
+        with cores.scheduler.reserve() as cpu:
+            timer.record('core', time.perf_counter() - waiting)
+            with timer.stage('run'):
+                returncode = run_program(
+                    task, test, start_program, stdin, stdout, stderr, timer,
+                    cpu if cores.pinning_enabled() else None, folder_path
+                )
+        test.message = hide_workspace(sandbox.read_head(
+            stderr, MESSAGE_LIMIT
+        ).decode(errors='replace'), folder_path)
+        if test.status == models.Status.TS:
+            if returncode != 0:
+                test.status = models.Status.RE
+            else:
+                stdout.seek(0)
+                try:
+                    with timer.stage('check'):
+                        correct, message = checker(test.test, stdout)
+                except plugins.PluginError as e:
+                    test.status = models.Status.SE
+                    test.message = str(e)
+                else:
+                    if correct:
+                        test.status = models.Status.OK
+                    else:
+                        test.status = models.Status.WA
+                        test.message = "\n".join(
+                            part for part in (message, test.message) if part
+                        )
+
+
+def failure_rates(task):
+    """
+    Доля неверных результатов каждого теста задачи среди последних
+    JUDGE_FAILURE_STATS_ATTEMPTS попыток. Кэшируется на
+    JUDGE_FAILURE_STATS_TTL секунд
+    """
+    key = f"failure-rates:{task.id}"
+    rates = cache.get(key)
+    if rates is None:
+        attempts = list(models.Attempt.objects.filter(task=task).order_by(
+            '-id'
+        ).values_list('id', flat=True)[:settings.JUDGE_FAILURE_STATS_ATTEMPTS])
+        statistics = models.CheckedTest.objects.filter(
+            attempt_id__in=attempts,
+            status__in=[models.Status.OK, models.Status.WA, models.Status.TL,
+                        models.Status.ML, models.Status.RE, models.Status.IL],
+        ).values('test').annotate(
+            total=Count('id'),
+            failed=Count('id', filter=~Q(status=models.Status.OK))
+        ).order_by()
+        rates = {row['test']: row['failed'] / row['total']
+                 for row in statistics}
+        cache.set(key, rates, settings.JUDGE_FAILURE_STATS_TTL)
+    return rates
+
+
+def order_tests(task, tests, tracker):
+    """
+    Группы тестов проверяются в порядке зависимостей, тесты вне групп -
+    первыми, поэтому не пройденная группа пропускает тесты зависящих от
+    нее групп. При проверке до первой ошибки внутри группы сначала
+    запускаются примеры - первые samples_prefix тестов набора, затем
+    тесты, на которых решения чаще всего падали
+    """
+    if task.judging_policy != models.JudgingPolicy.FAIL_FAST:
+        return sorted(tests, key=lambda test: tracker.rank(test.test_id))
+    samples = set(task.testset.tests.order_by('id').values_list(
+        'id', flat=True
+    )[:task.samples_prefix]) if task.samples_prefix > 0 else set()
+    rates = failure_rates(task)
+    return sorted(tests, key=lambda test: (
+        tracker.rank(test.test_id), test.test_id not in samples,
+        -rates.get(test.test_id, 0)
+    ))
+
+
+def test_attempt(attempt, folder_path, language, timer, lease):
+    with results.ResultBuffer(attempt, timer, lease) as buffer:
+        with timer.stage('prepare'):
+            tests = buffer.prepare(
+                attempt.task.testset,
+                verdict_cache.judge_fingerprint(attempt.task,
+                                                attempt.language)
+            )
+        judge_tests(attempt, tests, buffer, folder_path, language, timer)
+    return attempt
 
-def compile_python(folder_path, code):
-    path = os.path.join(folder_path, "main.py")
-    with open(path, 'w') as f:
-        f.write(code)
-    return "main.py"
 
+def fail_tests(tests, buffer, status, message):
+    for test in tests:
+        test.status = status
+        test.message = message
+    buffer.update(*tests)
 
-def get_python_command(_, program_path):
-    return 'python3', program_path
 
+def judge_tests(attempt, tests, buffer, folder_path, language, timer):
+    """Проверяет тесты со статусом TS, остальные результаты уже известны"""
+    pending = [test for test in tests if test.status == models.Status.TS]
+    if language is None:
+        fail_tests(pending, buffer, models.Status.SE,
+                   f"Язык {attempt.language} не поддерживается")
+        return
+    test_groups = groups.load_groups(attempt.task.testset)
+    try:
+        checker = plugins.get_checker(attempt.task.checker_name)
+        buffer.set_post_processor(plugins.get_post_processor(
+            attempt.task.post_processor_name
+        ), test_groups)
+    except plugins.PluginError as e:
+        fail_tests(pending, buffer, models.Status.SE, str(e))
+        return
+
+    fail_fast = attempt.task.judging_policy == models.JudgingPolicy.FAIL_FAST
+    failed = threading.Event()
+    if fail_fast and any(test.status != models.Status.OK for test in tests
+                         if test.status != models.Status.TS):
+        failed.set()
+    tracker = groups.GroupTracker(test_groups)
+    for test in tests:
+        if test.status not in (models.Status.TS, models.Status.OK):
+            tracker.fail(test.test_id)
+    if not pending or failed.is_set():
+        fail_tests(pending, buffer, models.Status.SK, "")
+        return
 
-class CompilationError(Exception):
-    def __init__(self, msg):
-        self.msg = msg
+    try:
+        with timer.stage('compile'):
+            program = language.compile(folder_path, attempt.solution)
+    except languages.CompilationError as e:
+        fail_tests(pending, buffer, models.Status.CE, e.msg)
+        return
+
+    task = language.apply_limits(attempt.task)
+    ordered = order_tests(attempt.task, pending, tracker)
+
+    def test_program_on(test):
+        # The remaining tests are dropped once another judge took over
+        buffer.check_lease()
+        if failed.is_set() or tracker.should_skip(test.test_id):
+            test.status = models.Status.SK
+            buffer.update(test)
+            return
+        try:
+            test_program(task, command, test, folder_path, checker, timer)
+        except Exception as exc:
+            traceback.print_exc()
+            test.status = models.Status.SE
+            raise exc
+        finally:
+            buffer.update(test)
+            if test.status != models.Status.OK:
+                tracker.fail(test.test_id)
+                if fail_fast:
+                    failed.set()
+
+    with futures.ThreadPoolExecutor(
+            max_workers=settings.JUDGE_TESTS_PER_ATTEMPT
+    ) as executor:
+        command = language.command(folder_path, program)
+        executor.map(test_program_on, ordered)
+
+
+def submit_attempt(attempt, lease=None):
+    """lease - leases.Heartbeat проверяющего, который арендовал попытку"""
+    timer = instrumentation.StageTimer(str(attempt.language))
+    try:
+        with timer.stage('attempt'):
+            judge_submission(attempt, timer, lease)
+    finally:
+        attempt.stage_timings = timer.breakdown()
+        models.Attempt.objects.filter(id=attempt.id).update(
+            stage_timings=attempt.stage_timings
+        )
+    metrics.verdicts.inc((timer.language, attempt.verdict))
+    return attempt
 
 
-def compile_cpp(folder_path, code):
-    source_path = os.path.join(folder_path, "main.cpp")
-    with open(source_path, 'w') as f:
-        f.write(code)
-    compilation = psutil.Popen(["g++", source_path,
-                                "-o", os.path.join(folder_path, "main")],
-                               stderr=subprocess.PIPE)
-    error = compilation.communicate()[1]
-    if compilation.returncode != 0:
-        raise CompilationError(error.decode())
-    return "main"
+def judge_submission(attempt, timer, lease):
+    if attempt.task.testset is None:
+        attempt.checked_tests.all().delete()
+        attempt.fail([], NO_TESTS_MESSAGE)
+        attempt.save_summary()
+        return attempt
 
+    language = languages.get_language(attempt.language)
+    with timer.stage('verdict_cache'):
+        key = verdict_cache.get_key(attempt)
+        restored = verdict_cache.restore(attempt, key)
+    if restored:
+        return attempt
 
-def get_cpp_command(_, program_path):
-    return program_path
+    with timer.stage('workspace'):
+        folder_path = workspaces.pool.acquire()
+    try:
+        test_attempt(attempt, folder_path, language, timer, lease)
+    finally:
+        workspaces.pool.release(folder_path)
 
+    with timer.stage('verdict_cache'):
+        verdict_cache.store(attempt, key)
+    return attempt
 
-def test_attempt(attempt, folder_path, compiler, commander):
-    tests = [models.CheckedTest.objects.create(
-        test=test, status=models.Status.TS, memory_used=0, time_used=0
-    ) for test in attempt.task.testset.tests.all()]
-    attempt.checked_tests.add(*tests)
-    attempt.save()
 
-    try:
-        program_path = os.path.join(folder_path,
-                                    compiler(folder_path, attempt.solution))
-    except CompilationError as e:
-        for test in tests:
-            test.status = models.Status.CE
-            test.message = e.msg
-            test.save()
+def judge_claimed_attempt(attempt, owner):
+    if attempt.judge_runs > settings.JUDGE_MAX_RUNS:
+        leases.give_up(attempt, owner)
     else:
-        def test_program_on(test):
+        with leases.Heartbeat(attempt, owner) as heartbeat:
             try:
-                test_program(attempt.task, command, test)
-            except Exception as exc:
-                traceback.print_exc()
-                test.status = models.Status.SE
-                test.save()
-                raise exc
-
-        with futures.ThreadPoolExecutor() as executor:
-            command = commander(folder_path, program_path)
-            executor.map(test_program_on, tests)
-    attempt.score = invoke_post_processor(attempt, tests)
-    attempt.save()
+                submit_attempt(attempt, heartbeat)
+            except leases.LeaseLost:
+                return attempt
+            except Exception:
+                leases.requeue(attempt, owner)
+                raise
+        if heartbeat.lost:
+            # Another judge has claimed the attempt and will finish it
+            return attempt
+        leases.release(attempt, owner)
+    try:
+        standings.update(attempt.author_id, attempt.task_id)
+    except db.DatabaseError:
+        # The attempt is judged already, the standing is recomputed after
+        # the next attempt of the pupil on the task
+        traceback.print_exc()
     return attempt
 
 
-def submit_attempt(attempt):
-    compiler, commander = {
-        str(models.Language.PYTHON): (compile_python, get_python_command),
-        str(models.Language.CPP): (compile_cpp, get_cpp_command),
-    }.get(str(attempt.language))
+def judge_attempt(attempt):
+    owner = leases.default_owner()
+    claimed = leases.claim(owner, attempt.id)
+    if claimed is not None:
+        judge_claimed_attempt(claimed, owner)
 
-    folder_path = os.path.join(settings.BASE_DIR, "testingSystem",
-                               "testSolution", "attempts",
-                               f"attempt_{attempt.id}")
 
-    try:
-        os.makedirs(folder_path, exist_ok=True)
-        test_attempt(attempt, folder_path, compiler, commander)
-    finally:
-        shutil.rmtree(folder_path, ignore_errors=True)
+judge_queue = JudgeQueue(settings.JUDGE_WORKERS, judge_attempt,
+                         key=lambda attempt: attempt.id)
 
-    return attempt
 
+def submit_attempt_async(attempt, priority=Priority.LIVE):
+    if settings.JUDGE_MODE != 'daemon':
+        judge_queue.put(attempt, priority)
 
-def submit_attempt_async(attempt):
-    threading.Thread(target=submit_attempt, args=[attempt]).start()
+
+def reap_attempts():
+    """
+    Ставит в очередь попытки, которые ждут проверки, но не попали в нее,
+    например, из-за перезапуска, и попытки упавших проверяющих
+    """
+    for attempt in leases.stale_attempts().iterator():
+        judge_queue.put(attempt, attempt.judge_priority)
+
+
+def reap_periodically():
+    try:
+        leases.recover()
+    except Exception:
+        traceback.print_exc()
+    while True:
+        try:
+            reap_attempts()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            db.close_old_connections()
+        time.sleep(settings.JUDGE_REAP_PERIOD)
+
+
+def start_reaper():
+    """
+    Восстанавливает проверку после перезапуска процесса, который
+    проверяет попытки в потоках, и затем раз в JUDGE_REAP_PERIOD секунд
+    подбирает попытки, оставшиеся без проверяющего
+    """
+    if settings.JUDGE_MODE != 'daemon':
+        threading.Thread(target=reap_periodically, daemon=True,
+                         name="judge-reaper").start()
@@ -0,0 +1,133 @@
+import hashlib
+
+from django.db import IntegrityError
+
+from SchoolTestingSystem import settings
+from testingSystem import models
+from . import groups, languages, plugins, sandbox
+
+# Verdicts that do not depend on the judge load
+REPRODUCIBLE_STATUSES = {models.Status.OK, models.Status.CE,
+                         models.Status.WA, models.Status.ML,
+                         models.Status.RE, models.Status.SK}
+
+
+def reproducible_statuses():
+    """
+    Вердикты, которые не зависят от загрузки проверяющего. OL добавляется,
+    когда размер вывода ограничивает ядро, а не опрос процесса
+    """
+    if settings.JUDGE_EXECUTION_BACKEND == 'rlimit' and \
+            sandbox.is_supported():
+        return REPRODUCIBLE_STATUSES | {models.Status.OL}
+    return REPRODUCIBLE_STATUSES
+
+
+def testset_fingerprint(testset):
+    digest = hashlib.sha256()
+    for test in testset.tests.order_by('id'):
+        for part in (str(test.id), test.input_hash, test.output_hash):
+            digest.update(part.encode())
+            digest.update(b"\0")
+    for group in groups.load_groups(testset):
+        for part in (group.name, group.points, sorted(group.tests),
+                     group.dependencies):
+            digest.update(str(part).encode())
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def judge_fingerprint(task, language_name):
+    """
+    Хэш настроек, от которых зависит результат отдельного теста:
+    ограничений и чекера задачи и настроек языка решения
+    """
+    language = languages.get_language(language_name)
+    if language is not None:
+        task = language.apply_limits(task)
+    digest = hashlib.sha256()
+    for part in (task.time_limit, task.memory_limit, task.output_limit,
+                 language_name,
+                 language.fingerprint if language is not None else "",
+                 task.checker_name,
+                 plugins.fingerprint("checkers", task.checker_name)):
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_key(attempt):
+    """
+    Ключ результата проверки: хэш решения, языка и его настроек,
+    содержимого тестов, ограничений, чекера и постпроцессора задачи.
+    Изменение любого из них дает новый ключ, поэтому устаревшие
+    результаты не используются
+    """
+    task = attempt.task
+    language = languages.get_language(attempt.language)
+    digest = hashlib.sha256()
+    for part in (attempt.solution, attempt.language,
+                 language.fingerprint if language is not None else "",
+                 testset_fingerprint(task.testset),
+                 judge_fingerprint(task, attempt.language),
+                 task.samples_prefix, task.judging_policy,
+                 task.post_processor_name,
+                 plugins.fingerprint("postProcessors",
+                                     task.post_processor_name)):
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def restore(attempt, key):
+    """Создает результаты тестов из кэша. Возвращает False при промахе"""
+    if not settings.JUDGE_VERDICT_CACHE:
+        return False
+    verdict = models.CachedVerdict.objects.filter(key=key).first()
+    if verdict is None:
+        return False
+
+    testset = attempt.task.testset
+    attempt.testset_version = testset.version
+    test_hashes = {test.id: test.content_hash
+                   for test in testset.tests.all()}
+    fingerprint = judge_fingerprint(attempt.task, attempt.language)
+    attempt.checked_tests.all().delete()
+    models.CheckedTest.objects.bulk_create([models.CheckedTest(
+        attempt=attempt,
+        test_id=result['test'],
+        test_hash=test_hashes.get(result['test'], ""),
+        judge_fingerprint=fingerprint,
+        status=result['status'],
+        memory_used=result['memory_used'],
+        time_used=result['time_used'],
+        message=result['message'],
+    ) for result in verdict.results])
+    attempt.update_summary(list(attempt.checked_tests.order_by('id')))
+    attempt.score = verdict.score
+    attempt.save_summary()
+    models.Attempt.objects.filter(id=attempt.id).update(
+        testset_version=attempt.testset_version
+    )
+    return True
+
+
+def store(attempt, key):
+    if not settings.JUDGE_VERDICT_CACHE:
+        return
+    tests = list(attempt.checked_tests.order_by('id'))
+    reproducible = reproducible_statuses()
+    if any(test.status not in reproducible for test in tests):
+        return
+    results = [{
+        'test': test.test_id,
+        'status': test.status,
+        'memory_used': test.memory_used,
+        'time_used': test.time_used,
+        'message': test.message,
+    } for test in tests]
+    try:
+        models.CachedVerdict.objects.create(key=key, score=attempt.score,
+                                            results=results)
+    except IntegrityError:  # stored by a concurrent attempt
+        pass
@@ -0,0 +1,182 @@
+"""
+Рабочие каталоги попыток.
+
+Решения компилируются и запускаются в каталогах из пула в
+JUDGE_WORKSPACE_ROOT, по умолчанию в оперативной памяти (/dev/shm).
+Освобожденные каталоги очищаются фоновым потоком и выдаются снова, а
+новый каталог выдается, только пока пул занимает меньше
+JUDGE_WORKSPACE_SIZE байт или других занятых каталогов нет. Вывод
+решений, размер которого ограничен только задачей, пишется во временные
+файлы в отдельном каталоге JUDGE_SPOOL_DIR, тоже в оперативной памяти
+(см. Spool), и в этот размер не входит.
+"""
+import collections
+import contextlib
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+
+import psutil
+
+from SchoolTestingSystem import settings
+
+
+def directory_size(path):
+    size = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(folder, name)).st_size
+            except FileNotFoundError:
+                pass
+    return size
+
+
+def clear_directory(path):
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+class Spool:
+    """
+    Временные файлы с выводом решений в каталоге directory. Каждый запуск
+    заранее занимает место под stdout и stderr размером до предела вывода
+    задачи. Пока занято больше size_limit байт, новые запуски ждут, если
+    есть другие
+    """
+
+    def __init__(self, directory, size_limit):
+        self.directory = directory
+        self.size_limit = size_limit
+        self._condition = threading.Condition()
+        self._reserved = 0
+        self._users = 0
+
+    @contextlib.contextmanager
+    def files(self, output_limit):
+        """Выдает файлы stdout и stderr для вывода до output_limit байт"""
+        size = 2 * output_limit
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self._users or
+                self._reserved + size <= self.size_limit
+            )
+            self._reserved += size
+            self._users += 1
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.TemporaryFile(dir=self.directory) as stdout, \
+                    tempfile.TemporaryFile(dir=self.directory) as stderr:
+                yield stdout, stderr
+        finally:
+            with self._condition:
+                self._reserved -= size
+                self._users -= 1
+                self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {'reserved': self._reserved, 'users': self._users}
+
+
+class WorkspacePool:
+    def __init__(self, root, size_limit, spare):
+        self.root = root
+        self.size_limit = size_limit
+        # Clean directories kept for reuse
+        self.spare = spare
+        self._names = itertools.count()
+        self._condition = threading.Condition()
+        self._in_use = set()
+        self._clean = []
+        self._dirty = collections.deque()
+        self._cleaner = None
+        self._prepared = False
+
+    def acquire(self):
+        """Выдает пустой каталог, ждет, если пул занимает слишком много"""
+        with self._condition:
+            self._prepare()
+            self._condition.wait_for(
+                lambda: not self._in_use or self.usage() < self.size_limit
+            )
+            if self._clean:
+                path = self._clean.pop()
+            else:
+                path = os.path.join(self.root,
+                                    f"{os.getpid()}-{next(self._names)}")
+                os.makedirs(path)
+            self._in_use.add(path)
+            return path
+
+    def release(self, path):
+        with self._condition:
+            self._in_use.discard(path)
+            self._dirty.append(path)
+            self._start_cleaner()
+            self._condition.notify_all()
+
+    def usage(self):
+        with self._condition:
+            paths = list(self._in_use) + list(self._dirty)
+        return sum(directory_size(path) for path in paths)
+
+    def stats(self):
+        with self._condition:
+            return {'in_use': len(self._in_use), 'clean': len(self._clean),
+                    'dirty': len(self._dirty)}
+
+    def _prepare(self):
+        """Удаляет каталоги, оставшиеся от завершившихся процессов"""
+        if self._prepared:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        for name in os.listdir(self.root):
+            owner, _, number = name.partition("-")
+            # Other entries, such as core locks, belong to other modules
+            if owner.isdigit() and number.isdigit() and \
+                    int(owner) != os.getpid() and \
+                    not psutil.pid_exists(int(owner)):
+                shutil.rmtree(os.path.join(self.root, name),
+                              ignore_errors=True)
+        self._prepared = True
+
+    def _start_cleaner(self):
+        if self._cleaner is None or not self._cleaner.is_alive():
+            self._cleaner = threading.Thread(target=self._clean_released,
+                                             daemon=True,
+                                             name="workspace-cleaner")
+            self._cleaner.start()
+
+    def _clean_released(self):
+        while True:
+            with self._condition:
+                if not self._dirty:
+                    self._cleaner = None
+                    return
+                path = self._dirty[0]
+                keep = len(self._clean) < self.spare
+            if keep:
+                clear_directory(path)
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+            with self._condition:
+                self._dirty.popleft()
+                if keep:
+                    self._clean.append(path)
+                self._condition.notify_all()
+
+
+pool = WorkspacePool(settings.JUDGE_WORKSPACE_ROOT,
+                     settings.JUDGE_WORKSPACE_SIZE,
+                     spare=settings.JUDGE_WORKERS)
+spool = Spool(settings.JUDGE_SPOOL_DIR, settings.JUDGE_SPOOL_SIZE)
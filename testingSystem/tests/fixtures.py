@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from SchoolTestingSystem import settings
+from .. import models
+
+
+class TestDataMixin:
+    """Хранит данные тестов во временном каталоге вместо TEST_DATA_DIR"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        data_dir, settings.TEST_DATA_DIR = settings.TEST_DATA_DIR, directory
+        self.addCleanup(setattr, settings, 'TEST_DATA_DIR', data_dir)
+        super().setUp()
+
+
+class MigrationTestCase(TransactionTestCase):
+    """
+    Проверяет миграцию данных: база приводится к состоянию migrate_from,
+    setUpData заполняет ее через модели этого состояния, затем
+    выполняется миграция migrate_to
+    """
+    app = 'testingSystem'
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(self.migrate, None)
+        self.apps = self.migrate(self.migrate_from)
+        self.setUpData(self.apps)
+        self.apps = self.migrate(self.migrate_to)
+
+    def setUpData(self, apps):
+        pass
+
+    def migrate(self, name):
+        """Переводит базу к миграции name, None - к последней"""
+        executor = MigrationExecutor(connection)
+        if name is None:
+            targets = executor.loader.graph.leaf_nodes(self.app)
+        else:
+            targets = [(self.app, name)]
+        executor.migrate(targets)
+        executor.loader.build_graph()
+        return executor.loader.project_state(targets).apps
+
+
+def create_historical_attempt(apps, **fields):
+    """Попытка с автором и задачей через модели состояния миграций apps"""
+    User = apps.get_model('auth', 'User')
+    MyUser = apps.get_model('testingSystem', 'MyUser')
+    Task = apps.get_model('testingSystem', 'Task')
+    Attempt = apps.get_model('testingSystem', 'Attempt')
+    user = User.objects.get_or_create(username="pupil")[0]
+    author = MyUser.objects.get_or_create(user=user, defaults={
+        'middle_name': "", 'school': "", 'rating': 0, 'role': 'PU'
+    })[0]
+    task = Task.objects.create(name="Задача", legend="", statement="",
+                               samples_prefix=0, time_limit=1000,
+                               memory_limit=64 * 1024)
+    return Attempt.objects.create(author=author, task=task, solution="",
+                                  language='Python', **fields)
+
+
+def create_pupil(username="pupil", school_class=None,
+                 role=models.Role.PUPIL):
+    user = User.objects.create_user(username, password="password",
+                                    first_name="Имя", last_name=username)
+    return models.MyUser.objects.create(user=user, middle_name="Отчество",
+                                        school="Школа", rating=0,
+                                        school_class=school_class, role=role)
+
+
+def create_testset(*data):
+    """data - пары входа и выхода тестов"""
+    testset = models.Testset.objects.create()
+    for test_input, test_output in data:
+        test = models.Test()
+        test.input = test_input
+        test.output = test_output
+        test.save()
+        testset.tests.add(test)
+    testset.refresh_from_db()
+    return testset
+
+
+def create_task(testset=None, name="Задача", **fields):
+    fields = {'legend': "", 'statement': "", 'samples_prefix': 0,
+              'time_limit': 1000, 'memory_limit': 64 * 1024, **fields}
+    return models.Task.objects.create(name=name, testset=testset, **fields)
+
+
+def create_attempt(author, task, solution="print(1)", language='Python',
+                   **fields):
+    return models.Attempt.objects.create(author=author, task=task,
+                                         solution=solution,
+                                         language=language, **fields)
+
+
+def create_checked_tests(attempt, *statuses):
+    """Результаты тестов набора задачи попытки с заданными статусами"""
+    return [models.CheckedTest.objects.create(
+        attempt=attempt, test=test, test_hash=test.content_hash,
+        status=status, memory_used=0, time_used=0
+    ) for test, status in zip(attempt.task.testset.tests.order_by('id'),
+                              statuses)]
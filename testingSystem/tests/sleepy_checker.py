@@ -0,0 +1,12 @@
+"""Чекер для тестов пула чекеров, вывод решения - время проверки"""
+import signal
+import time
+
+
+def check(test, output, strip_answer):
+    if output == "hang":
+        # Neither the timer of the worker nor the CPU limit interrupt it
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+        time.sleep(60)
+    time.sleep(float(output))
+    return True
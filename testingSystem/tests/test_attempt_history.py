@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import models, views
+from .fixtures import create_attempt, create_pupil, create_task
+
+
+class AttemptHistoryTest(TestCase):
+    def setUp(self):
+        self.pupil = create_pupil()
+        self.task = create_task()
+        now = timezone.now()
+        attempts = []
+        for number in range(views.ATTEMPTS_PAGE_SIZE + 5):
+            attempt = create_attempt(self.pupil, self.task)
+            # Pairs of attempts share the creation time
+            creation_time = now + timedelta(seconds=number // 2)
+            models.Attempt.objects.filter(id=attempt.id).update(
+                creation_time=creation_time
+            )
+            attempts.append((creation_time, attempt.id))
+        self.newest_first = [attempt_id for _, attempt_id in
+                             sorted(attempts, reverse=True)]
+        create_attempt(create_pupil("other"), self.task)
+
+    def page_ids(self, before=None):
+        attempts, next_before = views.attempts_page(
+            self.task, self.pupil.user_id, before
+        )
+        return [attempt.id for attempt in attempts], next_before
+
+    def test_pages_cover_history_once(self):
+        first, before = self.page_ids()
+        self.assertEqual(first,
+                         self.newest_first[:views.ATTEMPTS_PAGE_SIZE])
+        self.assertEqual(before, first[-1])
+        second, before = self.page_ids(before)
+        self.assertEqual(second,
+                         self.newest_first[views.ATTEMPTS_PAGE_SIZE:])
+        self.assertIsNone(before)
+
+    def test_attempt_list_view(self):
+        self.client.force_login(self.pupil.user)
+        url = reverse('task_attempts', args=[self.task.id])
+        before = self.newest_first[views.ATTEMPTS_PAGE_SIZE - 1]
+        response = self.client.get(url, {'before': before})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([attempt.id for attempt in
+                          response.context['attempts']],
+                         self.newest_first[views.ATTEMPTS_PAGE_SIZE:])
+        self.assertIsNone(response.context['next_before'])
+
+        first_page = self.client.get(url, {'before': "not a number"})
+        self.assertEqual(first_page.context['next_before'], before)
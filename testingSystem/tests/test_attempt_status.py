@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+
+from SchoolTestingSystem import settings
+from .. import models, views
+from .fixtures import TestDataMixin, create_attempt, create_checked_tests, \
+    create_pupil, create_task, create_testset
+
+
+class AttemptStatusViewTest(TestDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(settings, 'JUDGE_STATUS_POLL_PERIOD',
+                                    0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.attempt = create_attempt(
+            create_pupil(), create_task(create_testset(("1", "1"),
+                                                       ("2", "2"))),
+            judge_state=models.JudgeState.JUDGING
+        )
+        self.checked_tests = create_checked_tests(
+            self.attempt, models.Status.OK, models.Status.TS
+        )
+        self.url = reverse('attempt_status', args=[self.attempt.id])
+
+    def progress(self, **attempt_fields):
+        models.Attempt.objects.filter(id=self.attempt.id).update(
+            progress_version=F('progress_version') + 1,
+            **attempt_fields
+        )
+
+    def test_progress_with_etag(self):
+        self.progress(verdict=models.Status.TS, tests_done=1, tests_total=2)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{self.attempt.id}-1"')
+        progress = response.json()
+        self.assertFalse(progress['judged'])
+        self.assertEqual(progress['tests_done'], 1)
+        self.assertEqual([test['status'] for test in progress['tests']],
+                         [models.Status.OK, models.Status.TS])
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, {'wait': 0.1},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.progress(tests_done=2)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['tests_done'], 2)
+
+    def test_long_poll_returns_on_progress(self):
+        etag = self.client.get(self.url)['ETag']
+        sleep = views.time.sleep
+
+        def judge_meanwhile(seconds):
+            self.progress(judge_state=models.JudgeState.DONE,
+                          verdict=models.Status.OK)
+            sleep(seconds)
+
+        with mock.patch.object(views.time, 'sleep',
+                               side_effect=judge_meanwhile) as slept:
+            response = self.client.get(self.url, {'wait': 5},
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(slept.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['judged'])
+
+    def test_missing_attempt(self):
+        response = self.client.get(reverse('attempt_status', args=[0]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,81 @@
+import io
+
+from django.test import SimpleTestCase
+
+from ..testSolution import comparators, plugins
+
+
+def lines(text):
+    return comparators.read_lines(io.BytesIO(text.encode()))
+
+
+class ComparatorsTest(SimpleTestCase):
+    def test_lines_ignore_surrounding_whitespace(self):
+        self.assertEqual(
+            comparators.compare_lines(lines("1 2\n3\n"),
+                                      lines("  1 2 \r\n3\n\n\n")),
+            (True, "")
+        )
+
+    def test_lines_report_first_mismatch(self):
+        correct, message = comparators.compare_lines(lines("1\n2\n3\n"),
+                                                     lines("1\n4\n"))
+        self.assertFalse(correct)
+        self.assertIn("Строка 2", message)
+
+    def test_lines_missing_output(self):
+        correct, message = comparators.compare_lines(lines("1\n2\n"),
+                                                     lines("1\n"))
+        self.assertFalse(correct)
+        self.assertIn("конец вывода", message)
+
+    def test_exact_keeps_spaces(self):
+        self.assertTrue(comparators.compare_exact_lines(
+            lines("a b\n"), lines("a b\r\n")
+        )[0])
+        self.assertFalse(comparators.compare_exact_lines(
+            lines("a b\n"), lines("a  b\n")
+        )[0])
+
+    def test_tokens_ignore_layout(self):
+        self.assertTrue(comparators.compare_tokens(
+            lines("1 2\n3\n"), lines("1\n2 3")
+        )[0])
+        self.assertFalse(comparators.compare_tokens(
+            lines("1 2\n"), lines("1 2 3\n")
+        )[0])
+
+    def test_floats_epsilon(self):
+        self.assertTrue(comparators.compare_floats(
+            lines("1.0 x\n"), lines("1.0000001 x\n")
+        )[0])
+        self.assertFalse(comparators.compare_floats(
+            lines("1.0\n"), lines("1.01\n")
+        )[0])
+        self.assertTrue(comparators.compare_floats(
+            lines("1.0\n"), lines("1.01\n"), 0.1
+        )[0])
+        self.assertFalse(comparators.compare_floats(
+            lines("1.0\n"), lines("abc\n")
+        )[0])
+        self.assertTrue(comparators.compare_floats(
+            lines("nan\n"), lines("NaN\n")
+        )[0])
+
+    def test_unordered(self):
+        self.assertTrue(comparators.compare_unordered(
+            lines("a\nb\n"), lines("b\na\n")
+        )[0])
+        correct, message = comparators.compare_unordered(lines("a\nb\n"),
+                                                         lines("a\na\n"))
+        self.assertFalse(correct)
+        self.assertIn("Лишняя строка «a»", message)
+
+    def test_arguments_are_validated(self):
+        self.assertIsNotNone(comparators.get_comparator("floats:1e-3"))
+        self.assertIsNotNone(comparators.get_comparator(None))
+        self.assertIsNone(comparators.get_comparator("unknown"))
+        for name in ("floats:abc", "floats:-1", "floats:inf", "lines:1"):
+            with self.subTest(name=name):
+                with self.assertRaises(plugins.PluginError):
+                    plugins.get_checker(name)
@@ -0,0 +1,45 @@
+import shutil
+import subprocess
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..testSolution import compile_cache, languages
+
+
+class CompileCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, True)
+        cache = compile_cache.CompileCache(tempfile.mkdtemp(), 1024 * 1024)
+        self.addCleanup(shutil.rmtree, cache.root, True)
+        for patcher in (mock.patch.object(compile_cache, 'cache', cache),
+                        mock.patch.object(compile_cache, 'compiler_version',
+                                          return_value="g++ 10")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.language = languages.Language(
+            'C++', 'main.cpp', ('{binary}',),
+            compile=('g++', '{source}', '-o', '{binary}')
+        )
+
+    def compile(self, returncode, stderr=b""):
+        result = subprocess.CompletedProcess((), returncode, stderr=stderr)
+        with mock.patch.object(subprocess, 'run', return_value=result):
+            self.language.compile(self.folder, "int main() {}")
+
+    def test_diagnostics_are_cached(self):
+        with self.assertRaises(languages.CompilationError):
+            self.compile(1, b"error: expected ';'")
+        with mock.patch.object(subprocess, 'run') as run:
+            with self.assertRaises(languages.CompilationError) as raised:
+                self.language.compile(self.folder, "int main() {}")
+        run.assert_not_called()
+        self.assertEqual(raised.exception.msg, "error: expected ';'")
+
+    def test_killed_compiler_is_not_cached(self):
+        with self.assertRaises(languages.CompilerKilled):
+            self.compile(-9)
+        with self.assertRaises(languages.CompilationError):
+            self.compile(1, b"error")
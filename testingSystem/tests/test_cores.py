@@ -0,0 +1,72 @@
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from SchoolTestingSystem import settings
+from ..testSolution import cores
+
+
+class CpusTest(SimpleTestCase):
+    def test_parse_cpus(self):
+        self.assertEqual(cores.parse_cpus("0-3, 6,2,"), [0, 1, 2, 3, 6])
+
+    def test_judge_cpus(self):
+        with mock.patch.object(cores, 'available_cpus',
+                               return_value=[0, 1, 2, 3]), \
+                mock.patch.object(settings, 'JUDGE_CPUS', None), \
+                mock.patch.object(settings, 'JUDGE_RESERVED_CPUS', None):
+            self.assertEqual(cores.judge_cpus(), [1, 2, 3])
+            with mock.patch.object(settings, 'JUDGE_RESERVED_CPUS', 2):
+                self.assertEqual(cores.judge_cpus(), [2, 3])
+            with mock.patch.object(settings, 'JUDGE_RESERVED_CPUS', 4):
+                self.assertRaises(ImproperlyConfigured, cores.judge_cpus)
+            with mock.patch.object(settings, 'JUDGE_CPUS', "2-3"):
+                self.assertEqual(cores.judge_cpus(), [2, 3])
+            with mock.patch.object(settings, 'JUDGE_CPUS', "3-5"):
+                self.assertRaises(ImproperlyConfigured, cores.judge_cpus)
+
+
+class CoreSchedulerTest(SimpleTestCase):
+    def setUp(self):
+        locks = tempfile.TemporaryDirectory()
+        self.addCleanup(locks.cleanup)
+        self.locks_dir = locks.name
+
+    def scheduler(self, cpus):
+        return cores.CoreScheduler(cpus, self.locks_dir)
+
+    def test_recently_freed_core_first(self):
+        scheduler = self.scheduler([0, 1, 2])
+        with scheduler.reserve() as first:
+            with scheduler.reserve() as second:
+                self.assertEqual((first, second), (0, 1))
+                self.assertEqual(scheduler.stats(), {'cpus': 3, 'busy': 2})
+        with scheduler.reserve() as cpu:
+            self.assertEqual(cpu, 0)
+        self.assertEqual(scheduler.stats(), {'cpus': 3, 'busy': 0})
+
+    def test_cores_are_shared_through_locks(self):
+        # Every scheduler opens its own lock files, like another process
+        first, second = self.scheduler([0, 1]), self.scheduler([0, 1])
+        with first.reserve() as cpu:
+            self.assertEqual(cpu, 0)
+            with second.reserve() as other:
+                self.assertEqual(other, 1)
+
+    def test_waits_for_cores_of_other_processes(self):
+        first, second = self.scheduler([0]), self.scheduler([0])
+        reserved = threading.Event()
+
+        def reserve():
+            with second.reserve():
+                reserved.set()
+
+        with first.reserve():
+            waiting = threading.Thread(target=reserve)
+            waiting.start()
+            self.assertFalse(reserved.wait(3 * cores.LOCK_POLL_PERIOD))
+        waiting.join(5)
+        self.assertTrue(reserved.is_set())
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from SchoolTestingSystem import settings
+from .. import models
+from ..testSolution import groups, instrumentation, testing
+from .fixtures import TestDataMixin, create_attempt, create_checked_tests, \
+    create_pupil, create_task, create_testset
+
+# Fails only on the fifth test
+SOLUTION = "n = int(input())\nprint(0 if n == 5 else n)\n"
+
+
+class FailFastTest(TestDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for patcher in (
+                mock.patch.object(settings, 'JUDGE_FLUSH_INTERVAL', 3600),
+                mock.patch.object(settings, 'JUDGE_VERDICT_CACHE', False),
+                mock.patch.object(settings, 'JUDGE_TESTS_PER_ATTEMPT', 1),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Failure rates are cached by the id of the task
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.pupil = create_pupil()
+        self.task = create_task(
+            create_testset(*((str(n), str(n)) for n in range(1, 6))),
+            judging_policy=models.JudgingPolicy.FAIL_FAST, samples_prefix=2
+        )
+        self.tests = list(self.task.testset.tests.order_by('id')
+                          .values_list('id', flat=True))
+        # Solutions failed the fifth test twice and the third one once
+        for statuses in ((models.Status.OK,) * 4 + (models.Status.WA,),
+                         (models.Status.OK, models.Status.OK,
+                          models.Status.TL, models.Status.OK,
+                          models.Status.RE)):
+            create_checked_tests(create_attempt(self.pupil, self.task),
+                                 *statuses)
+
+    def test_failure_rates(self):
+        rates = testing.failure_rates(self.task)
+        self.assertEqual(rates, {self.tests[0]: 0, self.tests[1]: 0,
+                                 self.tests[2]: 0.5, self.tests[3]: 0,
+                                 self.tests[4]: 1})
+        create_checked_tests(create_attempt(self.pupil, self.task),
+                             *(models.Status.WA,) * 5)
+        # The rates are cached
+        self.assertEqual(testing.failure_rates(self.task), rates)
+
+    def test_samples_then_frequent_failures(self):
+        checked_tests = create_checked_tests(
+            create_attempt(self.pupil, self.task), *(models.Status.TS,) * 5
+        )
+        ordered = testing.order_tests(self.task, checked_tests,
+                                      groups.GroupTracker([]))
+        self.assertEqual([test.test_id for test in ordered],
+                         [self.tests[n] for n in (0, 1, 4, 2, 3)])
+
+        self.task.judging_policy = models.JudgingPolicy.FULL
+        ordered = testing.order_tests(self.task, checked_tests,
+                                      groups.GroupTracker([]))
+        self.assertEqual([test.test_id for test in ordered], self.tests)
+
+    def test_tests_after_the_failure_are_skipped(self):
+        run = []
+
+        def test_program(task, start_program, test, *args):
+            run.append(test.test_id)
+            return original(task, start_program, test, *args)
+
+        original = testing.test_program
+        attempt = create_attempt(self.pupil, self.task, solution=SOLUTION)
+        with mock.patch.object(testing, 'test_program', test_program):
+            testing.judge_submission(attempt, instrumentation.StageTimer(
+                attempt.language
+            ), None)
+
+        self.assertEqual(run, [self.tests[n] for n in (0, 1, 4)])
+        self.assertEqual(
+            list(attempt.checked_tests.order_by('test_id').values_list(
+                'status', flat=True
+            )),
+            [models.Status.OK, models.Status.OK, models.Status.SK,
+             models.Status.SK, models.Status.WA]
+        )
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.verdict, models.Status.WA)
+        self.assertEqual(attempt.failed_test, 5)
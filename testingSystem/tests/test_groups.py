@@ -0,0 +1,40 @@
+from django.test import SimpleTestCase
+
+from ..testSolution.groups import Group, GroupTracker
+
+
+class GroupTrackerTest(SimpleTestCase):
+    def setUp(self):
+        self.tracker = GroupTracker([
+            Group("A", 30, frozenset({1, 2}), ()),
+            Group("B", 70, frozenset({3, 4}), ("A",)),
+            Group("C", 0, frozenset({2, 5}), ()),
+        ])
+
+    def test_failed_group_skips_dependents(self):
+        self.tracker.fail(1)
+        self.assertTrue(self.tracker.is_failed("A"))
+        self.assertTrue(self.tracker.is_failed("B"))
+        self.assertFalse(self.tracker.is_failed("C"))
+        self.assertTrue(self.tracker.should_skip(3))
+        # Test 2 is still needed by group C
+        self.assertFalse(self.tracker.should_skip(2))
+
+    def test_ungrouped_tests_are_never_skipped(self):
+        for test_id in (1, 2, 3, 4, 5):
+            self.tracker.fail(test_id)
+        self.assertFalse(self.tracker.should_skip(6))
+        self.assertEqual(self.tracker.rank(6), -1)
+
+    def test_rank_follows_group_order(self):
+        self.assertEqual(self.tracker.rank(1), 0)
+        self.assertEqual(self.tracker.rank(2), 0)
+        self.assertEqual(self.tracker.rank(4), 1)
+        self.assertEqual(self.tracker.rank(5), 2)
+
+    def test_cyclic_dependencies(self):
+        tracker = GroupTracker([Group("A", 1, frozenset({1}), ("B",)),
+                                Group("B", 1, frozenset({2}), ("A",))])
+        self.assertFalse(tracker.is_failed("A"))
+        tracker.fail(2)
+        self.assertTrue(tracker.is_failed("A"))
@@ -0,0 +1,47 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from ..testSolution.judge_queue import JudgeQueue, Priority
+
+
+class JudgeQueueTest(SimpleTestCase):
+    def setUp(self):
+        self.started = threading.Event()
+        self.proceed = threading.Event()
+        self.handled = []
+
+    def handler(self, item):
+        if item == "blocker":
+            self.started.set()
+            self.proceed.wait(5)
+        else:
+            self.handled.append(item)
+
+    def test_priority_then_arrival_order(self):
+        judge_queue = JudgeQueue(1, self.handler)
+        judge_queue.put("blocker")
+        self.started.wait(5)
+        judge_queue.put("rejudge 1", Priority.REJUDGE)
+        judge_queue.put("live 1")
+        judge_queue.put("rejudge 2", Priority.REJUDGE)
+        judge_queue.put("live 2")
+        self.proceed.set()
+        judge_queue.join()
+        self.assertEqual(self.handled,
+                         ["live 1", "live 2", "rejudge 1", "rejudge 2"])
+        self.assertEqual(judge_queue.stats()['completed'], 5)
+
+    def test_duplicate_keys_are_dropped(self):
+        judge_queue = JudgeQueue(1, self.handler, key=lambda item: item)
+        judge_queue.put("blocker")
+        self.started.wait(5)
+        self.assertTrue(judge_queue.put("attempt"))
+        self.assertFalse(judge_queue.put("attempt", Priority.REJUDGE))
+        self.proceed.set()
+        judge_queue.join()
+        self.assertEqual(self.handled, ["attempt"])
+        # Handled items may be queued again
+        self.assertTrue(judge_queue.put("attempt"))
+        judge_queue.join()
+        self.assertEqual(self.handled, ["attempt", "attempt"])
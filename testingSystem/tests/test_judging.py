@@ -0,0 +1,170 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+
+from SchoolTestingSystem import settings
+from .. import models
+from ..testSolution import compile_cache, instrumentation, sandbox, testing
+from .fixtures import TestDataMixin, create_attempt, create_pupil, \
+    create_task, create_testset
+
+ENDLESS_LOOP = "while True:\n    pass\n"
+CPP_ENDLESS_LOOP = "int main() {\n    volatile long x = 0;\n" \
+                   "    while (true) x++;\n}\n"
+# Touches every page, so the memory is used rather than only reserved
+HUGE_LIST = "a = [0] * 10 ** 8\nprint(len(a))\n"
+CPP_HUGE_VECTOR = "#include <vector>\n" \
+                  "int main() {\n" \
+                  "    std::vector<int> v(100000000, 1);\n" \
+                  "    return v[12345] - 1;\n" \
+                  "}\n"
+SLEEP = "import time\ntime.sleep(30)\n"
+IDLENESS_TIME_LIMIT = 1000  # ms
+
+
+class JudgingTests:
+    """
+    Проверка решений на настоящих тестах. Подклассы задают способ запуска
+    решений backend
+    """
+    backend = None
+
+    def setUp(self):
+        super().setUp()
+        cache = compile_cache.CompileCache(tempfile.mkdtemp(), 1024 ** 3)
+        self.addCleanup(shutil.rmtree, cache.root, True)
+        for patcher in (
+                mock.patch.object(settings, 'JUDGE_FLUSH_INTERVAL', 3600),
+                mock.patch.object(settings, 'JUDGE_VERDICT_CACHE', False),
+                mock.patch.object(settings, 'JUDGE_EXECUTION_BACKEND',
+                                  self.backend),
+                mock.patch.object(compile_cache, 'cache', cache),
+                # Both backends keep their own copy of the limit
+                mock.patch.object(sandbox, 'IDLENESS_TIME_LIMIT',
+                                  IDLENESS_TIME_LIMIT),
+                mock.patch.object(testing, 'IDLENESS_TIME_LIMIT',
+                                  IDLENESS_TIME_LIMIT),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.pupil = create_pupil()
+        self.task = create_task(create_testset(("1", "1")), output_limit=1)
+
+    def judge(self, solution, language='Python'):
+        attempt = create_attempt(self.pupil, self.task, solution=solution,
+                                 language=language)
+        testing.judge_submission(attempt, instrumentation.StageTimer(
+            attempt.language
+        ), None)
+        return attempt.checked_tests.get()
+
+    def test_accepted(self):
+        test = self.judge("print(input())")
+        self.assertEqual(test.status, models.Status.OK)
+        self.assertLessEqual(test.time_used, self.task.time_limit)
+
+    def test_runtime_error_hides_the_workspace(self):
+        test = self.judge("raise ValueError")
+        self.assertEqual(test.status, models.Status.RE)
+        self.assertIn('File "main.py", line 1', test.message)
+        self.assertNotIn(settings.JUDGE_WORKSPACE_ROOT, test.message)
+
+    def test_output_limit(self):
+        test = self.judge("print('x' * 10 ** 6)")
+        self.assertEqual(test.status, models.Status.OL)
+        self.assertNotIn(settings.JUDGE_WORKSPACE_ROOT, test.message)
+
+    def test_time_limit(self):
+        for language, solution in (('Python', ENDLESS_LOOP),
+                                   ('C++', CPP_ENDLESS_LOOP)):
+            with self.subTest(language=language):
+                test = self.judge(solution, language)
+                self.assertEqual(test.status, models.Status.TL)
+                self.assertGreater(test.time_used, self.task.time_limit)
+
+    def test_memory_limit(self):
+        for language, solution in (('Python', HUGE_LIST),
+                                   ('C++', CPP_HUGE_VECTOR)):
+            with self.subTest(language=language):
+                test = self.judge(solution, language)
+                self.assertEqual(test.status, models.Status.ML)
+
+    def test_idleness_limit(self):
+        test = self.judge(SLEEP)
+        self.assertEqual(test.status, models.Status.IL)
+        self.assertLess(test.time_used, self.task.time_limit)
+
+
+class JudgingTest(JudgingTests, TestDataMixin, TestCase):
+    backend = 'rlimit'
+
+    def test_output_limit_traceback(self):
+        # Python ignores SIGXFSZ and fails to write past the file size limit
+        test = self.judge("print('x' * 10 ** 6)")
+        self.assertEqual(test.status, models.Status.OL)
+        self.assertIn('File "main.py", line 1', test.message)
+        self.assertNotIn(settings.JUDGE_WORKSPACE_ROOT, test.message)
+
+    def test_start_failure(self):
+        test = models.CheckedTest(status=models.Status.TS, time_used=0,
+                                  memory_used=0)
+        with tempfile.TemporaryDirectory() as folder, \
+                tempfile.TemporaryFile() as stdin, \
+                tempfile.TemporaryFile() as stdout, \
+                tempfile.TemporaryFile() as stderr:
+            returncode = sandbox.run(
+                self.task, test, ("./missing",), stdin, stdout, stderr,
+                instrumentation.StageTimer('C++'), None, folder
+            )
+            message = sandbox.read_head(stderr, 1024).decode()
+        self.assertEqual(returncode, 127)
+        self.assertIn("Не удалось запустить решение", message)
+
+
+class PsutilJudgingTest(JudgingTests, TestDataMixin, TestCase):
+    backend = 'psutil'
+
+
+class ZygoteJudgingTest(JudgingTest):
+    """Решения на Python выполняются в форках зиготы"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(settings, 'JUDGE_PYTHON_ZYGOTE', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        start = mock.patch.object(sandbox.zygote_process, 'start',
+                                  wraps=sandbox.zygote_process.start)
+        self.zygote_start = start.start()
+        self.addCleanup(start.stop)
+
+    def test_bytecode_runs_in_the_zygote(self):
+        test = self.judge("import math\nprint(math.isqrt(int(input())))")
+        self.assertEqual(test.status, models.Status.OK)
+        request = self.zygote_start.call_args[0][0]
+        self.assertTrue(request['bytecode'].endswith("main.pyc"))
+
+    def test_exit_codes(self):
+        for solution, status in (
+                ("import sys\nprint(1)\nsys.exit()", models.Status.OK),
+                ("import sys\nprint(1)\nsys.exit(0)", models.Status.OK),
+                ("import sys\nsys.exit(3)", models.Status.RE),
+                ("raise SystemExit(True)", models.Status.RE),
+        ):
+            with self.subTest(solution=solution):
+                self.assertEqual(self.judge(solution).status, status)
+
+    def test_exit_message(self):
+        test = self.judge("import sys\nsys.exit('Нет ответа')")
+        self.assertEqual(test.status, models.Status.RE)
+        self.assertEqual(test.message.strip(), "Нет ответа")
+
+    def test_traceback_starts_in_the_solution(self):
+        test = self.judge("def f():\n    raise ValueError\n\n\nf()")
+        self.assertEqual(test.status, models.Status.RE)
+        frames = [line for line in test.message.splitlines()
+                  if line.strip().startswith("File ")]
+        self.assertEqual(frames, ['  File "main.py", line 5, in <module>',
+                                  '  File "main.py", line 2, in f'])
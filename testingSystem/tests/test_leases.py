@@ -0,0 +1,123 @@
+import socket
+import subprocess
+import sys
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from SchoolTestingSystem import settings
+from .. import models
+from ..testSolution import leases, testing
+from .fixtures import TestDataMixin, create_attempt, create_checked_tests, \
+    create_pupil, create_task, create_testset
+
+
+def dead_owner():
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return f"{socket.gethostname()}:{process.pid}:0"
+
+
+class LeasesTest(TestDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.pupil = create_pupil()
+        self.task = create_task(create_testset(("1", "1"), ("2", "2")))
+
+    def test_claim_in_priority_order(self):
+        later = create_attempt(self.pupil, self.task, judge_priority=1)
+        first = create_attempt(self.pupil, self.task)
+        claimed = leases.claim("judge")
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual(claimed.judge_state, models.JudgeState.JUDGING)
+        self.assertEqual(claimed.lease_owner, "judge")
+        self.assertEqual(claimed.judge_runs, 1)
+        self.assertEqual(leases.claim("other").id, later.id)
+        self.assertIsNone(leases.claim("other"))
+
+    def test_expired_lease_is_claimed_again(self):
+        attempt = create_attempt(self.pupil, self.task)
+        leases.claim("judge")
+        self.assertIsNone(leases.claim("other", attempt.id))
+        models.Attempt.objects.filter(id=attempt.id).update(
+            lease_expires=timezone.now() - timedelta(seconds=1)
+        )
+        claimed = leases.claim("other", attempt.id)
+        self.assertEqual(claimed.lease_owner, "other")
+        self.assertEqual(claimed.judge_runs, 2)
+        # The first judge has lost the attempt
+        self.assertFalse(leases.extend(attempt, "judge"))
+        self.assertTrue(leases.extend(attempt, "other"))
+
+    def test_release_by_another_owner_is_ignored(self):
+        attempt = leases.claim("judge", create_attempt(self.pupil,
+                                                       self.task).id)
+        leases.release(attempt, "other")
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.judge_state, models.JudgeState.JUDGING)
+        leases.release(attempt, "judge")
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.judge_state, models.JudgeState.DONE)
+        self.assertIsNone(attempt.lease_owner)
+
+    def test_recover(self):
+        abandoned = leases.claim(dead_owner(), create_attempt(
+            self.pupil, self.task
+        ).id)
+        alive = leases.claim(leases.default_owner(), create_attempt(
+            self.pupil, self.task
+        ).id)
+        unfinished = create_attempt(self.pupil, self.task,
+                                    judge_state=models.JudgeState.DONE)
+        create_checked_tests(unfinished, models.Status.OK,
+                             models.Status.TS)
+        finished = create_attempt(self.pupil, self.task,
+                                  judge_state=models.JudgeState.DONE)
+        create_checked_tests(finished, models.Status.OK, models.Status.WA)
+
+        self.assertEqual(leases.recover(), 2)
+        states = dict(models.Attempt.objects.values_list('id',
+                                                         'judge_state'))
+        self.assertEqual(states, {
+            abandoned.id: models.JudgeState.PENDING,
+            alive.id: models.JudgeState.JUDGING,
+            unfinished.id: models.JudgeState.PENDING,
+            finished.id: models.JudgeState.DONE,
+        })
+
+    def test_give_up_after_max_runs(self):
+        attempt = create_attempt(self.pupil, self.task)
+        with mock.patch.object(testing, 'judge_submission',
+                               side_effect=RuntimeError):
+            for run in range(settings.JUDGE_MAX_RUNS):
+                claimed = leases.claim("judge", attempt.id)
+                with self.assertRaises(RuntimeError):
+                    testing.judge_claimed_attempt(claimed, "judge")
+                claimed.refresh_from_db()
+                self.assertEqual(claimed.judge_state,
+                                 models.JudgeState.PENDING)
+            testing.judge_claimed_attempt(leases.claim("judge", attempt.id),
+                                          "judge")
+
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.judge_state, models.JudgeState.DONE)
+        self.assertEqual(attempt.verdict, models.Status.SE)
+        self.assertEqual(attempt.judge_message, leases.GIVE_UP_MESSAGE)
+        self.assertTrue(attempt.is_judged)
+        standing = models.Standing.objects.get(pupil=self.pupil,
+                                               task=self.task)
+        self.assertFalse(standing.solved)
+
+    def test_give_up_marks_unfinished_tests(self):
+        attempt = leases.claim("judge", create_attempt(self.pupil,
+                                                       self.task).id)
+        create_checked_tests(attempt, models.Status.OK, models.Status.TS)
+        leases.give_up(attempt, "judge")
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.verdict, models.Status.SE)
+        self.assertEqual(attempt.failed_test, 2)
+        self.assertEqual(list(attempt.checked_tests.order_by('id')
+                              .values_list('status', flat=True)),
+                         [models.Status.OK, models.Status.SE])
@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from SchoolTestingSystem import settings
+
+
+class MetricsViewTest(TestCase):
+    def setUp(self):
+        for patcher in (
+                mock.patch.object(settings, 'JUDGE_METRICS_TOKEN', "secret"),
+                mock.patch.object(settings, 'JUDGE_METRICS_ALLOWED_IPS',
+                                  ["10.0.0.2"]),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.url = reverse('metrics')
+
+    def test_requests_through_a_local_proxy_are_refused(self):
+        response = self.client.get(self.url, REMOTE_ADDR="127.0.0.1")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(self.url, REMOTE_ADDR="127.0.0.1",
+                                   HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 404)
+
+    def test_token(self):
+        response = self.client.get(self.url, REMOTE_ADDR="127.0.0.1",
+                                   HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("judge_attempts", response.content.decode())
+
+    def test_allowed_address(self):
+        response = self.client.get(self.url, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 200)
+
+    def test_staff(self):
+        self.client.force_login(User.objects.create_user(
+            "admin", password="password", is_staff=True
+        ))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_without_token_nothing_matches_the_header(self):
+        with mock.patch.object(settings, 'JUDGE_METRICS_TOKEN', None):
+            response = self.client.get(self.url,
+                                       HTTP_AUTHORIZATION="Bearer None")
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from SchoolTestingSystem import settings
+from ..testSolution import checker_worker, plugins
+
+CHECKER = 'testingSystem.tests.sleepy_checker'
+
+
+class CheckerPoolTest(SimpleTestCase):
+    def setUp(self):
+        for patcher in (
+                mock.patch.object(settings, 'JUDGE_CHECKER_TIME_LIMIT', 1),
+                mock.patch.object(plugins, 'POOL_GRACE_TIME', 1),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.pool = plugins.CheckerPool()
+        self.addCleanup(self.pool.close)
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def check(self, output):
+        return self.pool.run(CHECKER, "", self.path, self.path,
+                             output.encode(), 10)
+
+    def test_hung_checker_does_not_abort_other_checks(self):
+        results = []
+        # Runs while the hung checker is killed
+        other = threading.Thread(target=lambda: (
+            time.sleep(1), results.append(self.check("1.5"))
+        ))
+        other.start()
+        with self.assertRaises(checker_worker.TimeLimitExceeded):
+            self.check("hang")
+        other.join()
+        self.assertEqual(results, [True])
+        self.assertTrue(self.check("0"))
+
+    def test_dead_idle_process_is_replaced(self):
+        self.assertTrue(self.check("0"))
+        for process in self.pool._idle:
+            process.process.kill()
+            process.process.join()
+        self.assertTrue(self.check("0"))
+
+    def test_checker_errors_are_reported(self):
+        with self.assertRaises(ValueError):
+            self.check("not a number")
+        self.assertTrue(self.check("0"))
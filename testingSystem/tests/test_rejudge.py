@@ -0,0 +1,99 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from SchoolTestingSystem import settings
+from .. import models
+from ..management.commands import rejudge
+from ..testSolution import verdict_cache
+from ..testSolution.judge_queue import Priority
+from .fixtures import TestDataMixin, create_attempt, create_checked_tests, \
+    create_pupil, create_task, create_testset
+
+
+class RejudgeTest(TestDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # The command pins the process it runs in
+        patcher = mock.patch.object(rejudge.cores, 'pin_to_reserved')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pupil = create_pupil()
+        self.task = create_task(create_testset(("1", "1"), ("2", "2")))
+        self.fingerprint = verdict_cache.judge_fingerprint(self.task,
+                                                           'Python')
+        self.actual = self.judged_attempt()
+        self.old_tests = self.judged_attempt(testset_version=0)
+        self.old_limits = self.judged_attempt(fingerprint="old")
+        self.without_tests = create_attempt(
+            self.pupil, create_task(), judge_state=models.JudgeState.DONE
+        )
+
+    def judged_attempt(self, testset_version=None, fingerprint=None):
+        attempt = create_attempt(
+            self.pupil, self.task, judge_state=models.JudgeState.DONE,
+            judge_runs=1,
+            testset_version=self.task.testset.version
+            if testset_version is None else testset_version
+        )
+        create_checked_tests(attempt, models.Status.OK, models.Status.OK)
+        attempt.checked_tests.update(
+            judge_fingerprint=fingerprint or self.fingerprint
+        )
+        return attempt
+
+    def test_outdated_attempts(self):
+        self.assertCountEqual(
+            rejudge.outdated_attempts(models.Attempt.objects.all()),
+            [self.old_tests.id, self.old_limits.id]
+        )
+        test = self.task.testset.tests.first()
+        test.output = "3"
+        test.save()
+        self.assertEqual(
+            len(rejudge.outdated_attempts(models.Attempt.objects.all())), 3
+        )
+
+    def test_dry_run(self):
+        output = StringIO()
+        call_command('rejudge', dry_run=True, stdout=output)
+        self.assertIn("2 outdated attempts", output.getvalue())
+        self.assertFalse(models.Attempt.objects.exclude(
+            judge_state=models.JudgeState.DONE
+        ).exists())
+
+    def test_outdated_attempts_are_requeued(self):
+        with mock.patch.object(settings, 'JUDGE_MODE', 'daemon'), \
+                mock.patch.object(rejudge.Command, 'report_progress'):
+            call_command('rejudge', tasks=[self.task.id], stdout=StringIO())
+        self.assertCountEqual(
+            models.Attempt.objects.filter(
+                judge_state=models.JudgeState.PENDING, judge_runs=0,
+                judge_priority=Priority.REJUDGE
+            ).values_list('id', flat=True),
+            [self.old_tests.id, self.old_limits.id]
+        )
+
+    def test_rerun_limits(self):
+        slow = self.judged_attempt()
+        slow.checked_tests.filter(
+            id=slow.checked_tests.order_by('id').first().id
+        ).update(status=models.Status.TL, time_used=1001)
+        self.assertCountEqual(
+            rejudge.load_dependent_attempts(models.Attempt.objects.all()),
+            [slow.id]
+        )
+        with mock.patch.object(settings, 'JUDGE_MODE', 'daemon'), \
+                mock.patch.object(rejudge.Command, 'report_progress'):
+            call_command('rejudge', tasks=[self.task.id], rerun_limits=True,
+                         stdout=StringIO())
+        slow.refresh_from_db()
+        self.assertEqual(slow.judge_state, models.JudgeState.PENDING)
+        self.assertEqual(
+            list(slow.checked_tests.order_by('id').values_list(
+                'status', 'time_used'
+            )),
+            [(models.Status.TS, 0), (models.Status.OK, 0)]
+        )
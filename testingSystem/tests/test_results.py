@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from SchoolTestingSystem import settings
+from .. import models
+from ..testSolution import plugins, results
+from .fixtures import MigrationTestCase, TestDataMixin, create_attempt, \
+    create_historical_attempt, create_pupil, create_task, create_testset
+
+
+class ResultBufferTest(TestDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.task = create_task(create_testset(("1", "1"), ("2", "2"),
+                                               ("3", "3")))
+        self.attempt = create_attempt(create_pupil(), self.task)
+
+    def statuses(self):
+        return list(self.attempt.checked_tests.order_by('id')
+                    .values_list('status', flat=True))
+
+    def test_prepare_creates_pending_results(self):
+        tests = results.ResultBuffer(self.attempt).prepare(
+            self.task.testset, "fingerprint"
+        )
+        self.assertEqual([test.status for test in tests],
+                         [models.Status.TS] * 3)
+        self.assertEqual(self.statuses(), [models.Status.TS] * 3)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.verdict, models.Status.TS)
+        self.assertEqual(self.attempt.tests_total, 3)
+
+    def test_results_are_written_in_batches(self):
+        with mock.patch.object(settings, 'JUDGE_FLUSH_INTERVAL', 3600):
+            with results.ResultBuffer(self.attempt) as buffer:
+                tests = buffer.prepare(self.task.testset, "fingerprint")
+                buffer.set_post_processor(plugins.get_post_processor(None))
+                for test, status in zip(tests, (models.Status.OK,
+                                                models.Status.WA)):
+                    test.status = status
+                    test.time_used = 10
+                    buffer.update(test)
+                # Nothing is written before the flush
+                self.assertEqual(self.statuses(), [models.Status.TS] * 3)
+            self.assertEqual(self.statuses(), [
+                models.Status.OK, models.Status.WA, models.Status.TS
+            ])
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.verdict, models.Status.WA)
+        self.assertEqual(self.attempt.failed_test, 2)
+        self.assertEqual(self.attempt.tests_done, 2)
+        self.assertEqual(self.attempt.max_time_used, 10)
+        self.assertAlmostEqual(self.attempt.score, 100 / 3)
+
+
+class CheckedTestAttemptMigrationTest(MigrationTestCase):
+    migrate_from = '0013_task_output_limit'
+    migrate_to = '0014_checkedtest_attempt'
+
+    def setUpData(self, apps):
+        Test = apps.get_model('testingSystem', 'Test')
+        CheckedTest = apps.get_model('testingSystem', 'CheckedTest')
+        test = Test.objects.create(input_hash="", output_hash="")
+        attempt = create_historical_attempt(apps)
+        self.attempt_id = attempt.id
+        checked_tests = [
+            CheckedTest.objects.create(test=test, status='OK',
+                                       memory_used=0, time_used=0)
+            for _ in range(3)
+        ]
+        attempt.checked_tests.add(*checked_tests[:2])
+        self.checked_test_ids = [test.id for test in checked_tests[:2]]
+
+    def test_results_are_bound_to_attempts(self):
+        CheckedTest = self.apps.get_model('testingSystem', 'CheckedTest')
+        self.assertEqual(
+            list(CheckedTest.objects.order_by('id').values_list(
+                'id', 'attempt_id'
+            )),
+            [(checked_test_id, self.attempt_id)
+             for checked_test_id in self.checked_test_ids]
+        )
+
+
+class ResultReuseTest(TestDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.testset = create_testset(("1", "1"), ("2", "2"), ("3", "3"))
+        self.attempt = create_attempt(create_pupil(),
+                                      create_task(self.testset))
+        results.ResultBuffer(self.attempt).prepare(self.testset, "judge")
+        for checked_test, status in zip(
+                self.attempt.checked_tests.order_by('id'),
+                (models.Status.OK, models.Status.WA, models.Status.SK)
+        ):
+            checked_test.status = status
+            checked_test.time_used = 10
+            checked_test.save()
+
+    def statuses(self, tests):
+        return [(test.test_id, test.status) for test in tests]
+
+    def test_unchanged_results_are_reused(self):
+        first, second, third = self.testset.tests.order_by('id')
+        second.output = "4"
+        second.save()
+        self.testset.tests.add(create_testset(("5", "5")).tests.get())
+        self.testset.refresh_from_db()
+
+        tests = results.ResultBuffer(self.attempt).prepare(self.testset,
+                                                           "judge")
+        self.assertEqual(self.statuses(tests)[:3], [
+            (first.id, models.Status.OK),
+            # Changed tests and skipped ones are judged again
+            (second.id, models.Status.TS),
+            (third.id, models.Status.TS),
+        ])
+        self.assertEqual(tests[3].status, models.Status.TS)
+        self.assertEqual(tests[0].time_used, 10)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.testset_version, self.testset.version)
+
+    def set_statuses(self, *statuses):
+        for checked_test, status in zip(
+                self.attempt.checked_tests.order_by('id'), statuses
+        ):
+            checked_test.status = status
+            checked_test.save()
+
+    def test_finished_results_survive_recovery(self):
+        # The judge was interrupted before it finished the last test
+        self.set_statuses(models.Status.TL, models.Status.IL,
+                          models.Status.TS)
+        tests = results.ResultBuffer(self.attempt).prepare(self.testset,
+                                                           "judge")
+        self.assertEqual([test.status for test in tests], [
+            models.Status.TL, models.Status.IL, models.Status.TS
+        ])
+        self.assertEqual(tests[0].time_used, 10)
+
+    def test_server_errors_are_judged_again(self):
+        self.set_statuses(models.Status.OK, models.Status.SE,
+                          models.Status.OL)
+        tests = results.ResultBuffer(self.attempt).prepare(self.testset,
+                                                           "judge")
+        self.assertEqual([test.status for test in tests], [
+            models.Status.OK, models.Status.TS, models.Status.OL
+        ])
+
+    def test_skipped_results_are_kept_alone(self):
+        tests = results.ResultBuffer(self.attempt).prepare(self.testset,
+                                                           "judge")
+        self.assertEqual([test.status for test in tests], [
+            models.Status.OK, models.Status.WA, models.Status.SK
+        ])
+
+    def test_other_judging_settings_reset_results(self):
+        self.testset.tests.remove(self.testset.tests.order_by('id').last())
+        tests = results.ResultBuffer(self.attempt).prepare(self.testset,
+                                                           "other")
+        self.assertEqual([test.status for test in tests],
+                         [models.Status.TS] * 2)
+        self.assertEqual(self.attempt.checked_tests.count(), 2)
@@ -0,0 +1,123 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import models, standings
+from ..testSolution import leases, testing
+from .fixtures import MigrationTestCase, TestDataMixin, create_attempt, \
+    create_historical_attempt, create_pupil, create_task, create_testset
+
+
+class StandingsTest(TestDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.school_class = models.Class.objects.create(name="9А")
+        self.pupil = create_pupil("first", self.school_class)
+        self.task = create_task(name="Проценты")
+
+    def judged(self, pupil, task, score, verdict=models.Status.WA):
+        return create_attempt(pupil, task, score=score, verdict=verdict,
+                              judge_state=models.JudgeState.DONE)
+
+    def test_update_keeps_the_best_attempt(self):
+        self.judged(self.pupil, self.task, 40)
+        standings.update(self.pupil.id, self.task.id)
+        best = self.judged(self.pupil, self.task, 100, models.Status.OK)
+        self.judged(self.pupil, self.task, 70)
+        create_attempt(self.pupil, self.task, score=100)  # not judged yet
+        standings.update(self.pupil.id, self.task.id)
+
+        standing = models.Standing.objects.get()
+        self.assertEqual(standing.best_score, 100)
+        self.assertEqual(standing.best_attempt_id, best.id)
+        self.assertTrue(standing.solved)
+        self.assertEqual(standing.attempts, 3)
+        self.school_class.refresh_from_db()
+        self.assertIsNotNone(self.school_class.standings_time)
+
+    def test_update_without_judged_attempts(self):
+        self.judged(self.pupil, self.task, 40)
+        standings.update(self.pupil.id, self.task.id)
+        models.Attempt.objects.all().delete()
+        standings.update(self.pupil.id, self.task.id)
+        self.assertFalse(models.Standing.objects.exists())
+
+    def test_totals_are_in_percent(self):
+        testset = create_testset(("1", "1"))
+        models.TestGroup.objects.create(testset=testset, name="1", points=20)
+        models.TestGroup.objects.create(testset=testset, name="2", points=30)
+        points_task = create_task(testset, name="Баллы")
+        second = create_pupil("second", self.school_class)
+        create_pupil("third", self.school_class)
+        for pupil, task, score in ((self.pupil, self.task, 50),
+                                   (self.pupil, points_task, 10),
+                                   (second, points_task, 50)):
+            self.judged(pupil, task, score)
+            standings.update(pupil.id, task.id)
+
+        table = standings.build(self.school_class)
+        self.assertEqual(table['tasks'], [(self.task.id, "Проценты"),
+                                          (points_task.id, "Баллы")])
+        self.assertEqual([(row['pupil'], row['total'])
+                          for row in table['rows']], [
+            ("second Имя Отчество", 100),
+            ("first Имя Отчество", 70),
+            ("third Имя Отчество", 0),
+        ])
+        first_cells = table['rows'][1]['cells']
+        self.assertEqual(first_cells[1]['score'], 10)
+        self.assertEqual([cell['label'] for cell in first_cells],
+                         ["50.0%", "10.0 из 50"])
+
+    def test_standing_errors_do_not_fail_the_attempt(self):
+        attempt = create_attempt(self.pupil, self.task)
+        with mock.patch.object(testing, 'submit_attempt'), \
+                mock.patch.object(standings, 'update',
+                                  side_effect=OperationalError("locked")), \
+                mock.patch('traceback.print_exc'):
+            testing.judge_claimed_attempt(leases.claim("judge", attempt.id),
+                                          "judge")
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.judge_state, models.JudgeState.DONE)
+
+    def test_view_is_for_teachers(self):
+        self.judged(self.pupil, self.task, 40)
+        standings.update(self.pupil.id, self.task.id)
+        url = reverse('class_standings', args=[self.school_class.id])
+        self.client.force_login(self.pupil.user)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        teacher = create_pupil("teacher", role=models.Role.TEACHER)
+        self.client.force_login(teacher.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "first Имя Отчество")
+        self.assertContains(response, "40.0%")
+
+
+class StandingMigrationTest(MigrationTestCase):
+    migrate_from = '0021_testgroup'
+    migrate_to = '0022_standing'
+
+    def setUpData(self, apps):
+        Attempt = apps.get_model('testingSystem', 'Attempt')
+        first = create_historical_attempt(apps, judge_state='DN', score=40,
+                                          verdict='WA')
+        self.best = Attempt.objects.create(
+            author=first.author, task=first.task, solution="",
+            language='Python', judge_state='DN', score=100, verdict='OK'
+        )
+        Attempt.objects.create(author=first.author, task=first.task,
+                               solution="", language='Python',
+                               judge_state='PE', score=100)
+        self.pupil_id, self.task_id = first.author_id, first.task_id
+
+    def test_standings_are_filled(self):
+        Standing = self.apps.get_model('testingSystem', 'Standing')
+        self.assertEqual(list(Standing.objects.values(
+            'pupil', 'task', 'best_score', 'best_attempt', 'solved',
+            'attempts'
+        )), [{'pupil': self.pupil_id, 'task': self.task_id,
+              'best_score': 100, 'best_attempt': self.best.id,
+              'solved': True, 'attempts': 2}])
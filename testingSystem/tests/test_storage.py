@@ -0,0 +1,20 @@
+from .. import storage
+from .fixtures import MigrationTestCase, TestDataMixin
+
+
+class TestDataStorageMigrationTest(TestDataMixin, MigrationTestCase):
+    migrate_from = '0011_cachedverdict'
+    migrate_to = '0012_test_data_storage'
+
+    def setUpData(self, apps):
+        Test = apps.get_model('testingSystem', 'Test')
+        self.test_id = Test.objects.create(input="1 2\n", output="3\n").id
+
+    def test_data_is_moved_to_storage(self):
+        test = self.apps.get_model('testingSystem', 'Test').objects.get(
+            id=self.test_id
+        )
+        self.assertEqual(storage.read(test.input_hash), b"1 2\n")
+        self.assertEqual(test.input_size, 4)
+        self.assertEqual(storage.read(test.output_hash), b"3\n")
+        self.assertEqual(test.output_size, 2)
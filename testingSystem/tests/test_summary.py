@@ -0,0 +1,75 @@
+import types
+
+from django.test import SimpleTestCase
+
+from ..models import Status, summarize
+from .fixtures import MigrationTestCase, create_historical_attempt
+
+
+def checked_test(status, time_used=0, memory_used=0):
+    return types.SimpleNamespace(status=status, time_used=time_used,
+                                 memory_used=memory_used)
+
+
+class SummarizeTest(SimpleTestCase):
+    def test_all_passed(self):
+        summary = summarize([checked_test(Status.OK, 10, 100),
+                             checked_test(Status.OK, 30, 50)])
+        self.assertEqual(summary, {
+            'verdict': Status.OK, 'failed_test': None,
+            'max_time_used': 30, 'max_memory_used': 100,
+            'tests_done': 2, 'tests_total': 2,
+        })
+
+    def test_first_failure_is_the_verdict(self):
+        summary = summarize([checked_test(Status.OK),
+                             checked_test(Status.TL, 1000),
+                             checked_test(Status.WA),
+                             checked_test(Status.SK)])
+        self.assertEqual(summary['verdict'], Status.TL)
+        self.assertEqual(summary['failed_test'], 2)
+        self.assertEqual(summary['tests_done'], 4)
+
+    def test_in_progress(self):
+        summary = summarize([checked_test(Status.OK),
+                             checked_test(Status.TS),
+                             checked_test(Status.WA)])
+        self.assertEqual(summary['verdict'], Status.TS)
+        self.assertEqual(summary['failed_test'], 3)
+        self.assertEqual(summary['tests_done'], 2)
+
+    def test_no_tests(self):
+        summary = summarize([])
+        self.assertEqual(summary['verdict'], Status.SE)
+        self.assertEqual(summary['tests_total'], 0)
+
+
+class AttemptSummaryMigrationTest(MigrationTestCase):
+    migrate_from = '0014_checkedtest_attempt'
+    migrate_to = '0015_attempt_summary'
+
+    def setUpData(self, apps):
+        Test = apps.get_model('testingSystem', 'Test')
+        CheckedTest = apps.get_model('testingSystem', 'CheckedTest')
+        test = Test.objects.create(input_hash="", output_hash="")
+        self.judged = create_historical_attempt(apps, judge_state='DN').id
+        for status, time_used in (('OK', 10), ('WA', 30), ('TL', 20)):
+            CheckedTest.objects.create(attempt_id=self.judged, test=test,
+                                       status=status, time_used=time_used,
+                                       memory_used=0)
+        self.without_tests = create_historical_attempt(
+            apps, judge_state='DN'
+        ).id
+        self.pending = create_historical_attempt(apps, judge_state='PE').id
+
+    def test_summary_is_filled(self):
+        Attempt = self.apps.get_model('testingSystem', 'Attempt')
+        summaries = {attempt['id']: attempt for attempt in
+                     Attempt.objects.values('id', 'verdict', 'failed_test',
+                                            'max_time_used', 'tests_done')}
+        self.assertEqual(summaries[self.judged], {
+            'id': self.judged, 'verdict': 'WA', 'failed_test': 2,
+            'max_time_used': 30, 'tests_done': 3,
+        })
+        self.assertEqual(summaries[self.without_tests]['verdict'], 'SE')
+        self.assertEqual(summaries[self.pending]['verdict'], 'TS')
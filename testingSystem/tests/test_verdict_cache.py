@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from SchoolTestingSystem import settings
+from .. import models
+from ..testSolution import instrumentation, testing, verdict_cache
+from .fixtures import TestDataMixin, create_attempt, create_checked_tests, \
+    create_pupil, create_task, create_testset
+
+
+class VerdictCacheTest(TestDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(settings, 'JUDGE_VERDICT_CACHE', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pupil = create_pupil()
+        self.task = create_task(create_testset(("1", "1"), ("2", "2")))
+
+    def judged_attempt(self, *statuses, score=50):
+        attempt = create_attempt(self.pupil, self.task)
+        create_checked_tests(attempt, *statuses)
+        attempt.score = score
+        return attempt
+
+    def test_store_and_restore(self):
+        judged = self.judged_attempt(models.Status.OK, models.Status.WA)
+        key = verdict_cache.get_key(judged)
+        verdict_cache.store(judged, key)
+
+        attempt = create_attempt(self.pupil, self.task)
+        self.assertEqual(verdict_cache.get_key(attempt), key)
+        self.assertTrue(verdict_cache.restore(attempt, key))
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.verdict, models.Status.WA)
+        self.assertEqual(attempt.failed_test, 2)
+        self.assertEqual(attempt.score, 50)
+        self.assertEqual(attempt.testset_version, self.task.testset.version)
+        self.assertEqual(list(attempt.checked_tests.order_by('id')
+                              .values_list('status', flat=True)),
+                         [models.Status.OK, models.Status.WA])
+
+    def test_unreproducible_verdicts_are_not_stored(self):
+        judged = self.judged_attempt(models.Status.OK, models.Status.TL)
+        key = verdict_cache.get_key(judged)
+        verdict_cache.store(judged, key)
+        self.assertFalse(models.CachedVerdict.objects.exists())
+        self.assertFalse(verdict_cache.restore(
+            create_attempt(self.pupil, self.task), key
+        ))
+
+    def test_output_limit_is_reproducible_under_rlimit(self):
+        judged = self.judged_attempt(models.Status.OK, models.Status.OL)
+        key = verdict_cache.get_key(judged)
+        with mock.patch.object(settings, 'JUDGE_EXECUTION_BACKEND',
+                               'psutil'):
+            verdict_cache.store(judged, key)
+        self.assertFalse(models.CachedVerdict.objects.exists())
+        with mock.patch.object(settings, 'JUDGE_EXECUTION_BACKEND',
+                               'rlimit'):
+            verdict_cache.store(judged, key)
+        self.assertTrue(verdict_cache.restore(
+            create_attempt(self.pupil, self.task), key
+        ))
+
+    def test_key_depends_on_solution_and_tests(self):
+        attempt = create_attempt(self.pupil, self.task)
+        key = verdict_cache.get_key(attempt)
+        other_solution = create_attempt(self.pupil, self.task,
+                                        solution="print(2)")
+        self.assertNotEqual(verdict_cache.get_key(other_solution), key)
+
+        test = self.task.testset.tests.order_by('id').first()
+        test.output = "3"
+        test.save()
+        self.assertNotEqual(verdict_cache.get_key(attempt), key)
+
+    def test_task_without_tests(self):
+        self.task.testset = None
+        self.task.save()
+        attempt = create_attempt(self.pupil, self.task)
+        testing.judge_submission(attempt, instrumentation.StageTimer(
+            attempt.language
+        ), None)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.verdict, models.Status.SE)
+        self.assertEqual(attempt.judge_message, testing.NO_TESTS_MESSAGE)
+        self.assertFalse(models.CachedVerdict.objects.exists())
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from ..testSolution import workspaces
+
+
+class SpoolTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = os.path.join(directory.name, "spool")
+        self.spool = workspaces.Spool(self.directory, 100)
+
+    def test_files_are_removed(self):
+        with self.spool.files(10) as (stdout, stderr):
+            stdout.write(b"output")
+            self.assertEqual(len(os.listdir(self.directory)), 0)
+            self.assertEqual(self.spool.stats(),
+                             {'reserved': 20, 'users': 1})
+        self.assertEqual(self.spool.stats(), {'reserved': 0, 'users': 0})
+
+    def test_runs_wait_for_space(self):
+        started = threading.Event()
+        with self.spool.files(40):
+            # A limit larger than the spool is still served alone
+            waiting = threading.Thread(target=self.use_spool,
+                                       args=(60, started))
+            waiting.start()
+            self.assertFalse(started.wait(0.2))
+        waiting.join(5)
+        self.assertTrue(started.is_set())
+
+    def use_spool(self, output_limit, started):
+        with self.spool.files(output_limit):
+            started.set()
+
+
+class WorkspacePoolTest(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = os.path.join(root.name, "workspaces")
+
+    def wait_until(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_released_directories_are_cleaned_and_reused(self):
+        pool = workspaces.WorkspacePool(self.root, 1024 ** 2, spare=1)
+        path = pool.acquire()
+        self.assertEqual(os.path.dirname(path), self.root)
+        os.makedirs(os.path.join(path, "folder"))
+        with open(os.path.join(path, "folder", "main.py"), 'w') as f:
+            f.write("print(1)")
+        pool.release(path)
+        self.wait_until(lambda: pool.stats()['clean'] == 1)
+        self.assertEqual(pool.acquire(), path)
+        self.assertEqual(os.listdir(path), [])
+        self.assertEqual(pool.stats(), {'in_use': 1, 'clean': 0,
+                                        'dirty': 0})
+
+    def test_spare_directories_are_limited(self):
+        pool = workspaces.WorkspacePool(self.root, 1024 ** 2, spare=0)
+        path = pool.acquire()
+        pool.release(path)
+        self.wait_until(lambda: pool.stats()['dirty'] == 0)
+        self.assertFalse(os.path.exists(path))
+
+    def test_size_limit(self):
+        pool = workspaces.WorkspacePool(self.root, 1024, spare=1)
+        path = pool.acquire()
+        with open(os.path.join(path, "output.txt"), 'wb') as f:
+            f.write(b"x" * 1024)
+        self.assertEqual(pool.usage(), 1024)
+        acquired = []
+        waiting = threading.Thread(
+            target=lambda: acquired.append(pool.acquire())
+        )
+        waiting.start()
+        waiting.join(0.2)
+        self.assertEqual(acquired, [])
+        pool.release(path)
+        waiting.join(5)
+        self.assertEqual(len(acquired), 1)
+
+    def test_directories_of_finished_processes_are_removed(self):
+        # Linux never gives out process ids above 2 ** 22
+        finished = os.path.join(self.root, f"{2 ** 22 + 1}-0")
+        own = os.path.join(self.root, f"{os.getpid()}-100")
+        other = os.path.join(self.root, "cores")
+        for path in (finished, own, other):
+            os.makedirs(path)
+        workspaces.WorkspacePool(self.root, 1024 ** 2, spare=1).acquire()
+        self.assertFalse(os.path.exists(finished))
+        self.assertTrue(os.path.exists(own))
+        self.assertTrue(os.path.exists(other))
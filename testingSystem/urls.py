@@ -10,6 +10,13 @@ urlpatterns = [
     path("register/", views.RegisterView.as_view(), name="register"),
     path("forgot/", views.RecoverPasswordView.as_view(), name="forgot"),
     path("task/<int:id>", views.TaskView.as_view(), name="task"),
+    path("task/<int:id>/attempts", views.AttemptListView.as_view(),
+         name="task_attempts"),
     path("attempt/<int:id>", views.AttemptView.as_view(), name="attempt"),
+    path("attempt/<int:id>/status", views.AttemptStatusView.as_view(),
+         name="attempt_status"),
+    path("class/<int:id>/standings", views.ClassStandingsView.as_view(),
+         name="class_standings"),
+    path("metrics", views.MetricsView.as_view(), name="metrics"),
     re_path('', views.get404Response)
 ]
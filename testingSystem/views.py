@@ -1,12 +1,21 @@
-from django.http import HttpResponseRedirect, HttpResponseNotFound
+import json
+import threading
+import time
+
+from django.http import HttpResponse, HttpResponseRedirect, \
+    HttpResponseNotFound, HttpResponseNotModified, JsonResponse, \
+    StreamingHttpResponse
 from django.urls import reverse
 from django.contrib.auth import authenticate, login
 from django.views.generic import TemplateView
 from django.views import View
 from django.shortcuts import render
+from django.db.models import Q, Subquery
 
-from . import models, forms
-from .testSolution.testing import submit_attempt_async, invoke_post_processor
+from SchoolTestingSystem import settings
+from . import models, forms, standings
+from .testSolution import languages, metrics
+from .testSolution.testing import judge_queue, submit_attempt_async
 
 
 def extract_from_session(name, request, context):
@@ -83,11 +92,34 @@ class RecoverPasswordView(TemplateView):
         return extract_from_session('error', self.request, context)
 
 
-def tests_snapshot(attempt):
-    tests = list(attempt.checked_tests.all())
-    if models.Status.TS in [test.status for test in tests]:
-        attempt.score = invoke_post_processor(attempt, tests)
-    return tests
+ATTEMPTS_PAGE_SIZE = 20
+# Columns of attempts rendered in the attempt history
+ATTEMPT_LIST_FIELDS = ('id', 'creation_time', 'score', 'verdict',
+                       'failed_test', 'tests_done', 'tests_total')
+
+
+def attempts_page(task, user_id, before=None):
+    """
+    Страница истории попыток ученика по задаче, от новых к старым.
+    Возвращает попытки и id последней из них, если есть еще попытки
+    """
+    attempts = models.Attempt.objects.filter(task=task,
+                                             author__user_id=user_id)
+    if before is not None:
+        cursor = Subquery(models.Attempt.objects.filter(
+            id=before
+        ).values('creation_time'))
+        attempts = attempts.filter(
+            Q(creation_time__lt=cursor) | Q(creation_time=cursor,
+                                            id__lt=before)
+        )
+    attempts = list(attempts.order_by('-creation_time', '-id').only(
+        *ATTEMPT_LIST_FIELDS
+    )[:ATTEMPTS_PAGE_SIZE + 1])
+    if len(attempts) > ATTEMPTS_PAGE_SIZE:
+        attempts = attempts[:ATTEMPTS_PAGE_SIZE]
+        return attempts, attempts[-1].id
+    return attempts, None
 
 
 class TaskView(View):
@@ -99,16 +131,13 @@ class TaskView(View):
                       context=self.get_context_data(request, task))
 
     def get_context_data(self, request, task):
+        attempts, next_before = attempts_page(task, request.user.id)
         context = {
             'task': task,
-            'attempts': list(models.Attempt.objects.filter(
-                task__id=task.id,
-                author__user_id=request.user.id
-            ).all()),
-            'languages': [choice[0] for choice in models.Language.choices]
+            'attempts': attempts,
+            'next_before': next_before,
+            'languages': list(languages.get_registry())
         }
-        for attempt in context['attempts']:
-            tests_snapshot(attempt)
         extract_from_session('error', request, context)
         return extract_from_session('solution', request, context)
 
@@ -141,6 +170,25 @@ class TaskView(View):
         return HttpResponseRedirect('')
 
 
+class AttemptListView(View):
+    """Следующая страница истории попыток, строки таблицы для TaskView"""
+
+    def get(self, request, id, *args, **kwargs):
+        task = models.Task.objects.filter(id=id).only('id', 'testset').first()
+        if task is None:
+            return get404Response(request)
+        try:
+            before = int(request.GET['before'])
+        except (KeyError, ValueError):
+            before = None
+        attempts, next_before = attempts_page(task, request.user.id, before)
+        return render(request, 'testingSystem/attempt_rows.html', context={
+            'task': task,
+            'attempts': attempts,
+            'next_before': next_before,
+        })
+
+
 class AttemptView(View):
     def get(self, request, id, *args, **kwargs):
         attempt = models.Attempt.objects.filter(id=id).first()
@@ -149,5 +197,174 @@ class AttemptView(View):
         return render(request, 'testingSystem/attempt.html',
                       context={
                           'attempt': attempt,
-                          'tests': tests_snapshot(attempt)
+                          'tests': list(attempt.checked_tests.order_by('id')),
+                          'status_wait': settings.JUDGE_STATUS_PAGE_WAIT,
                       })
+
+
+def attempt_progress(attempt):
+    return {
+        'id': attempt.id,
+        'version': attempt.progress_version,
+        'judged': attempt.is_judged,
+        'verdict': attempt.verdict,
+        'verdict_label': models.Status(attempt.verdict).label,
+        'score': attempt.score,
+        'score_label': attempt.task.format_score(attempt.score),
+        'failed_test': attempt.failed_test,
+        'message': attempt.judge_message,
+        'tests_done': attempt.tests_done,
+        'tests_total': attempt.tests_total,
+        'max_time_used': attempt.max_time_used,
+        'max_memory_used': attempt.max_memory_used,
+        'tests': [{
+            'status': status,
+            'status_label': models.Status(status).label,
+            'time_used': time_used,
+            'memory_used': memory_used,
+        } for status, time_used, memory_used in attempt.checked_tests.order_by(
+            'id'
+        ).values_list('status', 'time_used', 'memory_used')],
+    }
+
+
+def progress_etag(attempt):
+    return f'"{attempt.id}-{attempt.progress_version}"'
+
+
+def progress_version(id):
+    return models.Attempt.objects.filter(id=id).values_list(
+        'progress_version', flat=True
+    ).first()
+
+
+def wait_for_progress(attempt, timeout):
+    """Ждет изменения попытки не дольше timeout секунд"""
+    deadline = time.monotonic() + timeout
+    while not attempt.is_judged and time.monotonic() < deadline:
+        time.sleep(min(settings.JUDGE_STATUS_POLL_PERIOD,
+                       max(deadline - time.monotonic(), 0)))
+        if progress_version(attempt.id) != attempt.progress_version:
+            attempt.refresh_from_db()
+            return
+
+
+# Event streams served by this process, see JUDGE_STATUS_MAX_STREAMS
+stream_slots = threading.BoundedSemaphore(settings.JUDGE_STATUS_MAX_STREAMS)
+
+
+class ProgressStream:
+    """
+    Изменения попытки в формате server-sent events. Место в
+    stream_slots освобождается, когда сервер закрывает ответ
+    """
+
+    def __init__(self, attempt, version):
+        self.attempt = attempt
+        self.version = version
+        self._closed = False
+
+    def __iter__(self):
+        attempt = self.attempt
+        deadline = time.monotonic() + settings.JUDGE_STATUS_STREAM_TIME
+        while True:
+            if attempt.progress_version != self.version:
+                self.version = attempt.progress_version
+                yield f"id: {self.version}\n" \
+                      f"data: {json.dumps(attempt_progress(attempt))}\n\n"
+            if attempt.is_judged or time.monotonic() >= deadline:
+                return
+            wait_for_progress(attempt, deadline - time.monotonic())
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            stream_slots.release()
+
+
+class AttemptStatusView(View):
+    """
+    Ход проверки попытки в JSON. Поддерживает условный GET по ETag, а с
+    параметром wait=<секунды> ждет изменений, прежде чем ответить 304.
+    С параметром stream или заголовком Accept: text/event-stream
+    отправляет изменения как server-sent events до конца проверки, если
+    процесс не обслуживает уже JUDGE_STATUS_MAX_STREAMS потоков
+    """
+
+    def get(self, request, id, *args, **kwargs):
+        attempt = models.Attempt.objects.filter(id=id).first()
+        if attempt is None:
+            return get404Response(request)
+        if 'stream' in request.GET or 'text/event-stream' in \
+                request.headers.get('Accept', ''):
+            return self.stream(request, attempt)
+
+        if request.headers.get('If-None-Match') == progress_etag(attempt):
+            try:
+                wait = float(request.GET.get('wait', 0))
+            except ValueError:
+                wait = 0
+            wait_for_progress(attempt, min(wait,
+                                           settings.JUDGE_STATUS_MAX_WAIT))
+            if request.headers.get('If-None-Match') == \
+                    progress_etag(attempt):
+                return HttpResponseNotModified()
+        response = JsonResponse(attempt_progress(attempt))
+        response['ETag'] = progress_etag(attempt)
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def stream(self, request, attempt):
+        try:
+            last_version = int(request.headers.get('Last-Event-ID'))
+        except (TypeError, ValueError):
+            last_version = None
+
+        if not stream_slots.acquire(blocking=False):
+            response = HttpResponse(status=503)
+            response['Retry-After'] = settings.JUDGE_STATUS_STREAM_TIME
+            return response
+        response = StreamingHttpResponse(ProgressStream(attempt, last_version),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class ClassStandingsView(View):
+    """
+    Лучшие результаты учеников класса по задачам. Доступна учителям,
+    администраторам и сотрудникам
+    """
+
+    def get(self, request, id, *args, **kwargs):
+        if not request.user.is_staff and not models.MyUser.objects.filter(
+                user__id=request.user.id,
+                role__in=(models.Role.TEACHER, models.Role.ADMIN)
+        ).exists():
+            return get404Response(request)
+        school_class = models.Class.objects.filter(id=id).first()
+        if school_class is None:
+            return get404Response(request)
+        return render(request, 'testingSystem/class_standings.html',
+                      context={
+                          'school_class': school_class,
+                          'table': standings.get_table(school_class),
+                      })
+
+
+class MetricsView(View):
+    """
+    Метрики проверяющей системы в формате Prometheus. Доступны
+    сотрудникам и запросам, которые пропускает metrics.is_allowed. В
+    режиме daemon метрики проверки отдают сами процессы `manage.py judge`
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_staff and not metrics.is_allowed(
+                request.META.get('REMOTE_ADDR'),
+                request.headers.get('Authorization')
+        ):
+            return get404Response(request)
+        return HttpResponse(metrics.render(judge_queue.stats()),
+                            content_type=metrics.CONTENT_TYPE)